@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Per-hotel memoization of analysis results.
+
+Each hotel's rows in pricing_data.csv are fingerprinted (SHA-1 of its raw CSV
+rows, in file order). Metric records of hotels whose fingerprint has not
+changed are reused from outputs/analysis_cache.json and only changed hotels
+are recomputed.
+
+The run fingerprint combines every hotel fingerprint with the config values
+the analysis reads and the archive snapshots booking pace reads. If it matches
+the last completed analysis there is nothing to do. This module only uses the
+standard library, so run.py can check that without importing pandas.
+
+Usage:
+    python analysis_cache.py            # is the analysis up to date?
+"""
+import csv
+import hashlib
+import json
+from datetime import datetime
+
+# Import configuration
+import config
+
+CACHE_VERSION = 1  # Bump when metric calculations change - invalidates every cached record
+
+# Config values that change pricing_analysis.json without changing pricing_data.csv
+ANALYSIS_CONFIG_KEYS = ("REFERENCE_PROPERTY", "REFERENCE_PROPERTIES", "OCCUPANCY_MODE", "ENABLE_PACE", "PACE_LEAD_BUCKETS",
+                        "ENABLE_STREAMING_ANALYSIS", "STREAMING_MEDIAN_ACCURACY")
+
+
+def hotel_fingerprints(csv_path=None):
+    """
+    Fingerprint of each hotel's rows, in order of first appearance.
+
+    Returns:
+        dict: hotel name ('' for rows without one) -> SHA-1 hex digest
+    """
+    csv_path = csv_path or config.PRICING_CSV
+    hashes = {}
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "hotel_name" not in header:
+            return {}
+        name_index = header.index("hotel_name")
+        for row in reader:
+            hotel = row[name_index] if len(row) > name_index else ""
+            digest = hashes.get(hotel)
+            if digest is None:
+                digest = hashes[hotel] = hashlib.sha1("\x1f".join(header).encode("utf-8"))
+            digest.update(("\x1e" + "\x1f".join(row)).encode("utf-8"))
+    return {hotel: digest.hexdigest() for hotel, digest in hashes.items()}
+
+
+def _archive_state():
+    """Archive snapshots (name, size, mtime) that booking pace reads, plus whether its state file exists."""
+    if not config.ENABLE_PACE:
+        return None
+    paths = sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv"))
+    manifest = config.DELTA_ARCHIVE_DIR / "manifest.json"
+    if manifest.exists():
+        paths.append(manifest)
+    return {
+        "snapshots": [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in paths],
+        "pace_state": config.PACE_STATE_FILE.exists(),
+    }
+
+
+def run_fingerprint(fingerprints):
+    """Fingerprint of everything pricing_analysis.json is computed from."""
+    payload = {
+        "version": CACHE_VERSION,
+        "hotels": list(fingerprints.items()),
+        "config": {key: getattr(config, key, None) for key in ANALYSIS_CONFIG_KEYS},
+        "archive": _archive_state(),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Cached metric records per hotel, keyed by the hotel's fingerprint."""
+
+    def __init__(self, path=None):
+        self.path = path or config.ANALYSIS_CACHE_FILE
+        self.run_fingerprint = None
+        self.hotels = {}
+        self.stats = {"reused": 0, "recomputed": 0}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if state.get("version") != CACHE_VERSION:
+            return
+        self.run_fingerprint = state.get("run_fingerprint")
+        self.hotels = state.get("hotels", {})
+
+    def is_current(self, run_fp):
+        """True if the last completed analysis was computed from exactly these inputs."""
+        return run_fp == self.run_fingerprint and config.ANALYSIS_JSON.exists()
+
+    def changed(self, fingerprints):
+        """Hotels whose rows changed (or are not cached yet)."""
+        changed = {hotel for hotel, digest in fingerprints.items() if self.hotels.get(hotel, {}).get("fingerprint") != digest}
+        self.stats = {"reused": len(fingerprints) - len(changed), "recomputed": len(changed)}
+        return changed
+
+    def update(self, fingerprints, records):
+        """
+        Store freshly computed records and drop hotels no longer in the data.
+
+        Args:
+            records: hotel -> {family: record} for the recomputed hotels
+        """
+        for hotel, families in records.items():
+            self.hotels[hotel] = {"fingerprint": fingerprints.get(hotel), "records": families}
+        for hotel in set(fingerprints) - set(records):
+            if self.hotels.get(hotel, {}).get("fingerprint") != fingerprints[hotel]:
+                # Changed but without any record (e.g. only error rows left)
+                self.hotels[hotel] = {"fingerprint": fingerprints[hotel], "records": {}}
+        self.hotels = {hotel: entry for hotel, entry in self.hotels.items() if hotel in fingerprints}
+
+    def record(self, hotel, family):
+        return self.hotels.get(hotel, {}).get("records", {}).get(family)
+
+    def save(self, run_fp):
+        """Mark run_fp as analysed - call once pricing_analysis.json has been written."""
+        self.run_fingerprint = run_fp
+        state = {
+            "version": CACHE_VERSION,
+            "run_fingerprint": run_fp,
+            "saved_at": datetime.now().isoformat(),
+            "hotels": self.hotels,
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+
+    def summary(self):
+        """One-line summary for console output."""
+        total = self.stats["recomputed"] + self.stats["reused"]
+        return f"{self.stats['recomputed']} of {total} properties recomputed, {self.stats['reused']} reused from cache"
+
+
+def is_current():
+    """True if pricing_analysis.json is up to date with pricing_data.csv, the archive and the config."""
+    if not config.ENABLE_ANALYSIS_CACHE or not config.PRICING_CSV.exists():
+        return False
+    return AnalysisCache().is_current(run_fingerprint(hotel_fingerprints()))
+
+
+def main():
+    print("Analysis is up to date" if is_current() else "Analysis needs to run")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,139 +6,380 @@ Analyzes pricing data and generates comprehensive competitive intelligence repor
 """
 import pandas as pd
 import numpy as np
+import csv
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
 # Import configuration
 import config
+from analysis_cache import AnalysisCache, hotel_fingerprints, run_fingerprint
+from online_stats import QuantileSketch, RunningStats, ValueCounts
+from pace import CELL_COLUMNS as PACE_CELL_COLUMNS, KEY as PACE_KEY, SNAPSHOT_COLUMNS, PaceEngine, cell_observations
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # Multi-threaded CSV parsing is optional - pandas' C parser is used without it
+    pa = None
+
+# Column types of pricing_data.csv (scrape.CSV_FIELDNAMES); unlisted columns are read as text.
+# Repeated strings are categorical, room counts and stay settings nullable small ints.
+PRICING_SCHEMA = {
+    'hotel_name': 'category', 'hotel_slug': 'category', 'availability': 'category',
+    'room_names': 'category', 'stale_since': 'category',
+    'check_in_date': 'datetime', 'check_out_date': 'datetime', 'scrape_timestamp': 'datetime',
+    'nights': 'Int8', 'guests': 'Int8', 'rooms': 'Int8', 'day_offset': 'Int16',
+    'total_price': 'float64', 'original_price': 'float64', 'price_per_night': 'float64',
+    'has_discount': 'boolean', 'discount_percentage': 'float64',
+    'rating_score': 'float64', 'review_count': 'Int32',
+    'total_room_types': 'Int16', 'available_room_types': 'Int16', 'sold_out_room_types': 'Int16',
+    'property_occupancy_rate': 'float64',
+    'min_room_price': 'float64', 'max_room_price': 'float64', 'avg_room_price': 'float64',
+}
+
+# Columns the metric families read (load_pricing_data(columns=...) skips everything else)
+ANALYSIS_COLUMNS = [
+    'hotel_name', 'check_in_date', 'availability', 'scrape_timestamp', 'nights',
+    'total_price', 'price_per_night', 'has_discount', 'discount_percentage', 'rating_score',
+    'total_room_types', 'available_room_types', 'min_room_price', 'max_room_price', 'avg_room_price',
+]
+
+
+def _csv_header(csv_path):
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+def _arrow_options(columns):
+    """pyarrow ConvertOptions for PRICING_SCHEMA and the to_pandas types_mapper for its nullable columns."""
+    arrow_types = {
+        'category': pa.dictionary(pa.int32(), pa.string()), 'datetime': pa.timestamp('us'),
+        'Int8': pa.int8(), 'Int16': pa.int16(), 'Int32': pa.int32(), 'float64': pa.float64(), 'boolean': pa.bool_(),
+    }
+    nullable = {pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(), pa.bool_(): pd.BooleanDtype()}
+    options = pa_csv.ConvertOptions(
+        column_types={col: arrow_types[PRICING_SCHEMA.get(col)] if col in PRICING_SCHEMA else pa.string() for col in columns},
+        include_columns=columns,
+    )
+    return options, nullable.get
 
 
-def load_pricing_data():
-    """Load and prepare pricing data."""
-    if not config.PRICING_CSV.exists():
-        raise FileNotFoundError(f"Pricing data not found: {config.PRICING_CSV}\nRun scrape.py first.")
+def _read_arrow(csv_path, columns):
+    """Typed read with pyarrow's multi-threaded parser (dates parsed while reading)."""
+    options, types_mapper = _arrow_options(columns)
+    return pa_csv.read_csv(csv_path, convert_options=options).to_pandas(types_mapper=types_mapper)
 
-    df = pd.read_csv(config.PRICING_CSV)
 
-    # Convert dates
-    df['check_in_date'] = pd.to_datetime(df['check_in_date'])
-    df['check_out_date'] = pd.to_datetime(df['check_out_date'])
-    df['scrape_timestamp'] = pd.to_datetime(df['scrape_timestamp'])
+def _pandas_dtypes(columns):
+    dtypes = {col: PRICING_SCHEMA.get(col, 'str') for col in columns}
+    dtypes.update({col: 'str' for col, kind in dtypes.items() if kind == 'datetime'})
+    return dtypes
 
-    # Add calculated fields
-    df['is_available'] = df['availability'] == 'available'
-    df['is_sold_out'] = df['availability'] == 'sold_out'
-    df['month'] = df['check_in_date'].dt.month
-    df['month_name'] = df['check_in_date'].dt.strftime('%B')
-    df['day_of_week'] = df['check_in_date'].dt.day_name()
-    df['weeks_ahead'] = ((df['check_in_date'] - df['scrape_timestamp'].dt.normalize()) / pd.Timedelta(days=7)).astype(int)
 
+def _parse_dates(df):
+    """Parse the schema's date columns, each distinct date string once."""
+    for col in df.columns:
+        if PRICING_SCHEMA.get(col) == 'datetime':
+            codes, uniques = pd.factorize(df[col])
+            df[col] = pd.Series(pd.to_datetime(uniques, format='ISO8601'), dtype='datetime64[us]').reindex(codes).to_numpy()
     return df
 
 
-def calculate_occupancy_metrics(df):
-    """Calculate occupancy metrics by property with room-level insights."""
-    if df.empty:
-        return pd.DataFrame()
-
-    metrics = []
-
-    for hotel in df['hotel_name'].unique():
-        hotel_df = df[df['hotel_name'] == hotel].sort_values('check_in_date')
-
-        total_checks = len(hotel_df)
-        available_checks = hotel_df['is_available'].sum()
-        sold_out_checks = hotel_df['is_sold_out'].sum()
-
-        room_samples = []
-        current_total_rooms = None
-
-        for row in hotel_df.itertuples():
-            total_rooms_raw = getattr(row, 'total_room_types', None)
-            available_rooms_raw = getattr(row, 'available_room_types', None)
+def _read_pandas(csv_path, columns):
+    """Typed read with pandas' C parser; each distinct date string is parsed once."""
+    return _parse_dates(pd.read_csv(csv_path, usecols=columns, dtype=_pandas_dtypes(columns), engine='c'))
 
-            if total_rooms_raw is not None and not pd.isna(total_rooms_raw) and total_rooms_raw > 0:
-                current_total_rooms = float(total_rooms_raw)
 
-            total_rooms = None
-            if total_rooms_raw is not None and not pd.isna(total_rooms_raw) and total_rooms_raw > 0:
-                total_rooms = float(total_rooms_raw)
-            elif current_total_rooms is not None:
-                total_rooms = float(current_total_rooms)
+def iter_pricing_chunks(columns=None, csv_path=None, chunk_rows=None):
+    """
+    Pricing data as typed DataFrames of about chunk_rows rows each (PRICING_SCHEMA, no calculated fields).
 
-            available_rooms = None
-            if available_rooms_raw is not None and not pd.isna(available_rooms_raw):
-                available_rooms = float(available_rooms_raw)
-            elif getattr(row, 'availability', '') == 'sold_out':
-                available_rooms = 0.0
-            elif total_rooms is not None:
-                available_rooms = float(total_rooms)
+    Only one chunk is held in memory at a time - see StreamingAnalysis.
+    """
+    csv_path = csv_path or config.PRICING_CSV
+    chunk_rows = chunk_rows or config.STREAMING_CHUNK_ROWS
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Pricing data not found: {csv_path}\nRun scrape.py first.")
 
-            if total_rooms is None and available_rooms is None:
-                # No usable signal for this row
-                continue
+    columns = [col for col in _csv_header(csv_path) if columns is None or col in columns]
+    if pa is None:
+        with pd.read_csv(csv_path, usecols=columns, dtype=_pandas_dtypes(columns), engine='c', chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield _parse_dates(chunk)
+        return
 
-            room_samples.append({
-                'total_raw': float(total_rooms_raw) if total_rooms_raw is not None and not pd.isna(total_rooms_raw) else None,
-                'total': total_rooms,
-                'available': available_rooms,
-            })
+    # Blocks of whole lines, sized from the average row length at the start of the file. (pyarrow's own
+    # streaming reader reads ahead without bound, so it would end up holding most of the file.)
+    options, types_mapper = _arrow_options(columns)
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        sample = f.read(1 << 16)
+        block_size = max(int(chunk_rows * len(sample) / max(sample.count(b'\n'), 1)), 1 << 16)
+        f.seek(len(header))
+        while True:
+            block = f.read(block_size)
+            if not block.strip():
+                return
+            block += f.readline()  # Rest of the last row (rows never span lines - scrape.py writes none)
+            table = pa_csv.read_csv(pa.py_buffer(header + block), convert_options=options)
+            yield table.to_pandas(types_mapper=types_mapper)
+
+
+def _add_calendar_fields(df):
+    """Calendar columns of each check-in date, computed once per distinct date."""
+    codes, dates = pd.factorize(df['check_in_date'])
+    calendar = pd.DataFrame({
+        'month': dates.month.astype('int8'),
+        'month_name': pd.Categorical(dates.strftime('%B')),
+        'day_of_week': pd.Categorical(dates.day_name()),
+    }).reindex(codes)
+    for col in calendar.columns:
+        df[col] = calendar[col].to_numpy()
+    if 'scrape_timestamp' in df.columns:
+        weeks = (df['check_in_date'] - df['scrape_timestamp'].dt.normalize()) / pd.Timedelta(days=7)
+        df['weeks_ahead'] = weeks.astype('int16')
+
+
+def load_pricing_data(columns=None, csv_path=None, stats=None):
+    """
+    Load and prepare pricing data with typed columns.
+
+    Args:
+        columns: Only read these columns (e.g. ANALYSIS_COLUMNS); None reads all of them
+        csv_path: Defaults to config.PRICING_CSV
+        stats: Optional dict filled with rows, columns, engine, seconds and memory_mb
+    """
+    csv_path = csv_path or config.PRICING_CSV
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Pricing data not found: {csv_path}\nRun scrape.py first.")
+
+    start = time.perf_counter()
+    header = _csv_header(csv_path)
+    columns = [col for col in header if columns is None or col in columns]
+    engine = 'pyarrow' if pa is not None else 'c'
+    try:
+        df = _read_arrow(csv_path, columns) if pa is not None else _read_pandas(csv_path, columns)
+    except ValueError as e:  # Value that does not fit the schema - fall back to inferred types
+        print(f"  Warning: typed load failed ({str(e).splitlines()[0]}) - inferring column types")
+        engine = 'inferred'
+        df = pd.read_csv(csv_path, usecols=columns)
+        for col in columns:
+            if PRICING_SCHEMA.get(col) == 'datetime':
+                df[col] = pd.to_datetime(df[col])
 
-        totals_observed = [sample['total_raw'] for sample in room_samples if sample['total_raw'] is not None]
-        room_type_estimate = float(max(totals_observed)) if totals_observed else None
+    # Add calculated fields
+    if 'availability' in df.columns:
+        df['is_available'] = df['availability'] == 'available'
+        df['is_sold_out'] = df['availability'] == 'sold_out'
+    if 'check_in_date' in df.columns:
+        _add_calendar_fields(df)
+
+    if stats is not None:
+        stats.update({
+            'rows': len(df),
+            'columns': len(columns),
+            'engine': engine,
+            'seconds': round(time.perf_counter() - start, 3),
+            'memory_mb': round(float(df.memory_usage(deep=True).sum()) / 1e6, 2),
+        })
+    return df
 
-        available_values = []
-        sold_values = []
-        occupancy_values = []
 
-        for sample in room_samples:
-            total_for_calc = room_type_estimate if room_type_estimate is not None else sample['total']
-            if total_for_calc is None or total_for_calc <= 0:
-                continue
+def _numeric(df, column):
+    """Column as float (NaN where missing or unparseable)."""
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').astype(float)
+
+
+def _none_if_nan(value):
+    return None if pd.isna(value) else float(value)
+
+
+class HotelGroups:
+    """
+    Rows grouped by hotel as contiguous blocks.
+
+    Hotels are indexed in df['hotel_name'].unique() order (NaN included, as an
+    empty group) and each hotel's rows are sorted by check-in exactly like
+    `df[df['hotel_name'] == hotel].sort_values('check_in_date')` (sort_by=None
+    keeps row order). row_order maps back to each hotel's original row order.
+    Per-hotel reductions therefore see values in the same order (and give
+    bit-identical floats) as per-hotel loops, in one pass over the data.
+    """
+
+    def __init__(self, df, sort_by='check_in_date'):
+        names = pd.Index(df['hotel_name'].unique())
+        missing = df['hotel_name'].isna().to_numpy()
+        codes = np.where(missing, -1, names.get_indexer(df['hotel_name']))
+        by_hotel = np.argsort(codes, kind='stable')[missing.sum():]  # rows without a hotel name are not grouped
+        counts = np.bincount(codes[~missing], minlength=len(names))
+        starts = np.cumsum(counts) - counts
+
+        order = by_hotel.copy()
+        if sort_by is not None and sort_by in df.columns:
+            keys = df[sort_by].to_numpy()
+            for start, count in zip(starts, counts):
+                block = order[start:start + count]
+                order[start:start + count] = block[np.argsort(keys[block], kind='quicksort')]
+
+        self.names = list(names)
+        self.starts = starts
+        self.counts = counts
+        self.data = df.iloc[order]
+        self.codes = pd.Series(codes[order], index=self.data.index)
+        position = np.empty(len(df), dtype=int)
+        position[order] = np.arange(len(order))
+        self.row_order = position[by_hotel]
+        nan_index = np.flatnonzero(names.isna())
+        self.row_codes = np.where(missing, nan_index[0], codes) if len(nan_index) else codes
+
+    def __len__(self):
+        return len(self.names)
+
+    def blocks(self):
+        """(hotel index, slice) for every hotel."""
+        return [(i, slice(start, start + count)) for i, (start, count) in enumerate(zip(self.starts, self.counts))]
+
+    def order(self, mask=None):
+        """Hotel indices like df[mask]['hotel_name'].unique() (mask aligned to the original rows)."""
+        return pd.unique(self.row_codes if mask is None else self.row_codes[mask])
+
+    def ffill(self, series):
+        """Forward fill within each hotel."""
+        return series.groupby(self.codes).ffill()
+
+    def reduce(self, values, func, mask=None, row_order=False):
+        """
+        Apply func (e.g. np.mean) to each hotel's values where mask is True
+        (default: not NaN), in check-in order or, with row_order, original row order.
+
+        Returns:
+            np.ndarray: one result per hotel, NaN for hotels without values
+        """
+        values = np.asarray(values, dtype=float)
+        mask = ~np.isnan(values) if mask is None else np.asarray(mask, dtype=bool)
+        if row_order:
+            values, mask = values[self.row_order], mask[self.row_order]
+        result = np.full(len(self.names), np.nan)
+        for i, block in self.blocks():
+            selected = values[block][mask[block]]
+            if len(selected):
+                result[i] = func(selected)
+        return result
+
+    def count(self, mask):
+        """Rows per hotel where mask is True."""
+        return np.bincount(self.codes.to_numpy(), weights=np.asarray(mask, dtype=float), minlength=len(self.names)).astype(int)
+
+
+def _room_counts(groups, rows=None):
+    """
+    Raw and filled room-type counts for grouped rows.
+
+    total: the row's total_room_types if positive, else the hotel's last positive count (forward fill,
+    only from rows where rows is True)
+    available: available_room_types, else 0 for sold-out rows, else total
+    """
+    data = groups.data
+    total_raw = _numeric(data, 'total_room_types')
+    source = total_raw > 0 if rows is None else (total_raw > 0) & rows
+    total = groups.ffill(total_raw.where(source))
+    sold_out = (data['availability'] == 'sold_out') if 'availability' in data.columns else pd.Series(False, index=data.index)
+    available = _numeric(data, 'available_room_types')
+    available = available.fillna(total.where(~sold_out, 0.0))
+    return total_raw, total, available
+
+
+def _per_night(data, column):
+    """Room price per night: divided by nights when known, else the row's price_per_night, else as is."""
+    value = _numeric(data, column)
+    nights = _numeric(data, 'nights')
+    price_per_night = _numeric(data, 'price_per_night')
+    per_night = np.where(nights > 0, value / nights, np.where(price_per_night.notna(), price_per_night, value))
+    return pd.Series(per_night, index=data.index).where(value.notna())
+
+
+def _series_mean(values):
+    """Mean the way pandas Series.mean sums it (NaN counted as 0 in place, then skipped in the count)."""
+    valid = ~np.isnan(values)
+    count = valid.sum()
+    if not count:
+        return np.nan
+    return np.where(valid, values, 0.0).sum() / count
+
+
+def _series_std(values):
+    """Sample standard deviation the way pandas Series.std computes it (two-pass, ddof=1)."""
+    valid = ~np.isnan(values)
+    count = valid.sum()
+    if count <= 1:
+        return np.nan
+    filled = np.where(valid, values, 0.0)
+    squared = (filled.sum() / count - filled) ** 2
+    squared[~valid] = 0.0
+    return np.sqrt(squared.sum() / (count - 1))
+
+
+# Metric family -> column its frame is sorted by (descending), in output order
+METRIC_FAMILIES = {
+    'occupancy': 'occupancy_rate',
+    'pricing': 'avg_price_per_night',
+    'pricing_by_availability': None,
+    'room_inventory': 'avg_room_occupancy_rate',
+}
+
+
+def _metrics_frame(records, sort_by=None):
+    if not records:
+        return pd.DataFrame()
+    frame = pd.DataFrame(records)
+    return frame.sort_values(sort_by, ascending=False) if sort_by else frame
 
-            available = sample['available']
-            if available is None:
-                continue
 
-            total_for_calc = float(total_for_calc)
-            available = float(available)
+def hotel_key(name):
+    """Key of a hotel in fingerprints and the analysis cache ('' for rows without a hotel name)."""
+    return '' if pd.isna(name) else str(name)
 
-            if room_type_estimate is not None:
-                available = min(max(available, 0.0), room_type_estimate)
-                total_for_calc = room_type_estimate
-            else:
-                available = min(max(available, 0.0), total_for_calc)
 
-            sold = max(total_for_calc - available, 0.0)
+# Per-hotel aggregate arrays -> metric records, shared by AnalysisEngine (grouped frame) and
+# StreamingAnalysis (running aggregates over chunks)
 
-            available_values.append(available)
-            sold_values.append(sold)
-            occupancy_values.append((sold / total_for_calc) * 100 if total_for_calc > 0 else 0.0)
+def occupancy_records(names, order, agg):
+    """
+    Occupancy records of hotels `order` (indices into names) from per-hotel aggregate arrays.
 
-        total_values_for_avg = [sample['total'] for sample in room_samples if sample['total'] is not None]
+    agg: room_type_estimate, avg_sample_total, total_checks, available_checks, sold_out_checks,
+    occupancy_samples, avg_available, avg_sold, avg_occupancy
+    """
+    estimate_by_hotel, avg_sample_total = agg['room_type_estimate'], agg['avg_sample_total']
+    total_checks, available_checks, sold_out_checks = agg['total_checks'], agg['available_checks'], agg['sold_out_checks']
+    occupancy_samples, avg_available, avg_sold, avg_occupancy = agg['occupancy_samples'], agg['avg_available'], agg['avg_sold'], agg['avg_occupancy']
 
+    metrics = []
+    for i in order:
+        room_type_estimate = _none_if_nan(estimate_by_hotel[i])
         if room_type_estimate is not None:
             avg_total_rooms = room_type_estimate
         else:
-            avg_total_rooms = float(np.mean(total_values_for_avg)) if total_values_for_avg else 0.0
-
-        avg_available_rooms = float(np.mean(available_values)) if available_values else 0.0
-        avg_sold_out_rooms = float(np.mean(sold_values)) if sold_values else 0.0
-        avg_room_occupancy = float(np.mean(occupancy_values)) if occupancy_values else 0.0
+            avg_total_rooms = 0.0 if np.isnan(avg_sample_total[i]) else float(avg_sample_total[i])
+        avg_room_occupancy = float(avg_occupancy[i]) if occupancy_samples[i] else 0.0
 
-        property_occ_rate = (sold_out_checks / total_checks * 100) if total_checks > 0 else 0
-        has_room_signal = bool(room_type_estimate is not None and room_type_estimate > 1 and occupancy_values)
+        property_occ_rate = (sold_out_checks[i] / total_checks[i] * 100) if total_checks[i] > 0 else 0
+        has_room_signal = bool(room_type_estimate is not None and room_type_estimate > 1 and occupancy_samples[i])
 
         preferred_occupancy_rate = avg_room_occupancy if has_room_signal and avg_room_occupancy > 0 else property_occ_rate
         preferred_occupancy_source = 'room' if has_room_signal and avg_room_occupancy > 0 else 'property'
 
         metrics.append({
-            'hotel_name': hotel,
-            'total_checks': total_checks,
-            'available': int(available_checks),
-            'sold_out': int(sold_out_checks),
+            'hotel_name': names[i],
+            'total_checks': int(total_checks[i]),
+            'available': int(available_checks[i]),
+            'sold_out': int(sold_out_checks[i]),
             'occupancy_rate': property_occ_rate,
-            'availability_rate': (available_checks / total_checks * 100) if total_checks > 0 else 0,
+            'availability_rate': (available_checks[i] / total_checks[i] * 100) if total_checks[i] > 0 else 0,
             # Preferred & property-level context
             'preferred_occupancy_rate': preferred_occupancy_rate,
             'preferred_occupancy_source': preferred_occupancy_source,
@@ -146,87 +387,66 @@ def calculate_occupancy_metrics(df):
             'room_type_count_estimate': room_type_estimate,
             # Room-level insights
             'avg_total_room_types': avg_total_rooms,
-            'avg_available_room_types': avg_available_rooms,
-            'avg_sold_out_room_types': avg_sold_out_rooms,
+            'avg_available_room_types': float(avg_available[i]) if occupancy_samples[i] else 0.0,
+            'avg_sold_out_room_types': float(avg_sold[i]) if occupancy_samples[i] else 0.0,
             'avg_room_occupancy_rate': avg_room_occupancy,
         })
-
-    if not metrics:
-        return pd.DataFrame()
-
-    return pd.DataFrame(metrics).sort_values('occupancy_rate', ascending=False)
+    return metrics
 
 
-def calculate_pricing_metrics(df):
-    """Calculate pricing statistics by property with room-level pricing insights."""
-    df_priced = df[df['is_available'] & df['total_price'].notna()]
+def pricing_records(names, order, agg, has_room_types=True):
+    """
+    Pricing records of hotels `order` (indices into names) from per-hotel aggregate arrays.
 
-    if df_priced.empty:
-        return pd.DataFrame()
+    agg: sample_size, property_avg, property_min, property_max, median_price, std_price, discount_count,
+    avg_discount, avg_rating, room_type_max, room_samples, avg_min_room, avg_max_room, avg_room_avg
+    """
+    sample_size, property_avg, property_min, property_max = agg['sample_size'], agg['property_avg'], agg['property_min'], agg['property_max']
+    median_price, std_price, discount_count = agg['median_price'], agg['std_price'], agg['discount_count']
+    avg_discount, avg_rating, room_type_max = agg['avg_discount'], agg['avg_rating'], agg['room_type_max']
+    room_samples, avg_min_room, avg_max_room, avg_room_avg = agg['room_samples'], agg['avg_min_room'], agg['avg_max_room'], agg['avg_room_avg']
 
     metrics = []
-
-    def as_per_night(row, key):
-        value = row.get(key)
-        if pd.isna(value):
-            return np.nan
-        nights = row.get('nights')
-        if pd.notna(nights) and nights > 0:
-            return float(value) / float(nights)
-        price_per_night = row.get('price_per_night')
-        if pd.notna(price_per_night):
-            return float(price_per_night)
-        return float(value)
-
-    for hotel in df['hotel_name'].unique():
-        hotel_df = df_priced[df_priced['hotel_name'] == hotel]
-
-        if len(hotel_df) == 0:
+    for i in order:
+        if not sample_size[i]:
             continue
 
-        # Room-level pricing (where available)
-        room_priced = hotel_df[hotel_df['min_room_price'].notna()].copy()
-        if len(room_priced) > 0:
-            room_priced['min_room_price_per_night'] = room_priced.apply(lambda row: as_per_night(row, 'min_room_price'), axis=1)
-            room_priced['max_room_price_per_night'] = room_priced.apply(lambda row: as_per_night(row, 'max_room_price'), axis=1)
-            room_priced['avg_room_price_per_night'] = room_priced.apply(lambda row: as_per_night(row, 'avg_room_price'), axis=1)
-            # Fallback if avg reported as NaN but min/max exist
-            if room_priced['avg_room_price_per_night'].isna().all():
-                room_priced['avg_room_price_per_night'] = (room_priced['min_room_price_per_night'] + room_priced['max_room_price_per_night']) / 2
-        property_avg_price = hotel_df['price_per_night'].mean()
-        property_min_price = hotel_df['price_per_night'].min()
-        property_max_price = hotel_df['price_per_night'].max()
+        property_avg_price = property_avg[i]
+        property_min_price = property_min[i]
+        property_max_price = property_max[i]
         property_price_range = property_max_price - property_min_price if pd.notna(property_min_price) and pd.notna(property_max_price) else None
 
-        avg_min_room_price = room_priced['min_room_price_per_night'].mean() if len(room_priced) > 0 else None
-        avg_max_room_price = room_priced['max_room_price_per_night'].mean() if len(room_priced) > 0 else None
-        avg_room_price_avg = room_priced['avg_room_price_per_night'].mean() if len(room_priced) > 0 else None
-        room_price_range = (room_priced['max_room_price_per_night'].mean() - room_priced['min_room_price_per_night'].mean()) if len(room_priced) > 0 else None
+        if room_samples[i]:
+            avg_min_room_price = avg_min_room[i]
+            avg_max_room_price = avg_max_room[i]
+            avg_room_price_avg = avg_room_avg[i]
+            room_price_range = avg_max_room_price - avg_min_room_price
+        else:
+            avg_min_room_price = avg_max_room_price = avg_room_price_avg = room_price_range = None
 
-        room_type_counts = hotel_df['total_room_types'].dropna() if 'total_room_types' in hotel_df.columns else pd.Series(dtype=float)
-        room_type_estimate = float(room_type_counts.max()) if len(room_type_counts) > 0 else None
-        has_room_signal = len(room_priced) > 0 and avg_room_price_avg is not None and not np.isnan(avg_room_price_avg) and room_type_estimate is not None and room_type_estimate > 1
+        room_type_estimate = float(room_type_max[i]) if has_room_types and not np.isnan(room_type_max[i]) else None
+        has_room_signal = room_samples[i] > 0 and not np.isnan(avg_room_price_avg) and room_type_estimate is not None and room_type_estimate > 1
 
         if has_room_signal:
             preferred_price = float(avg_room_price_avg)
             preferred_source = 'room'
-            preferred_range = (avg_max_room_price - avg_min_room_price) if avg_min_room_price is not None and avg_max_room_price is not None else room_price_range
+            preferred_range = room_price_range
         else:
             preferred_price = float(property_avg_price) if pd.notna(property_avg_price) else None
             preferred_source = 'property'
             preferred_range = property_price_range
 
         metrics.append({
-            'hotel_name': hotel,
+            'hotel_name': names[i],
             'avg_price_per_night': property_avg_price,
             'min_price': property_min_price,
             'max_price': property_max_price,
-            'median_price': hotel_df['price_per_night'].median(),
-            'std_price': hotel_df['price_per_night'].std(),
-            'discount_frequency': (hotel_df['has_discount'].sum() / len(hotel_df) * 100),
-            'avg_discount': hotel_df[hotel_df['has_discount'] == True]['discount_percentage'].mean(),
-            'avg_rating': hotel_df['rating_score'].mean(),
-            'sample_size': len(hotel_df),
+            'median_price': median_price[i],
+            'std_price': std_price[i],
+            'discount_frequency': (discount_count[i] / sample_size[i] * 100),
+            'avg_discount': avg_discount[i],
+            'avg_rating': avg_rating[i],
+            'sample_size': int(sample_size[i]),
             # Preferred & property-level context
             'preferred_price_per_night': preferred_price,
             'preferred_price_source': preferred_source,
@@ -241,240 +461,68 @@ def calculate_pricing_metrics(df):
             'avg_room_price_avg': avg_room_price_avg,
             'room_price_range': room_price_range,
         })
+    return metrics
 
-    if not metrics:
-        return pd.DataFrame()
-
-    return pd.DataFrame(metrics).sort_values('avg_price_per_night', ascending=False)
-
-
-def compare_to_reference(pricing_df, occupancy_df):
-    """Compare all properties to reference property."""
-    ref = config.REFERENCE_PROPERTY
-
-    ref_pricing = pricing_df[pricing_df['hotel_name'] == ref]
-    ref_occupancy = occupancy_df[occupancy_df['hotel_name'] == ref]
-
-    if ref_pricing.empty or ref_occupancy.empty:
-        print(f"Warning: {ref} not found in data")
-        return pd.DataFrame()
-
-    ref_price_series = ref_pricing['preferred_price_per_night'] if 'preferred_price_per_night' in ref_pricing.columns else pd.Series([np.nan])
-    ref_price = ref_price_series.values[0] if pd.notna(ref_price_series.values[0]) else ref_pricing['avg_price_per_night'].values[0]
-    ref_property_price = ref_pricing['property_avg_price_per_night'].values[0] if 'property_avg_price_per_night' in ref_pricing.columns and pd.notna(ref_pricing['property_avg_price_per_night'].values[0]) else ref_price
-
-    ref_occ_series = ref_occupancy['preferred_occupancy_rate'] if 'preferred_occupancy_rate' in ref_occupancy.columns else ref_occupancy['occupancy_rate']
-    ref_occ = ref_occ_series.values[0]
-    ref_property_occ = ref_occupancy['property_occupancy_rate'].values[0] if 'property_occupancy_rate' in ref_occupancy.columns and pd.notna(ref_occupancy['property_occupancy_rate'].values[0]) else ref_occ
-
-    ref_room_price = None
-    if 'avg_room_price_avg' in ref_pricing.columns and pd.notna(ref_pricing['avg_room_price_avg'].values[0]):
-        ref_room_price = ref_pricing['avg_room_price_avg'].values[0]
-    ref_room_occ = None
-    if 'avg_room_occupancy_rate' in ref_occupancy.columns and pd.notna(ref_occupancy['avg_room_occupancy_rate'].values[0]):
-        ref_room_occ = ref_occupancy['avg_room_occupancy_rate'].values[0]
-
-    comparisons = []
-
-    for _, row in pricing_df.iterrows():
-        hotel = row['hotel_name']
-
-        if hotel == ref:
-            continue
-
-        occ_row = occupancy_df[occupancy_df['hotel_name'] == hotel]
-        if occ_row.empty:
-            continue
-
-        preferred_price = row.get('preferred_price_per_night', np.nan)
-        if pd.isna(preferred_price):
-            preferred_price = row.get('avg_price_per_night', np.nan)
-        property_price = row.get('property_avg_price_per_night', preferred_price)
-        if pd.isna(property_price):
-            property_price = preferred_price
-        price_diff = preferred_price - ref_price
-        price_diff_pct = (price_diff / ref_price * 100) if ref_price > 0 else 0
-
-        property_price_diff = property_price - ref_property_price if ref_property_price else None
-        property_price_diff_pct = (property_price_diff / ref_property_price * 100) if property_price_diff is not None and ref_property_price else None
-
-        preferred_occ = occ_row['preferred_occupancy_rate'].values[0] if 'preferred_occupancy_rate' in occ_row.columns else occ_row['occupancy_rate'].values[0]
-        property_occ = occ_row['property_occupancy_rate'].values[0] if 'property_occupancy_rate' in occ_row.columns and pd.notna(occ_row['property_occupancy_rate'].values[0]) else occ_row['occupancy_rate'].values[0]
-        if pd.isna(property_occ):
-            property_occ = preferred_occ
-        occ_diff = preferred_occ - ref_occ
-        property_occ_diff = property_occ - ref_property_occ if ref_property_occ is not None else None
-
-        room_price = None
-        room_price_diff = None
-        room_price_diff_pct = None
-        if 'avg_room_price_avg' in pricing_df.columns and pd.notna(row.get('avg_room_price_avg')) and ref_room_price is not None:
-            room_price = row['avg_room_price_avg']
-            room_price_diff = room_price - ref_room_price
-            room_price_diff_pct = (room_price_diff / ref_room_price * 100) if ref_room_price > 0 else 0
-
-        room_occ = None
-        room_occ_diff = None
-        if 'avg_room_occupancy_rate' in occ_row.columns and pd.notna(occ_row['avg_room_occupancy_rate'].values[0]) and ref_room_occ is not None:
-            room_occ = occ_row['avg_room_occupancy_rate'].values[0]
-            room_occ_diff = room_occ - ref_room_occ
-
-        comparisons.append({
-            'hotel_name': hotel,
-            'avg_price': preferred_price,
-            'price_vs_ref': price_diff,
-            'price_vs_ref_pct': price_diff_pct,
-            'preferred_price_vs_ref': price_diff,
-            'preferred_price_vs_ref_pct': price_diff_pct,
-            'property_avg_price': property_price,
-            'property_price_vs_ref': property_price_diff,
-            'property_price_vs_ref_pct': property_price_diff_pct,
-            'occupancy': preferred_occ,
-            'occ_vs_ref': occ_diff,
-            'preferred_occ_vs_ref': occ_diff,
-            'property_occupancy': property_occ,
-            'property_occ_vs_ref': property_occ_diff,
-            'position': 'Higher Price' if price_diff > 0 else 'Lower Price',
-            'demand': 'Higher Demand' if occ_diff > 0 else 'Lower Demand',
-            'room_avg_price': room_price,
-            'room_price_vs_ref': room_price_diff,
-            'room_price_vs_ref_pct': room_price_diff_pct,
-            'room_occupancy': room_occ,
-            'room_occ_vs_ref': room_occ_diff,
-            'preferred_price_source': row.get('preferred_price_source', 'property'),
-            'preferred_occupancy_source': occ_row['preferred_occupancy_source'].values[0] if 'preferred_occupancy_source' in occ_row.columns else 'property',
-        })
-
-    return pd.DataFrame(comparisons).sort_values('price_vs_ref_pct')
 
+def availability_pricing_records(names, order, agg):
+    """
+    Pricing-by-availability records of hotels `order` (indices into names) from per-hotel aggregate arrays.
 
-def analyze_pricing_by_availability(df):
-    """Analyze pricing patterns for available vs sold-out dates."""
-    df_with_price = df[df['total_price'].notna()].copy()
+    agg: available_count, sold_out_count, avg_available, avg_sold_out, std_available
+    """
+    available_count, sold_out_count = agg['available_count'], agg['sold_out_count']
+    avg_available, avg_sold_out, std_available = agg['avg_available'], agg['avg_sold_out'], agg['std_available']
 
     analysis = []
-
-    for hotel in df['hotel_name'].unique():
-        hotel_df = df_with_price[df_with_price['hotel_name'] == hotel]
-
-        available = hotel_df[hotel_df['availability'] == 'available']
-        sold_out = hotel_df[hotel_df['availability'] == 'sold_out']
-
-        if len(available) == 0:
+    for i in order:
+        if not available_count[i]:
             continue
-
         analysis.append({
-            'hotel_name': hotel,
-            'avg_price_available': available['price_per_night'].mean(),
-            'avg_price_sold_out': sold_out['price_per_night'].mean() if len(sold_out) > 0 else None,
-            'price_variance': available['price_per_night'].std() if len(available) > 1 else 0,
-            'uses_dynamic_pricing': available['price_per_night'].std() > available['price_per_night'].mean() * 0.15 if len(available) > 1 else False,
+            'hotel_name': names[i],
+            'avg_price_available': avg_available[i],
+            'avg_price_sold_out': avg_sold_out[i] if sold_out_count[i] else None,
+            'price_variance': std_available[i] if available_count[i] > 1 else 0,
+            'uses_dynamic_pricing': bool(std_available[i] > avg_available[i] * 0.15) if available_count[i] > 1 else False,
         })
+    return analysis
 
-    return pd.DataFrame(analysis)
 
+def room_inventory_records(names, order, agg):
+    """
+    Room inventory records of hotels `order` (indices into names) from per-hotel aggregate arrays.
 
-def analyze_room_inventory(df):
-    """Analyze room-level inventory and pricing strategies."""
-    if df.empty:
-        return pd.DataFrame()
+    agg: sample_size, avg_total, max_total, avg_available, avg_sold_out, avg_occupancy,
+    avg_min_price, avg_max_price, avg_avg_price, avg_mid_price
+    """
+    sample_size, avg_total, max_total = agg['sample_size'], agg['avg_total'], agg['max_total']
+    avg_available, avg_sold_out, avg_occupancy = agg['avg_available'], agg['avg_sold_out'], agg['avg_occupancy']
+    avg_min_price, avg_max_price, avg_avg_price, avg_mid_price = agg['avg_min_price'], agg['avg_max_price'], agg['avg_avg_price'], agg['avg_mid_price']
 
     analysis = []
-
-    for hotel in df['hotel_name'].unique():
-        hotel_data = df[df['hotel_name'] == hotel].sort_values('check_in_date')
-
-        room_samples = []
-        current_total_rooms = None
-
-        for row in hotel_data.itertuples():
-            total_rooms = getattr(row, 'total_room_types', None)
-            available_rooms = getattr(row, 'available_room_types', None)
-
-            if total_rooms and total_rooms > 0:
-                current_total_rooms = total_rooms
-            elif current_total_rooms:
-                total_rooms = current_total_rooms
-            else:
-                # No room information available yet for this property
-                continue
-
-            if available_rooms is None or pd.isna(available_rooms):
-                available_rooms = 0 if getattr(row, 'availability', '') == 'sold_out' else total_rooms
-
-            sold_out_rooms = max(total_rooms - available_rooms, 0)
-            occupancy_pct = (sold_out_rooms / total_rooms * 100) if total_rooms else 0
-            nights = getattr(row, 'nights', None)
-
-            def normalise_price(value):
-                if value is None or pd.isna(value):
-                    return None
-                if nights and not pd.isna(nights) and nights > 0:
-                    return float(value) / float(nights)
-                price_per_night = getattr(row, 'price_per_night', None)
-                if price_per_night is not None and not pd.isna(price_per_night):
-                    return float(price_per_night)
-                return float(value)
-
-            room_samples.append({
-                'total': total_rooms,
-                'available': available_rooms,
-                'sold_out': sold_out_rooms,
-                'occupancy_pct': occupancy_pct,
-                'min_price': normalise_price(getattr(row, 'min_room_price', None)),
-                'max_price': normalise_price(getattr(row, 'max_room_price', None)),
-                'avg_price': normalise_price(getattr(row, 'avg_room_price', None)),
-            })
-
-        if not room_samples:
+    for i in order:
+        if not sample_size[i]:
             continue
 
-        totals = [sample['total'] for sample in room_samples if sample['total'] is not None]
-        available_values = [sample['available'] for sample in room_samples if sample['available'] is not None]
-        sold_values = [sample['sold_out'] for sample in room_samples if sample['sold_out'] is not None]
-        occupancy_values = [sample['occupancy_pct'] for sample in room_samples]
-
-        avg_total = float(np.mean(totals)) if totals else 0.0
-        avg_available = float(np.mean(available_values)) if available_values else 0.0
-        avg_sold_out = float(np.mean(sold_values)) if sold_values else 0.0
-        avg_room_occupancy = float(np.mean(occupancy_values)) if occupancy_values else 0.0
-        max_total_rooms = max(totals) if totals else None
-
-        priced_samples = [sample for sample in room_samples if sample['min_price'] is not None and sample['max_price'] is not None]
-        if priced_samples:
-            min_values = [sample['min_price'] for sample in priced_samples if sample['min_price'] is not None]
-            max_values = [sample['max_price'] for sample in priced_samples if sample['max_price'] is not None]
-            avg_values = [sample['avg_price'] for sample in priced_samples if sample['avg_price'] is not None]
-
-            avg_min = float(np.mean(min_values)) if min_values else None
-            avg_max = float(np.mean(max_values)) if max_values else None
-            if avg_values:
-                avg_avg = float(np.mean(avg_values))
-            elif min_values and max_values:
-                avg_avg = float(np.mean([(mn + mx) / 2 for mn, mx in zip(min_values, max_values)]))
-            elif min_values:
-                avg_avg = float(np.mean(min_values))
-            else:
-                avg_avg = None
-
-            if avg_min is not None and avg_max is not None:
-                price_spread = avg_max - avg_min
-                price_spread_pct = (price_spread / avg_min * 100) if avg_min > 0 else 0.0
-            else:
-                price_spread = None
-                price_spread_pct = None
+        avg_min = _none_if_nan(avg_min_price[i])
+        avg_max = _none_if_nan(avg_max_price[i])
+        avg_avg = _none_if_nan(avg_avg_price[i])
+        if avg_avg is None:
+            # No average room price reported - midpoint of min/max
+            avg_avg = _none_if_nan(avg_mid_price[i])
+
+        if avg_min is not None and avg_max is not None:
+            price_spread = avg_max - avg_min
+            price_spread_pct = (price_spread / avg_min * 100) if avg_min > 0 else 0.0
         else:
-            avg_min = None
-            avg_max = None
-            avg_avg = None
             price_spread = None
             price_spread_pct = None
 
+        avg_room_occupancy = float(avg_occupancy[i])
         analysis.append({
-            'hotel_name': hotel,
-            'avg_total_room_types': avg_total,
-            'avg_available_room_types': avg_available,
-            'avg_sold_out_room_types': avg_sold_out,
+            'hotel_name': names[i],
+            'avg_total_room_types': float(avg_total[i]),
+            'avg_available_room_types': float(avg_available[i]),
+            'avg_sold_out_room_types': float(avg_sold_out[i]),
             'avg_room_occupancy_rate': avg_room_occupancy,
             'low_inventory_pct': avg_room_occupancy,
             'avg_min_room_price': avg_min,
@@ -483,17 +531,703 @@ def analyze_room_inventory(df):
             'room_price_spread': price_spread,
             'room_price_spread_pct': price_spread_pct,
             'uses_room_tiering': bool(price_spread_pct and price_spread_pct > 50),
-            'sample_size': len(room_samples),
-            'room_type_count_estimate': float(max_total_rooms) if max_total_rooms is not None else None,
+            'sample_size': int(sample_size[i]),
+            'room_type_count_estimate': float(max_total[i]),
         })
+    return analysis
+
+
+class AnalysisEngine:
+    """
+    Every per-property metric family from one shared group index.
+
+    The rows are grouped by hotel once, and the derived columns all families use
+    (availability flags, per-night prices, forward-filled room counts) are
+    computed once for all hotels. Each family is then a set of grouped
+    reductions, so cost grows with rows rather than rows x hotels x stages.
+    Seconds spent per stage are kept in `timings`.
+    """
+
+    def __init__(self, df):
+        self.timings = {}
+        self.rows = len(df)
+        self._room_count_cache = {}
+        with self.stage('index'):
+            self.groups = HotelGroups(df)
+            data = self.groups.data
+            availability = data['availability'] if 'availability' in data.columns else pd.Series(np.nan, index=data.index)
+            self.availability = availability.to_numpy()
+            self.is_available = data['is_available'].to_numpy(dtype=bool)
+            self.is_sold_out = data['is_sold_out'].to_numpy(dtype=bool)
+            self.not_error = self.availability != 'error'
+            self.df_not_error = (df['availability'] != 'error').to_numpy() if 'availability' in df.columns else np.ones(len(df), dtype=bool)
+            self.has_price = data['total_price'].notna().to_numpy()
+            self.price = _numeric(data, 'price_per_night')
+            self.min_room = _per_night(data, 'min_room_price')
+            self.max_room = _per_night(data, 'max_room_price')
+            self.avg_room = _per_night(data, 'avg_room_price')
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work as stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def room_counts(self, exclude_errors=False):
+        """(total_raw, total, available) - see _room_counts; shared by all stages when there are no error rows."""
+        key = bool(exclude_errors and not self.not_error.all())
+        if key not in self._room_count_cache:
+            self._room_count_cache[key] = _room_counts(self.groups, self.not_error if key else None)
+        return self._room_count_cache[key]
+
+    def occupancy_metrics(self):
+        """Occupancy metrics by property with room-level insights (error rows are not observations)."""
+        with self.stage('occupancy'):
+            return _metrics_frame(self._occupancy_records(), 'occupancy_rate')
+
+    def _occupancy_records(self):
+        return occupancy_records(self.groups.names, self.groups.order(self.df_not_error), self._occupancy_aggregates())
+
+    def _occupancy_aggregates(self):
+        groups = self.groups
+        rows = self.not_error
+        total_raw, total, available = self.room_counts(exclude_errors=True)
+
+        # Rows with any room signal; the room-type estimate is the largest raw count among them
+        sample = rows & (total.notna() | available.notna()).to_numpy()
+        estimate_by_hotel = groups.reduce(total_raw, np.max, sample & total_raw.notna().to_numpy())
+        estimate = pd.Series(estimate_by_hotel[groups.codes.to_numpy()], index=groups.data.index)
+
+        # Occupancy against the estimate (or the row's own total without one), availability clamped to it
+        total_for_calc = estimate.fillna(total)
+        valid = sample & ((total_for_calc > 0) & available.notna()).to_numpy()
+        available_clamped = np.minimum(available.clip(lower=0.0), total_for_calc)
+        sold = np.maximum(total_for_calc - available_clamped, 0.0)
+        occupancy = (sold / total_for_calc) * 100
+
+        total_checks = groups.count(rows)
+        available_checks = groups.count(rows & self.is_available)
+        sold_out_checks = groups.count(rows & self.is_sold_out)
+        avg_sample_total = groups.reduce(total, np.mean, sample & total.notna().to_numpy())
+        occupancy_samples = groups.count(valid)
+        avg_available = groups.reduce(available_clamped, np.mean, valid)
+        avg_sold = groups.reduce(sold, np.mean, valid)
+        avg_occupancy = groups.reduce(occupancy, np.mean, valid)
+        return {
+            'room_type_estimate': estimate_by_hotel, 'avg_sample_total': avg_sample_total,
+            'total_checks': total_checks, 'available_checks': available_checks, 'sold_out_checks': sold_out_checks,
+            'occupancy_samples': occupancy_samples, 'avg_available': avg_available, 'avg_sold': avg_sold,
+            'avg_occupancy': avg_occupancy,
+        }
+
+    def pricing_metrics(self):
+        """Pricing statistics by property with room-level pricing insights."""
+        with self.stage('pricing'):
+            return _metrics_frame(self._pricing_records(), 'avg_price_per_night')
+
+    def _pricing_records(self):
+        if not (self.is_available & self.has_price).any():
+            return []
+        has_room_types = 'total_room_types' in self.groups.data.columns
+        return pricing_records(self.groups.names, self.groups.order(), self._pricing_aggregates(), has_room_types)
+
+    def _pricing_aggregates(self):
+        groups = self.groups
+        priced = self.is_available & self.has_price
+        data = groups.data
+        price = self.price
+        discounted = priced & (data['has_discount'] == True).fillna(False).to_numpy(dtype=bool)  # noqa: E712 - column may hold NaN/NA
+
+        # Room-level pricing (where available)
+        room_priced = priced & data['min_room_price'].notna().to_numpy()
+
+        sample_size = groups.count(priced)
+        property_avg = groups.reduce(price, _series_mean, priced, row_order=True)
+        property_min = groups.reduce(price, np.min, priced & price.notna().to_numpy())
+        property_max = groups.reduce(price, np.max, priced & price.notna().to_numpy())
+        median_price = groups.reduce(price, np.median, priced & price.notna().to_numpy())
+        std_price = groups.reduce(price, _series_std, priced, row_order=True)
+        discount_count = groups.count(discounted)
+        avg_discount = groups.reduce(_numeric(data, 'discount_percentage'), _series_mean, discounted, row_order=True)
+        avg_rating = groups.reduce(_numeric(data, 'rating_score'), _series_mean, priced, row_order=True)
+        room_types = _numeric(data, 'total_room_types')
+        room_type_max = groups.reduce(room_types, np.max, priced & room_types.notna().to_numpy())
+
+        room_samples = groups.count(room_priced)
+        avg_min_room = groups.reduce(self.min_room, _series_mean, room_priced, row_order=True)
+        avg_max_room = groups.reduce(self.max_room, _series_mean, room_priced, row_order=True)
+        avg_room_avg = groups.reduce(self.avg_room, _series_mean, room_priced, row_order=True)
+        # Fallback if avg reported as NaN for all room-priced rows but min/max exist
+        no_avg = (room_samples > 0) & (groups.count(room_priced & self.avg_room.notna().to_numpy()) == 0)
+        if no_avg.any():
+            midpoint = (self.min_room + self.max_room) / 2
+            avg_room_avg[no_avg] = groups.reduce(midpoint, _series_mean, room_priced, row_order=True)[no_avg]
+        return {
+            'sample_size': sample_size, 'property_avg': property_avg, 'property_min': property_min,
+            'property_max': property_max, 'median_price': median_price, 'std_price': std_price,
+            'discount_count': discount_count, 'avg_discount': avg_discount, 'avg_rating': avg_rating,
+            'room_type_max': room_type_max, 'room_samples': room_samples, 'avg_min_room': avg_min_room,
+            'avg_max_room': avg_max_room, 'avg_room_avg': avg_room_avg,
+        }
+
+    def pricing_by_availability(self):
+        """Pricing patterns for available vs sold-out dates."""
+        with self.stage('pricing_by_availability'):
+            return _metrics_frame(self._pricing_by_availability_records())
+
+    def _pricing_by_availability_records(self):
+        return availability_pricing_records(self.groups.names, self.groups.order(), self._pricing_by_availability_aggregates())
+
+    def _pricing_by_availability_aggregates(self):
+        groups = self.groups
+        available = self.has_price & (self.availability == 'available')
+        sold_out = self.has_price & (self.availability == 'sold_out')
+
+        available_count = groups.count(available)
+        sold_out_count = groups.count(sold_out)
+        avg_available = groups.reduce(self.price, _series_mean, available, row_order=True)
+        avg_sold_out = groups.reduce(self.price, _series_mean, sold_out, row_order=True)
+        std_available = groups.reduce(self.price, _series_std, available, row_order=True)
+        return {
+            'available_count': available_count, 'sold_out_count': sold_out_count,
+            'avg_available': avg_available, 'avg_sold_out': avg_sold_out, 'std_available': std_available,
+        }
+
+    def room_inventory(self):
+        """Room-level inventory and pricing strategies by property."""
+        with self.stage('room_inventory'):
+            return _metrics_frame(self._room_inventory_records(), 'avg_room_occupancy_rate')
+
+    def _room_inventory_records(self):
+        return room_inventory_records(self.groups.names, self.groups.order(), self._room_inventory_aggregates())
+
+    def _room_inventory_aggregates(self):
+        groups = self.groups
+        _, total, available = self.room_counts()
+
+        # Rows before a hotel's first positive room-type count carry no room information
+        sample = total.notna().to_numpy()
+        sold_out = np.maximum(total - available, 0)
+        occupancy = sold_out / total * 100
+        min_price, max_price, avg_price = self.min_room, self.max_room, self.avg_room
+        priced = sample & (min_price.notna() & max_price.notna()).to_numpy()
+
+        sample_size = groups.count(sample)
+        avg_total = groups.reduce(total, np.mean, sample)
+        max_total = groups.reduce(total, np.max, sample)
+        avg_available = groups.reduce(available, np.mean, sample)
+        avg_sold_out = groups.reduce(sold_out, np.mean, sample)
+        avg_occupancy = groups.reduce(occupancy, np.mean, sample)
+        avg_min_price = groups.reduce(min_price, np.mean, priced)
+        avg_max_price = groups.reduce(max_price, np.mean, priced)
+        avg_avg_price = groups.reduce(avg_price, np.mean, priced & avg_price.notna().to_numpy())
+        avg_mid_price = groups.reduce((min_price + max_price) / 2, np.mean, priced)
+        return {
+            'sample_size': sample_size, 'avg_total': avg_total, 'max_total': max_total,
+            'avg_available': avg_available, 'avg_sold_out': avg_sold_out, 'avg_occupancy': avg_occupancy,
+            'avg_min_price': avg_min_price, 'avg_max_price': avg_max_price, 'avg_avg_price': avg_avg_price,
+            'avg_mid_price': avg_mid_price,
+        }
+
+    def metrics(self):
+        """Metric frames of every family (see METRIC_FAMILIES)."""
+        return {
+            'occupancy': self.occupancy_metrics(),
+            'pricing': self.pricing_metrics(),
+            'pricing_by_availability': self.pricing_by_availability(),
+            'room_inventory': self.room_inventory(),
+        }
+
+    def hotel_records(self):
+        """
+        Metric records of every family by hotel, for AnalysisCache.
+
+        Returns:
+            dict: hotel key (see hotel_key) -> {family: record}
+        """
+        builders = {
+            'occupancy': self._occupancy_records,
+            'pricing': self._pricing_records,
+            'pricing_by_availability': self._pricing_by_availability_records,
+            'room_inventory': self._room_inventory_records,
+        }
+        by_hotel = {hotel_key(name): {} for name in self.groups.names}
+        for family, build in builders.items():
+            with self.stage(family):
+                for record in build():
+                    by_hotel[hotel_key(record['hotel_name'])][family] = record
+        return by_hotel
+
+    def comparison(self, pricing_df, occupancy_df, references=None):
+        """Competitor comparison against each reference property (see compare_to_references)."""
+        with self.stage('comparison'):
+            return compare_to_references(pricing_df, occupancy_df, references)
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'properties': int((self.groups.counts > 0).sum()),
+            'timings': {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+        }
+
+    def summary(self):
+        """One-line summary for console output."""
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.timings.items())
+        return f"{self.rows} rows, {int((self.groups.counts > 0).sum())} properties: {stages}"
+
+
+# Tolerances of StreamingAnalysis against AnalysisEngine (checked by benchmarks/bench_stream.py)
+STREAMING_RTOL = 1e-9  # Means and standard deviations: summation order differs
+STREAMING_ATOL = 1e-6  # Differences of means (price ranges/spreads) close to 0
+
+
+class StreamingAnalysis:
+    """
+    Every per-property metric family from running aggregates, one chunk at a time.
+
+    Chunks (see iter_pricing_chunks) are folded into per-property aggregates from
+    online_stats and dropped, so memory grows with properties, not rows. metrics()
+    builds the records with the same functions as AnalysisEngine. Compared to it:
+
+    - counts, min/max, room-type estimates and text/flag fields are identical
+    - means and standard deviations agree within STREAMING_RTOL (relative)
+    - medians come from a quantile sketch, within STREAMING_MEDIAN_ACCURACY (relative)
+    - missing room-type counts are forward-filled in file order, not check-in order -
+      the same when each property's rows are written in check-in order, as scrape.py does
+
+    With pace=True (chunks must include SNAPSHOT_COLUMNS) the last observation of every
+    cell is kept as well - one small row per cell - for PaceEngine.update_cells, see
+    snapshot_cells(). Seconds spent per stage are kept in `timings`.
+    """
+
+    stage = AnalysisEngine.stage
+    comparison = AnalysisEngine.comparison
+
+    def __init__(self, median_accuracy=None, pace=False):
+        self.timings = {}
+        self.rows = 0
+        self.chunks = 0
+        self.names = []
+        self.observed = []  # Hotel indices in order of their first non-error row (occupancy order)
+        self.scrape_timestamp = None
+        self.has_room_types = False
+        self._slots = {}
+        self._observed = set()
+
+        running = ['occ_estimate', 'occ_total', 'price', 'sold_out_price', 'discount', 'rating', 'room_types',
+                   'min_room', 'max_room', 'avg_room', 'mid_room', 'inv_total', 'inv_available', 'inv_sold_out',
+                   'inv_occupancy', 'inv_min', 'inv_max', 'inv_avg', 'inv_mid']
+        counts = ['checks', 'available_checks', 'sold_out_checks', 'priced', 'sold_out_priced', 'discounted',
+                  'room_priced', 'room_priced_avg', 'inventory']
+        self.running = {name: RunningStats() for name in running}
+        self.counts = {name: np.zeros(0, dtype=np.int64) for name in counts}
+        self.median = QuantileSketch(median_accuracy or config.STREAMING_MEDIAN_ACCURACY)
+        self.available_rooms = ValueCounts()  # Occupancy is measured against the final room-type estimate
+        # Forward-fill state per hotel: last positive room-type count (from non-error rows / all rows)
+        self.last_total = {True: np.zeros(0), False: np.zeros(0)}
+        self.pace = pace
+        self.cells = None
+
+    def consume(self, chunks):
+        """update() with every chunk; time spent reading them is kept as stage 'read'."""
+        chunks = iter(chunks)
+        while True:
+            with self.stage('read'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return self
+            self.update(chunk)
+
+    def _hotel_codes(self, chunk, not_error):
+        """Hotel index of each row (-1 without a hotel name), registering new hotels in order of appearance."""
+        codes, uniques = pd.factorize(chunk['hotel_name'], use_na_sentinel=False)
+        slots = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques):
+            key = None if pd.isna(name) else name
+            if key not in self._slots:
+                self._slots[key] = len(self.names)
+                self.names.append(name if key is not None else np.nan)
+            slots[i] = self._slots[key]
+        row_slots = slots[codes]
+        for slot in pd.unique(row_slots[not_error]):
+            if slot not in self._observed:
+                self._observed.add(slot)
+                self.observed.append(int(slot))
+
+        hotels = len(self.names)
+        for stats in self.running.values():
+            stats.resize(hotels)
+        for name, count in self.counts.items():
+            self.counts[name] = np.concatenate([count, np.zeros(hotels - len(count), dtype=np.int64)])
+        for key, last in self.last_total.items():
+            self.last_total[key] = np.concatenate([last, np.full(hotels - len(last), np.nan)])
+        self.median.resize(hotels)
+        self.available_rooms.resize(hotels)
+        return np.where(chunk['hotel_name'].notna().to_numpy(), row_slots, -1)
+
+    def _count(self, name, codes, mask):
+        self.counts[name] += np.bincount(codes[mask & (codes >= 0)], minlength=len(self.names))
+
+    def _room_counts(self, codes, total_raw, available_raw, sold_out, rows, exclude_errors):
+        """_room_counts for a chunk, carrying each hotel's last positive room-type count over from earlier chunks."""
+        source = (total_raw > 0) & rows & (codes >= 0)
+        values = pd.Series(np.where(source, total_raw, np.nan))
+        last = self.last_total[exclude_errors]
+        total = values.groupby(codes).ffill().to_numpy()
+        carried = np.where(codes >= 0, last[np.maximum(codes, 0)], np.nan)
+        total = np.where(np.isnan(total), carried, total)
+        chunk_last = values.groupby(codes).last().dropna()
+        chunk_last = chunk_last[chunk_last.index >= 0]
+        last[chunk_last.index.to_numpy()] = chunk_last.to_numpy()
+        available = np.where(np.isnan(available_raw), np.where(sold_out, 0.0, total), available_raw)
+        return total, available
+
+    def update(self, chunk):
+        """Fold one chunk of pricing data (as from iter_pricing_chunks) into the running aggregates."""
+        with self.stage('aggregate'):
+            self.rows += len(chunk)
+            self.chunks += 1
+            if 'scrape_timestamp' in chunk.columns and chunk['scrape_timestamp'].notna().any():
+                latest = chunk['scrape_timestamp'].max()
+                self.scrape_timestamp = latest if self.scrape_timestamp is None else max(self.scrape_timestamp, latest)
+            self.has_room_types |= 'total_room_types' in chunk.columns
+
+            availability = chunk['availability'].to_numpy() if 'availability' in chunk.columns else np.full(len(chunk), np.nan, dtype=object)
+            not_error = availability != 'error'
+            is_available = availability == 'available'
+            is_sold_out = availability == 'sold_out'
+            codes = self._hotel_codes(chunk, not_error)
+            running = self.running
+
+            has_price = chunk['total_price'].notna().to_numpy()
+            price = _numeric(chunk, 'price_per_night').to_numpy()
+            min_room = _per_night(chunk, 'min_room_price').to_numpy()
+            max_room = _per_night(chunk, 'max_room_price').to_numpy()
+            avg_room = _per_night(chunk, 'avg_room_price').to_numpy()
+            mid_room = (min_room + max_room) / 2
+            total_raw = _numeric(chunk, 'total_room_types').to_numpy()
+            available_raw = _numeric(chunk, 'available_room_types').to_numpy()
+
+            # Occupancy (error rows are not observations)
+            total, available = self._room_counts(codes, total_raw, available_raw, is_sold_out, not_error, True)
+            sample = not_error & ~(np.isnan(total) & np.isnan(available))
+            running['occ_estimate'].update(codes, total_raw, sample)
+            running['occ_total'].update(codes, total, sample)
+            self.available_rooms.update(codes, available, sample)
+            self._count('checks', codes, not_error)
+            self._count('available_checks', codes, not_error & is_available)
+            self._count('sold_out_checks', codes, not_error & is_sold_out)
+
+            # Pricing and pricing by availability
+            priced = is_available & has_price
+            discounted = priced & (chunk['has_discount'] == True).fillna(False).to_numpy(dtype=bool)  # noqa: E712 - column may hold NaN/NA
+            room_priced = priced & chunk['min_room_price'].notna().to_numpy()
+            running['price'].update(codes, price, priced)
+            self.median.update(codes, price, priced)
+            running['sold_out_price'].update(codes, price, has_price & is_sold_out)
+            running['discount'].update(codes, _numeric(chunk, 'discount_percentage').to_numpy(), discounted)
+            running['rating'].update(codes, _numeric(chunk, 'rating_score').to_numpy(), priced)
+            running['room_types'].update(codes, total_raw, priced)
+            for name, values in (('min_room', min_room), ('max_room', max_room), ('avg_room', avg_room), ('mid_room', mid_room)):
+                running[name].update(codes, values, room_priced)
+            self._count('priced', codes, priced)
+            self._count('sold_out_priced', codes, has_price & is_sold_out)
+            self._count('discounted', codes, discounted)
+            self._count('room_priced', codes, room_priced)
+            self._count('room_priced_avg', codes, room_priced & ~np.isnan(avg_room))
+
+            # Room inventory (all rows)
+            total, available = self._room_counts(codes, total_raw, available_raw, is_sold_out, np.ones(len(chunk), dtype=bool), False)
+            sample = ~np.isnan(total)
+            sold_out = np.maximum(total - available, 0)
+            inventory_priced = sample & ~np.isnan(min_room) & ~np.isnan(max_room)
+            running['inv_total'].update(codes, total, sample)
+            running['inv_available'].update(codes, available, sample)
+            running['inv_sold_out'].update(codes, sold_out, sample)
+            running['inv_occupancy'].update(codes, sold_out / total * 100, sample)
+            for name, values in (('inv_min', min_room), ('inv_max', max_room), ('inv_avg', avg_room), ('inv_mid', mid_room)):
+                running[name].update(codes, values, inventory_priced)
+            self._count('inventory', codes, sample)
+
+        if self.pace:
+            with self.stage('pace_cells'):
+                cells = cell_observations(chunk)
+                if self.cells is not None:
+                    cells = pd.concat([self.cells, cells], ignore_index=True).drop_duplicates(PACE_KEY, keep='last')
+                self.cells = cells
+
+    def _occupancy_aggregates(self):
+        estimate = self.running['occ_estimate'].maxs()
+        hotels = len(self.names)
+        samples = np.zeros(hotels, dtype=np.int64)
+        avg_available, avg_sold, avg_occupancy = np.full(hotels, np.nan), np.full(hotels, np.nan), np.full(hotels, np.nan)
+        for i in range(hotels):
+            available, weights = self.available_rooms.values(i)
+            if not len(available) or not estimate[i] > 0:
+                continue
+            clamped = np.minimum(np.maximum(available, 0.0), estimate[i])
+            sold = np.maximum(estimate[i] - clamped, 0.0)
+            samples[i] = weights.sum()
+            avg_available[i] = (weights * clamped).sum() / samples[i]
+            avg_sold[i] = (weights * sold).sum() / samples[i]
+            avg_occupancy[i] = (weights * (sold / estimate[i] * 100)).sum() / samples[i]
+        return {
+            'room_type_estimate': estimate, 'avg_sample_total': self.running['occ_total'].means(),
+            'total_checks': self.counts['checks'], 'available_checks': self.counts['available_checks'],
+            'sold_out_checks': self.counts['sold_out_checks'], 'occupancy_samples': samples,
+            'avg_available': avg_available, 'avg_sold': avg_sold, 'avg_occupancy': avg_occupancy,
+        }
+
+    def _pricing_aggregates(self):
+        running, counts = self.running, self.counts
+        price = running['price']
+        avg_room_avg = running['avg_room'].means()
+        # Fallback if avg reported as NaN for all room-priced rows but min/max exist
+        no_avg = (counts['room_priced'] > 0) & (counts['room_priced_avg'] == 0)
+        avg_room_avg[no_avg] = running['mid_room'].means()[no_avg]
+        return {
+            'sample_size': counts['priced'], 'property_avg': price.means(), 'property_min': price.mins(),
+            'property_max': price.maxs(), 'median_price': self.median.medians(price.mins(), price.maxs()),
+            'std_price': price.stds(), 'discount_count': counts['discounted'],
+            'avg_discount': running['discount'].means(), 'avg_rating': running['rating'].means(),
+            'room_type_max': running['room_types'].maxs(), 'room_samples': counts['room_priced'],
+            'avg_min_room': running['min_room'].means(), 'avg_max_room': running['max_room'].means(),
+            'avg_room_avg': avg_room_avg,
+        }
+
+    def _pricing_by_availability_aggregates(self):
+        price = self.running['price']
+        return {
+            'available_count': self.counts['priced'], 'sold_out_count': self.counts['sold_out_priced'],
+            'avg_available': price.means(), 'avg_sold_out': self.running['sold_out_price'].means(),
+            'std_available': price.stds(),
+        }
+
+    def _room_inventory_aggregates(self):
+        running = self.running
+        return {
+            'sample_size': self.counts['inventory'], 'avg_total': running['inv_total'].means(),
+            'max_total': running['inv_total'].maxs(), 'avg_available': running['inv_available'].means(),
+            'avg_sold_out': running['inv_sold_out'].means(), 'avg_occupancy': running['inv_occupancy'].means(),
+            'avg_min_price': running['inv_min'].means(), 'avg_max_price': running['inv_max'].means(),
+            'avg_avg_price': running['inv_avg'].means(), 'avg_mid_price': running['inv_mid'].means(),
+        }
+
+    def metrics(self):
+        """Metric frames of every family (see METRIC_FAMILIES), like AnalysisEngine.metrics."""
+        order = range(len(self.names))
+        metrics = {}
+        with self.stage('occupancy'):
+            metrics['occupancy'] = _metrics_frame(
+                occupancy_records(self.names, self.observed, self._occupancy_aggregates()), METRIC_FAMILIES['occupancy'])
+        with self.stage('pricing'):
+            records = pricing_records(self.names, order, self._pricing_aggregates(), self.has_room_types) if self.counts['priced'].any() else []
+            metrics['pricing'] = _metrics_frame(records, METRIC_FAMILIES['pricing'])
+        with self.stage('pricing_by_availability'):
+            metrics['pricing_by_availability'] = _metrics_frame(
+                availability_pricing_records(self.names, order, self._pricing_by_availability_aggregates()))
+        with self.stage('room_inventory'):
+            metrics['room_inventory'] = _metrics_frame(
+                room_inventory_records(self.names, order, self._room_inventory_aggregates()), METRIC_FAMILIES['room_inventory'])
+        return metrics
+
+    def snapshot_cells(self):
+        """The streamed snapshot's cells like pace.snapshot_cells (requires pace=True)."""
+        cells = self.cells.copy()
+        cells['observed_date'] = self.scrape_timestamp.normalize()
+        return cells[PACE_CELL_COLUMNS].reset_index(drop=True)
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'properties': sum(not pd.isna(name) for name in self.names),
+            'sketch_buckets': self.median.bucket_count(),
+            'timings': {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+        }
+
+    def summary(self):
+        """One-line summary for console output."""
+        stats = self.to_dict()
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.timings.items())
+        return (f"{stats['rows']} rows in {stats['chunks']} chunks, {stats['properties']} properties, "
+                f"{stats['sketch_buckets']} sketch buckets: {stages}")
+
+
+def stream_metrics(csv_path=None, chunk_rows=None, pace=False):
+    """StreamingAnalysis over the pricing data (default config.PRICING_CSV), read chunk_rows rows at a time."""
+    columns = ANALYSIS_COLUMNS + (SNAPSHOT_COLUMNS if pace else [])
+    return StreamingAnalysis(pace=pace).consume(iter_pricing_chunks(columns, csv_path, chunk_rows))
+
+
+def cached_metrics(df, cache, fingerprints):
+    """
+    Metric frames of every family, recomputing only properties whose rows changed since they were cached.
+
+    Records are put back together in the order a full run produces them, so the frames are the same.
+
+    Returns:
+        tuple: (AnalysisEngine over the changed properties, {family: DataFrame})
+    """
+    keys = df['hotel_name'].map(hotel_key)
+    engine = AnalysisEngine(df[keys.isin(cache.changed(fingerprints))])
+    cache.update(fingerprints, engine.hotel_records())
+
+    with engine.stage('cache'):
+        hotel_order = keys.unique()
+        observed_order = keys[df['availability'] != 'error'].unique() if 'availability' in df.columns else hotel_order
+        metrics = {}
+        for family, sort_by in METRIC_FAMILIES.items():
+            order = observed_order if family == 'occupancy' else hotel_order
+            records = [cache.record(hotel, family) for hotel in order]
+            metrics[family] = _metrics_frame([record for record in records if record is not None], sort_by)
+    return engine, metrics
+
+
+def calculate_occupancy_metrics(df):
+    """Calculate occupancy metrics by property with room-level insights."""
+    return AnalysisEngine(df).occupancy_metrics()
+
+
+def calculate_pricing_metrics(df):
+    """Calculate pricing statistics by property with room-level pricing insights."""
+    return AnalysisEngine(df).pricing_metrics()
+
+
+def _comparison_positions(pricing_df, occupancy_df):
+    """
+    Prices and occupancy compared for each property that has both pricing and occupancy metrics.
+
+    price: preferred price per night, else the property average
+    property_price: property average, else price
+    occupancy: preferred occupancy rate (property rate if there is no preferred column)
+    property_occupancy: property rate, else occupancy_rate, else occupancy (ref_property_occupancy
+    skips occupancy_rate, as the reference side always has)
+    """
+    if pricing_df.empty or occupancy_df.empty:
+        return pd.DataFrame()
+    pricing = pricing_df[pricing_df['hotel_name'].notna()]
+    occupancy = occupancy_df[occupancy_df['hotel_name'].notna()].drop_duplicates('hotel_name')
+
+    price = _numeric(pricing, 'preferred_price_per_night').fillna(_numeric(pricing, 'avg_price_per_night'))
+    prices = pd.DataFrame({
+        'hotel_name': pricing['hotel_name'],
+        'price': price,
+        'property_price': _numeric(pricing, 'property_avg_price_per_night').fillna(price),
+        'room_price': _numeric(pricing, 'avg_room_price_avg'),
+        'price_source': pricing['preferred_price_source'] if 'preferred_price_source' in pricing.columns else 'property',
+    })
+
+    occ = _numeric(occupancy, 'preferred_occupancy_rate' if 'preferred_occupancy_rate' in occupancy.columns else 'occupancy_rate')
+    property_occ = _numeric(occupancy, 'property_occupancy_rate')
+    occupancies = pd.DataFrame({
+        'hotel_name': occupancy['hotel_name'],
+        'occupancy': occ,
+        'property_occupancy': property_occ.fillna(_numeric(occupancy, 'occupancy_rate')).fillna(occ),
+        'ref_property_occupancy': property_occ.fillna(occ),
+        'room_occupancy': _numeric(occupancy, 'avg_room_occupancy_rate'),
+        'occupancy_source': occupancy['preferred_occupancy_source'] if 'preferred_occupancy_source' in occupancy.columns else 'property',
+    })
+    return prices.merge(occupancies, on='hotel_name', how='inner')
+
+
+def compare_to_references(pricing_df, occupancy_df, references=None):
+    """
+    Compare every competitor to each reference property in one join.
+
+    Returns:
+        pd.DataFrame: reference_property plus the compare_to_reference columns, grouped by reference
+        (in the order given, default config.get_reference_properties()) and sorted by price_vs_ref_pct
+    """
+    references = references or config.get_reference_properties()
+    positions = _comparison_positions(pricing_df, occupancy_df)
+    candidates = positions.drop_duplicates('hotel_name').set_index('hotel_name') if not positions.empty else pd.DataFrame()
+
+    found = []
+    for ref in references:
+        if ref in candidates.index:
+            found.append(ref)
+        else:
+            print(f"Warning: {ref} not found in data")
+    if not found:
+        return pd.DataFrame()
 
-    if not analysis:
+    refs = candidates.loc[found].reset_index().add_prefix('ref_')
+    refs['ref_order'] = np.arange(len(refs))
+    pairs = refs.merge(positions, how='cross')
+    pairs = pairs[pairs['hotel_name'] != pairs['ref_hotel_name']]
+    if pairs.empty:
         return pd.DataFrame()
 
-    return pd.DataFrame(analysis).sort_values('avg_room_occupancy_rate', ascending=False)
+    price_diff = pairs['price'] - pairs['ref_price']
+    price_diff_pct = (price_diff / pairs['ref_price'] * 100).where(pairs['ref_price'] > 0, 0.0)
+    # A reference property price of 0 gives no property-price delta
+    has_property_ref = pairs['ref_property_price'] != 0
+    property_price_diff = (pairs['property_price'] - pairs['ref_property_price']).where(has_property_ref)
+    occ_diff = pairs['occupancy'] - pairs['ref_occupancy']
+    has_room_price = pairs['room_price'].notna() & pairs['ref_room_price'].notna()
+    room_price_diff = (pairs['room_price'] - pairs['ref_room_price']).where(has_room_price)
+    has_room_occ = pairs['room_occupancy'].notna() & pairs['ref_room_occupancy'].notna()
+
+    comparisons = pd.DataFrame({
+        'reference_property': pairs['ref_hotel_name'],
+        'hotel_name': pairs['hotel_name'],
+        'avg_price': pairs['price'],
+        'price_vs_ref': price_diff,
+        'price_vs_ref_pct': price_diff_pct,
+        'preferred_price_vs_ref': price_diff,
+        'preferred_price_vs_ref_pct': price_diff_pct,
+        'property_avg_price': pairs['property_price'],
+        'property_price_vs_ref': property_price_diff,
+        'property_price_vs_ref_pct': (property_price_diff / pairs['ref_property_price'] * 100).where(has_property_ref),
+        'occupancy': pairs['occupancy'],
+        'occ_vs_ref': occ_diff,
+        'preferred_occ_vs_ref': occ_diff,
+        'property_occupancy': pairs['property_occupancy'],
+        'property_occ_vs_ref': pairs['property_occupancy'] - pairs['ref_ref_property_occupancy'],
+        'position': np.where(price_diff > 0, 'Higher Price', 'Lower Price'),
+        'demand': np.where(occ_diff > 0, 'Higher Demand', 'Lower Demand'),
+        'room_avg_price': pairs['room_price'].where(has_room_price),
+        'room_price_vs_ref': room_price_diff,
+        'room_price_vs_ref_pct': (room_price_diff / pairs['ref_room_price'] * 100).where(pairs['ref_room_price'] > 0, 0.0).where(has_room_price),
+        'room_occupancy': pairs['room_occupancy'].where(has_room_occ),
+        'room_occ_vs_ref': (pairs['room_occupancy'] - pairs['ref_room_occupancy']).where(has_room_occ),
+        'preferred_price_source': pairs['price_source'],
+        'preferred_occupancy_source': pairs['occupancy_source'],
+    })
+    return pd.concat([
+        block.reset_index(drop=True).sort_values('price_vs_ref_pct')
+        for _, block in comparisons.groupby(pairs['ref_order'].to_numpy(), sort=True)
+    ])
+
+
+def compare_to_reference(pricing_df, occupancy_df, reference=None):
+    """Compare all properties to one reference property (default config.REFERENCE_PROPERTY)."""
+    comparisons = compare_to_references(pricing_df, occupancy_df, [reference or config.REFERENCE_PROPERTY])
+    return comparisons.drop(columns='reference_property') if not comparisons.empty else comparisons
+
+
+def analyze_pricing_by_availability(df):
+    """Analyze pricing patterns for available vs sold-out dates."""
+    return AnalysisEngine(df).pricing_by_availability()
+
+
+def analyze_room_inventory(df):
+    """Analyze room-level inventory and pricing strategies."""
+    return AnalysisEngine(df).room_inventory()
+
+
+def _reference_comparison(comparisons, reference):
+    """One reference's rows of compare_to_references output, without the reference column."""
+    if comparisons.empty:
+        return comparisons
+    return comparisons[comparisons['reference_property'] == reference].drop(columns='reference_property')
 
 
-def generate_json_summary(pricing_metrics, occupancy_metrics, comparison, room_inventory=None, scrape_timestamp=None):
+def generate_json_summary(pricing_metrics, occupancy_metrics, comparison, room_inventory=None, scrape_timestamp=None, pace=None, comparisons=None):
     """Generate JSON summary with all analysis data including room-level insights."""
     
     # Replace NaN with None for valid JSON
@@ -525,6 +1259,16 @@ def generate_json_summary(pricing_metrics, occupancy_metrics, comparison, room_i
         'comparison': comparison_list,
         'room_inventory': room_inventory_list,  # NEW: Room-level insights
     }
+    if comparisons is not None:
+        # Every managed property against the compset; `comparison` stays the REFERENCE_PROPERTY view
+        references = config.get_reference_properties()
+        analysis['reference_properties'] = references
+        analysis['comparisons'] = {
+            ref: _reference_comparison(comparisons, ref).replace({np.nan: None}).to_dict('records') if not comparisons.empty else []
+            for ref in references
+        }
+    if pace is not None:
+        analysis['pace'] = pace
     
     # Save to JSON file
     with open(config.ANALYSIS_JSON, 'w', encoding='utf-8') as f:
@@ -541,41 +1285,83 @@ def main():
     print("BOOKING.COM PRICING ANALYSIS")
     print("="*70)
 
-    print("Loading pricing data...")
-    df = load_pricing_data()
-
-    if df.empty:
-        print("\nNo pricing data available to analyze.")
-        print("Run the scraper first to collect data.")
-        return
-
-    print("Calculating occupancy metrics...")
-    occupancy_metrics = calculate_occupancy_metrics(df)
-
-    print("Calculating pricing metrics...")
-    pricing_metrics = calculate_pricing_metrics(df)
+    cache = None
+    if config.ENABLE_ANALYSIS_CACHE and config.PRICING_CSV.exists():
+        cache = AnalysisCache()
+        fingerprints = hotel_fingerprints()
+        if cache.is_current(run_fingerprint(fingerprints)):
+            print("Analysis is up to date (pricing data, archive and settings unchanged) - nothing to do")
+            return
+
+    df = None
+    if config.ENABLE_STREAMING_ANALYSIS:
+        # Running per-property aggregates over chunks - the data is never loaded whole
+        print(f"Streaming pricing data ({config.STREAMING_CHUNK_ROWS:,} rows per chunk)...")
+        engine = stream_metrics(pace=config.ENABLE_PACE)
+        if not engine.rows:
+            print("\nNo pricing data available to analyze.")
+            print("Run the scraper first to collect data.")
+            return
+        metrics = engine.metrics()
+    else:
+        print("Loading pricing data...")
+        columns = ANALYSIS_COLUMNS + (SNAPSHOT_COLUMNS if config.ENABLE_PACE else [])
+        load_stats = {}
+        df = load_pricing_data(columns, stats=load_stats)
+        print(f"  Loaded {load_stats['rows']:,} rows x {load_stats['columns']} columns in {load_stats['seconds']:.2f}s "
+              f"({load_stats['memory_mb']:.1f} MB, {load_stats['engine']} engine)")
+
+        if df.empty:
+            print("\nNo pricing data available to analyze.")
+            print("Run the scraper first to collect data.")
+            return
+
+        # One group index and set of derived columns shared by every metric family
+        print("Calculating occupancy, pricing and room inventory metrics...")
+        if cache is not None:
+            engine, metrics = cached_metrics(df, cache, fingerprints)
+            print(f"  Cache: {cache.summary()}")
+        else:
+            engine = AnalysisEngine(df)
+            metrics = engine.metrics()
+    occupancy_metrics = metrics['occupancy']
+    pricing_metrics = metrics['pricing']
 
     if pricing_metrics.empty and occupancy_metrics.empty:
         print("\nInsufficient data for analysis.")
         return
 
-    print(f"Comparing to {config.REFERENCE_PROPERTY}...")
-    comparison = compare_to_reference(pricing_metrics, occupancy_metrics)
-
-    print("Analyzing pricing patterns...")
-    pricing_avail = analyze_pricing_by_availability(df)
-
-    print("Analyzing room inventory and pricing strategies...")
-    room_inventory = analyze_room_inventory(df)
+    references = config.get_reference_properties()
+    print(f"Comparing to {', '.join(references)}...")
+    comparisons = engine.comparison(pricing_metrics, occupancy_metrics, references)
+    comparison = _reference_comparison(comparisons, config.REFERENCE_PROPERTY)
+
+    pricing_avail = metrics['pricing_by_availability']
+    room_inventory = metrics['room_inventory']
+    print(f"  Analysis: {engine.summary()}")
+
+    pace = None
+    if config.ENABLE_PACE:
+        print("Calculating booking pace across snapshots...")
+        pace_engine = PaceEngine()
+        if df is None:
+            # Cells collected while streaming (one row per cell, not per row)
+            pace = pace_engine.update_cells(engine.snapshot_cells(), engine.scrape_timestamp.normalize())
+        else:
+            pace = pace_engine.update(df)
+        print(f"  Pace: {pace_engine.summary()}")
 
     print("Generating analysis...")
 
     # Get the most recent scrape timestamp from the data
-    scrape_timestamp = df['scrape_timestamp'].max().isoformat()
+    scrape_timestamp = (engine.scrape_timestamp if df is None else df['scrape_timestamp'].max()).isoformat()
 
     # JSON analysis export
-    json_summary = generate_json_summary(pricing_metrics, occupancy_metrics, comparison, room_inventory, scrape_timestamp)
+    json_summary = generate_json_summary(pricing_metrics, occupancy_metrics, comparison, room_inventory, scrape_timestamp, pace, comparisons)
     print(f"OK: Analysis saved to {config.ANALYSIS_JSON}")
+    if cache is not None:
+        # After pace has run: its state file is part of the fingerprint
+        cache.save(run_fingerprint(fingerprints))
 
     # Console summary
     print("\n" + "="*70)
@@ -605,11 +1391,16 @@ def main():
                 print(f"    Avg Room Price: R {ref_room['avg_room_price'].values[0]:,.2f}")
                 print(f"    Price Spread: {ref_room['room_price_spread_pct'].values[0]:.1f}%")
 
-    if not comparison.empty:
+    if not comparisons.empty:
         print(f"\nMarket Position:")
-        cheaper = len(comparison[comparison['price_vs_ref'] < 0])
-        expensive = len(comparison[comparison['price_vs_ref'] > 0])
-        print(f"  {cheaper} competitors cheaper | {expensive} more expensive")
+        for ref in references:
+            ref_comparison = _reference_comparison(comparisons, ref)
+            if ref_comparison.empty:
+                continue
+            cheaper = len(ref_comparison[ref_comparison['price_vs_ref'] < 0])
+            expensive = len(ref_comparison[ref_comparison['price_vs_ref'] > 0])
+            label = f"{ref}: " if len(references) > 1 else ""
+            print(f"  {label}{cheaper} competitors cheaper | {expensive} more expensive")
     
     # Room inventory insights summary
     if not room_inventory.empty:
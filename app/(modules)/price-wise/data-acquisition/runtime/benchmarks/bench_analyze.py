@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark and parity check for the vectorized analyze.py metric functions.
+
+Parity: every archive snapshot (archive/pricing_data_*.csv), the current
+outputs/pricing_data.csv and a synthetic dataset are analysed by both the
+current implementation and the pre-vectorization copy in legacy_analyze.py.
+Outputs must be identical: same columns, rows, order, dtypes and bit-for-bit
+float values. compare_to_references is checked against the legacy
+compare_to_reference with several properties as the reference, on the JSON
+records it produces (the legacy frame mixed None/int into float columns).
+
+Benchmark: a synthetic year of occupancy checks (default 500 properties x
+365 check-in dates) timed with both implementations, per function, for
+all metric families from one AnalysisEngine (with its per-stage timings)
+and for comparisons against --references reference properties.
+
+Usage:
+    python benchmarks/bench_analyze.py --check      # parity only, exit 1 on mismatch
+    python benchmarks/bench_analyze.py              # parity + benchmark
+    python benchmarks/bench_analyze.py --hotels 100 --days 180
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import analyze  # noqa: E402
+import config  # noqa: E402
+import legacy_analyze  # noqa: E402
+
+# (name, current implementation, legacy implementation)
+FUNCTIONS = [
+    ("calculate_pricing_metrics", analyze.calculate_pricing_metrics, legacy_analyze.calculate_pricing_metrics),
+    ("calculate_occupancy_metrics", analyze.calculate_occupancy_metrics, legacy_analyze.calculate_occupancy_metrics),
+    ("analyze_room_inventory", analyze.analyze_room_inventory, legacy_analyze.analyze_room_inventory),
+    ("analyze_pricing_by_availability", analyze.analyze_pricing_by_availability, legacy_analyze.analyze_pricing_by_availability),
+]
+
+
+def prepare(df):
+    """Same derived columns as analyze.load_pricing_data."""
+    df = df.copy()
+    df['check_in_date'] = pd.to_datetime(df['check_in_date'])
+    df['check_out_date'] = pd.to_datetime(df['check_out_date'])
+    df['scrape_timestamp'] = pd.to_datetime(df['scrape_timestamp'])
+    df['is_available'] = df['availability'] == 'available'
+    df['is_sold_out'] = df['availability'] == 'sold_out'
+    return df
+
+
+def synthetic_year(hotels, days, seed=7):
+    """Occupancy-mode rows: every property checked for every check-in date of a year."""
+    rng = np.random.default_rng(seed)
+    n = hotels * days
+    hotel = np.repeat(np.arange(hotels), days)
+    check_in = pd.Timestamp("2025-01-01") + pd.to_timedelta(np.tile(np.arange(days), hotels), unit="D")
+    room_types = rng.integers(1, 9, hotels)[hotel].astype(float)
+
+    state = rng.choice(["available", "sold_out", "error"], n, p=[0.62, 0.36, 0.02])
+    available_rooms = np.where(state == "available", rng.integers(1, 9, n), 0).astype(float)
+    total = room_types.copy()
+    total[rng.random(n) < 0.05] = np.nan  # missing room list
+    total[rng.random(n) < 0.02] = 0.0
+    available_rooms[rng.random(n) < 0.05] = np.nan
+    nights = rng.choice([1.0, 2.0, 3.0], n)
+    nights[rng.random(n) < 0.01] = np.nan
+
+    price = np.where(state == "available", rng.integers(2000, 60000, n).astype(float), np.nan)
+    min_room = np.where(rng.random(n) < 0.8, price * 0.7, np.nan)
+    max_room = np.where(np.isnan(min_room), np.nan, price * 1.6)
+    avg_room = np.where(rng.random(n) < 0.9, (min_room + max_room) / 2, np.nan)
+    discount = rng.random(n) < 0.2
+
+    df = pd.DataFrame({
+        "hotel_name": [f"Lodge {h:03d}" for h in hotel],
+        "hotel_slug": [f"lodge-{h:03d}" for h in hotel],
+        "check_in_date": check_in,
+        "check_out_date": check_in + pd.to_timedelta(np.nan_to_num(nights, nan=2.0), unit="D"),
+        "nights": nights,
+        "availability": state,
+        "total_price": price,
+        "price_per_night": price / np.nan_to_num(nights, nan=2.0),
+        "has_discount": discount,
+        "discount_percentage": np.where(discount, rng.integers(5, 30, n), np.nan).astype(float),
+        "rating_score": rng.uniform(7, 10, hotels)[hotel],
+        "total_room_types": total,
+        "available_room_types": available_rooms,
+        "min_room_price": min_room,
+        "max_room_price": max_room,
+        "avg_room_price": avg_room,
+        "scrape_timestamp": pd.Timestamp("2024-12-31 06:00"),
+    })
+    return prepare(df)
+
+
+def irregular(df, seed=3):
+    """Edge cases on top of a synthetic dataset: shuffled rows, missing names/prices, hotels without room prices."""
+    rng = np.random.default_rng(seed)
+    df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    hotels = df['hotel_name'].unique()
+    df.loc[df['hotel_name'].isin(hotels[::7]), 'avg_room_price'] = np.nan
+    df.loc[df['hotel_name'].isin(hotels[3::11]), ['min_room_price', 'max_room_price']] = np.nan
+    df.loc[rng.random(len(df)) < 0.05, 'price_per_night'] = np.nan
+    df['has_discount'] = df['has_discount'].astype(object)
+    df.loc[rng.random(len(df)) < 0.05, 'has_discount'] = np.nan
+    df = df.drop(df[df['hotel_name'] == hotels[5]].index[1:])  # single-row hotel
+    df.loc[rng.random(len(df)) < 0.01, 'hotel_name'] = np.nan
+    return df
+
+
+def compare(current, legacy):
+    """Return a description of the first difference, or None if the outputs match."""
+    if list(current.columns) != list(legacy.columns):
+        return f"columns differ: {list(current.columns)} vs {list(legacy.columns)}"
+    if list(current.index) != list(legacy.index):
+        return "row order differs"
+    try:
+        pd.testing.assert_frame_equal(current, legacy, check_exact=True)
+    except AssertionError as e:
+        return str(e).splitlines()[0] + " " + " ".join(str(e).splitlines()[1:4])
+    return None
+
+
+def parity_datasets(hotels, days):
+    for path in sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv")) + [config.PRICING_CSV]:
+        if path.exists():
+            yield path.name, prepare(pd.read_csv(path))
+    df = synthetic_year(hotels, days)
+    yield f"synthetic {hotels}x{days}", df
+    yield f"irregular {hotels}x{days}", irregular(df)
+
+
+def records(df):
+    """Rows as written to pricing_analysis.json."""
+    return df.replace({np.nan: None}).to_dict('records') if not df.empty else []
+
+
+def legacy_comparisons(pricing, occupancy, references):
+    """Legacy compare_to_reference once per reference (it reads config.REFERENCE_PROPERTY)."""
+    original = config.REFERENCE_PROPERTY
+    try:
+        results = {}
+        for ref in references:
+            config.REFERENCE_PROPERTY = ref
+            results[ref] = legacy_analyze.compare_to_reference(pricing, occupancy)
+        return results
+    finally:
+        config.REFERENCE_PROPERTY = original
+
+
+def compare_comparisons(df, max_references=8):
+    """Return a description of the first reference whose comparison differs, or None."""
+    pricing = legacy_analyze.calculate_pricing_metrics(df)
+    occupancy = legacy_analyze.calculate_occupancy_metrics(df)
+    if pricing.empty or occupancy.empty:
+        return None
+    references = list(pricing['hotel_name'].dropna().unique()[:max_references])
+    combined = analyze.compare_to_references(pricing, occupancy, references)
+    for ref, legacy in legacy_comparisons(pricing, occupancy, references).items():
+        current = combined[combined['reference_property'] == ref].drop(columns='reference_property')
+        if records(current) != records(legacy):
+            return f"records differ for reference {ref}"
+    return None
+
+
+def check_parity(hotels, days):
+    failures = 0
+    for name, df in parity_datasets(hotels, days):
+        checks = [(func_name, lambda: compare(current_func(df), legacy_func(df))) for func_name, current_func, legacy_func in FUNCTIONS]
+        checks.append(("compare_to_references", lambda: compare_comparisons(df)))
+        for func_name, check in checks:
+            problem = check()
+            status = "ok" if problem is None else f"MISMATCH - {problem}"
+            failures += problem is not None
+            print(f"  {name:<32} {func_name:<32} {status}")
+    return failures
+
+
+def timed(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity check and benchmark for vectorized analysis functions")
+    parser.add_argument("--check", action="store_true", help="Parity check only")
+    parser.add_argument("--hotels", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--references", type=int, default=10, help="Reference properties for the comparison benchmark")
+    args = parser.parse_args()
+
+    print("Parity against legacy implementations:")
+    failures = check_parity(min(args.hotels, 60), min(args.days, 120))
+    if failures:
+        print(f"FAIL: {failures} mismatches")
+        sys.exit(1)
+    if args.check:
+        return
+
+    df = synthetic_year(args.hotels, args.days)
+    print(f"\nBenchmark: {args.hotels} properties x {args.days} days ({len(df):,} rows), best of {args.repeat}")
+    for func_name, current_func, legacy_func in FUNCTIONS:
+        current_s = timed(current_func, df, args.repeat)
+        legacy_s = timed(legacy_func, df, 1)
+        print(f"  {func_name:<32} legacy {legacy_s:8.3f} s   vectorized {current_s:8.3f} s   {legacy_s / current_s:6.1f}x")
+
+    # Everything analyze.main computes per run: one engine vs each legacy function re-scanning the frame
+    legacy_s = sum(timed(legacy_func, df, 1) for _, _, legacy_func in FUNCTIONS)
+    engine = None
+
+    def run_engine(df):
+        nonlocal engine
+        engine = analyze.AnalysisEngine(df)
+        engine.occupancy_metrics()
+        engine.pricing_metrics()
+        engine.pricing_by_availability()
+        engine.room_inventory()
+
+    current_s = timed(run_engine, df, args.repeat)
+    print(f"  {'all families (shared index)':<32} legacy {legacy_s:8.3f} s   vectorized {current_s:8.3f} s   {legacy_s / current_s:6.1f}x")
+    print(f"  Stages: {engine.summary()}")
+
+    pricing, occupancy = analyze.calculate_pricing_metrics(df), analyze.calculate_occupancy_metrics(df)
+    references = list(pricing['hotel_name'].unique()[:args.references])
+    legacy_s = timed(lambda _: legacy_comparisons(pricing, occupancy, references), None, 1)
+    current_s = timed(lambda _: analyze.compare_to_references(pricing, occupancy, references), None, args.repeat)
+    label = f"comparison ({len(references)} references)"
+    print(f"  {label:<32} legacy {legacy_s:8.3f} s   vectorized {current_s:8.3f} s   {legacy_s / current_s:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: delta-encoded archive vs full daily CSV copies.
+
+Simulates a year of daily snapshots (default: 16 properties x 91 check-in
+dates, a rolling window where --change-rate of the cells change per day),
+stores them in a DeltaArchive and reports disk use against plain CSV copies
+plus materialization time (including the worst case: the last delta before a
+keyframe). Every materialized snapshot must equal its source exactly: same
+rows in the same order, including each row's own scrape_timestamp.
+
+Usage:
+    python benchmarks/bench_delta_archive.py
+    python benchmarks/bench_delta_archive.py --days 90 --change-rate 0.15
+"""
+import argparse
+import csv
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from delta_archive import DeltaArchive, read_snapshot_csv  # noqa: E402
+from scrape import CSV_FIELDNAMES  # noqa: E402
+
+
+def random_cell(rng):
+    available = rng.random() < 0.6
+    price = float(rng.randrange(4000, 90000, 50)) if available else None
+    return {
+        "availability": "available" if available else "sold_out",
+        "total_price": price,
+        "price_per_night": price / 2 if price else None,
+        "available_room_types": rng.randrange(1, 7) if available else 0,
+    }
+
+
+def evolve(cells, scrape_date, hotels, days_ahead, change_rate, rng):
+    """Roll the check-in window to scrape_date and change a share of the cells."""
+    window = {scrape_date + timedelta(days=offset) for offset in range(days_ahead)}
+    cells = {key: values for key, values in cells.items() if key[1] in window}
+    for h in range(hotels):
+        for check_in in sorted(window):
+            key = (h, check_in)
+            if key not in cells or rng.random() < change_rate:
+                cells[key] = random_cell(rng)
+    return cells
+
+
+def snapshot_rows(cells, scrape_date, rng):
+    """Rows the way scrape.py writes them: properties in completion order, one timestamp per check."""
+    hotels = sorted({h for h, _ in cells})
+    rng.shuffle(hotels)
+    position = {h: i for i, h in enumerate(hotels)}
+    rows = []
+    start = datetime.combine(scrape_date, datetime.min.time()) + timedelta(hours=6)
+    for i, ((h, check_in), values) in enumerate(sorted(cells.items(), key=lambda item: (position[item[0][0]], item[0][1]))):
+        stamp = start + timedelta(seconds=13 * i, microseconds=rng.randrange(1_000_000))
+        rows.append({
+            "hotel_name": f"Safari Lodge {h}",
+            "hotel_slug": f"safari-lodge-{h}",
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "nights": 2, "guests": 2, "rooms": 1,
+            "day_offset": (check_in - scrape_date).days,
+            "has_discount": False,
+            "total_room_types": 6,
+            "room_names": "Luxury Suite, Family Suite, River Suite",
+            "scrape_timestamp": stamp.isoformat(),
+            **values,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the delta-encoded archive against full CSV copies")
+    parser.add_argument("--days", type=int, default=365, help="Daily snapshots")
+    parser.add_argument("--hotels", type=int, default=16)
+    parser.add_argument("--days-ahead", type=int, default=91)
+    parser.add_argument("--change-rate", type=float, default=0.08, help="Share of cells changing per day")
+    parser.add_argument("--keyframe-interval", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        csv_dir = root / "csv"
+        csv_dir.mkdir()
+        archive = DeltaArchive(root / "history", keyframe_interval=args.keyframe_interval)
+
+        print(f"Archiving {args.days} daily snapshots x {args.hotels} hotels x {args.days_ahead} dates "
+              f"({args.change_rate:.0%} of cells change per day)...")
+        cells = {}
+        csv_bytes = 0
+        append_times = []
+        first = date(2025, 1, 1)
+        for d in range(args.days):
+            scrape_date = first + timedelta(days=d)
+            cells = evolve(cells, scrape_date, args.hotels, args.days_ahead, args.change_rate, rng)
+            path = csv_dir / f"pricing_data_{scrape_date:%Y%m%d}.csv"
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(snapshot_rows(cells, scrape_date, rng))
+            csv_bytes += path.stat().st_size
+            start = time.perf_counter()
+            archive.append(path, f"{scrape_date:%Y%m%d}")
+            append_times.append(time.perf_counter() - start)
+
+        stored_bytes = sum(p.stat().st_size for p in archive.root.glob("*.csv.gz"))
+        materialize_times = {}
+        for date_str in archive.dates():
+            start = time.perf_counter()
+            fieldnames, rows = archive.materialize(date_str)
+            materialize_times[date_str] = time.perf_counter() - start
+
+            _, source_rows = read_snapshot_csv(csv_dir / f"pricing_data_{date_str}.csv")
+            assert rows == source_rows, f"{date_str} does not match its source"
+
+        full_copy_mb = csv_bytes / args.days * 30 / 1e6
+        times = sorted(materialize_times.values())
+        print(archive.summary())
+        print(f"  Plain CSV copies : {csv_bytes / 1e6:8.1f} MB for {args.days} days ({full_copy_mb:.1f} MB for 30)")
+        print(f"  Delta archive    : {stored_bytes / 1e6:8.2f} MB for {args.days} days")
+        print(f"  Append           : median {statistics.median(append_times) * 1000:6.1f} ms")
+        print(f"  Materialize      : median {statistics.median(times) * 1000:6.1f} ms, worst {times[-1] * 1000:6.1f} ms")
+        print(f"  All {len(times)} snapshots match their source exactly")
+
+
+if __name__ == "__main__":
+    main()
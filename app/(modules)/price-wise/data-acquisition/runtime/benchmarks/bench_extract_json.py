@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: b_rooms_available_and_soldout extraction.
+
+Compares the in-place JSON decoder used by page_parser.extract_rooms_json_from_html
+with the previous character-by-character scanner (which sliced the document
+tail) and with the regex bracket-scanner fallback.
+
+Runs over recorded pages when --pages is given, otherwise over synthetic
+pages shaped like Booking.com property pages (payload near the top, several
+hundred KB of markup after it).
+
+Usage:
+    python benchmarks/bench_extract_json.py
+    python benchmarks/bench_extract_json.py --pages ./recorded --repeat 50
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import page_parser  # noqa: E402
+
+
+def legacy_extract_rooms_json(html_content):
+    """Previous implementation: per-character scan over a copy of the document tail."""
+    match = re.search(r'b_rooms_available_and_soldout:\s*(\[)', html_content)
+    if not match:
+        return []
+
+    start_pos = match.end() - 1
+    bracket_count = 0
+    in_string = False
+    escape_next = False
+
+    for i, char in enumerate(html_content[start_pos:], start=start_pos):
+        if escape_next:
+            escape_next = False
+            continue
+        if char == '\\':
+            escape_next = True
+            continue
+        if char == '"' and not escape_next:
+            in_string = not in_string
+        if not in_string:
+            if char == '[' or char == '{':
+                bracket_count += 1
+            elif char == ']' or char == '}':
+                bracket_count -= 1
+                if bracket_count == 0:
+                    try:
+                        return json.loads(html_content[start_pos:i + 1])
+                    except json.JSONDecodeError:
+                        return []
+    return []
+
+
+def scanner_extract_rooms_json(html_content):
+    """Bracket-scanner fallback path on its own."""
+    match = page_parser.ROOMS_JSON_START.search(html_content)
+    if not match:
+        return []
+    start_pos = match.end() - 1
+    end_pos = page_parser.scan_json_array(html_content, start_pos)
+    return json.loads(html_content[start_pos:end_pos]) if end_pos != -1 else []
+
+
+def synthetic_page(n_rooms, tail_kb):
+    """Build a property-page-shaped HTML document with an embedded rooms payload."""
+    rooms = []
+    for r in range(n_rooms):
+        rooms.append({
+            "b_id": 70236500 + r,
+            "b_name": f"Luxury Room {r} including \"two\" game drives per day",
+            "b_blocks": [
+                {
+                    "b_raw_price": f"{3000 + r * 250}.00",
+                    "b_price": f"ZAR {3000 + r * 250:,}",
+                    "b_max_persons": 2,
+                    "b_mealplan_included_name": "full_board",
+                    "b_cancellation_type": "non_refundable",
+                    "b_policy": "Free cancellation \\ before arrival",
+                }
+                for _ in range(3)
+            ],
+        })
+    head = "<html><head><title>Lodge</title></head><body>" + "<div class='x'>header</div>" * 200
+    script = (
+        "<script>booking.env = {\n"
+        f" b_rooms_available_and_soldout: {json.dumps(rooms)},\n"
+        " b_cheapest_price: 1234\n};</script>"
+    )
+    tail = "<div class='room-row'><span>content</span></div>\n" * (tail_kb * 1024 // 48)
+    return head + script + tail + "</body></html>"
+
+
+def load_pages(pages_dir):
+    if pages_dir:
+        return [p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(pages_dir).glob("*.html"))]
+    return [synthetic_page(n_rooms, tail_kb) for n_rooms, tail_kb in [(1, 300), (6, 400), (12, 600), (0, 350)]]
+
+
+def time_function(func, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    return (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rooms JSON extraction")
+    parser.add_argument("--pages", help="Directory of recorded .html pages (default: synthetic pages)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        raise SystemExit("No pages to benchmark")
+
+    # Results must match before timings mean anything
+    for page in pages:
+        expected = legacy_extract_rooms_json(page)
+        assert page_parser.extract_rooms_json_from_html(page) == expected, "decoder result differs from legacy scanner"
+        assert scanner_extract_rooms_json(page) == expected, "scanner result differs from legacy scanner"
+
+    legacy_ms = time_function(legacy_extract_rooms_json, pages, args.repeat)
+    scanner_ms = time_function(scanner_extract_rooms_json, pages, args.repeat)
+    decoder_ms = time_function(page_parser.extract_rooms_json_from_html, pages, args.repeat)
+
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"Pages: {len(pages)} (avg {avg_kb:.0f} KB), repeat: {args.repeat}")
+    print(f"  legacy char scanner : {legacy_ms:8.3f} ms/page")
+    print(f"  regex bracket scan  : {scanner_ms:8.3f} ms/page  ({legacy_ms / scanner_ms:5.1f}x)")
+    print(f"  in-place decoder    : {decoder_ms:8.3f} ms/page  ({legacy_ms / decoder_ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
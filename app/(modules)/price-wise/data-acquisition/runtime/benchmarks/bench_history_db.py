@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-cell history queries against the SQLite history database.
+
+Ingests synthetic daily snapshots (default: 365 days x 16 properties x 91
+check-in dates) and times cell_history / lead_time_curve after 30, 90 and
+all snapshots, to show that query time does not grow with history length.
+For comparison it also times answering the same question by scanning daily
+CSV copies (the way it had to be done before).
+
+Usage:
+    python benchmarks/bench_history_db.py
+    python benchmarks/bench_history_db.py --days 120 --hotels 8
+"""
+import argparse
+import csv
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_history_load import synthetic_snapshot  # noqa: E402
+from history_db import HistoryDB  # noqa: E402
+from scrape import CSV_FIELDNAMES  # noqa: E402
+
+
+def time_queries(db, hotels, first, days, rng, repeat=200):
+    cell, curve = [], []
+    for _ in range(repeat):
+        slug = f"safari-lodge-{rng.randrange(hotels)}"
+        check_in = (first + timedelta(days=rng.randrange(days))).isoformat()
+        start = time.perf_counter()
+        db.cell_history(slug, check_in)
+        cell.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        db.lead_time_curve(slug, 30)
+        curve.append(time.perf_counter() - start)
+    return statistics.median(cell) * 1000, statistics.median(curve) * 1000
+
+
+def scan_csvs(csv_dir, slug, check_in):
+    rows = []
+    for path in sorted(csv_dir.glob("pricing_data_*.csv")):
+        with path.open("r", newline="", encoding="utf-8") as f:
+            rows.extend(row for row in csv.DictReader(f) if row["hotel_slug"] == slug and row["check_in_date"] == check_in)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history DB cell queries")
+    parser.add_argument("--days", type=int, default=365, help="Daily snapshots")
+    parser.add_argument("--hotels", type=int, default=16)
+    parser.add_argument("--days-ahead", type=int, default=91)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    checkpoints = sorted({min(30, args.days), min(90, args.days), args.days})
+    first = date(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        csv_dir = root / "archive"
+        csv_dir.mkdir()
+        db = HistoryDB(root / "history.sqlite")
+
+        print(f"Ingesting {args.days} snapshots x {args.hotels} hotels x {args.days_ahead} dates...")
+        ingest_times = []
+        for d in range(args.days):
+            scrape_date = first + timedelta(days=d)
+            rows = synthetic_snapshot(scrape_date, args.hotels, args.days_ahead, rng)
+            path = csv_dir / f"pricing_data_{scrape_date:%Y%m%d}.csv"
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(rows)
+            start = time.perf_counter()
+            db.ingest_csv(path, scrape_date.isoformat())
+            ingest_times.append(time.perf_counter() - start)
+
+            if d + 1 in checkpoints:
+                cell_ms, curve_ms = time_queries(db, args.hotels, first, d + 1, rng)
+                print(f"  {d + 1:>4} snapshots: cell_history {cell_ms:6.2f} ms, lead_time_curve {curve_ms:6.2f} ms (median)")
+
+        check_in = (first + timedelta(days=args.days // 2)).isoformat()
+        start = time.perf_counter()
+        scanned = scan_csvs(csv_dir, "safari-lodge-0", check_in)
+        scan_s = time.perf_counter() - start
+        assert len(scanned) == len(db.cell_history("safari-lodge-0", check_in)), "row counts differ"
+
+        db_mb = sum(p.stat().st_size for p in root.glob("history.sqlite*")) / 1e6
+        print(f"  Ingest: median {statistics.median(ingest_times) * 1000:.0f} ms per snapshot, {db_mb:.1f} MB database")
+        print(f"  Same cell by scanning {args.days} CSV copies: {scan_s * 1000:,.0f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
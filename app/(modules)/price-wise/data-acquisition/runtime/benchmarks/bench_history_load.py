@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loading scrape history from daily CSV copies vs the Parquet dataset.
+
+Builds a synthetic history (default: 365 daily snapshots of 16 properties x 91
+check-in dates) in a temporary directory, once as archive-style CSV files and
+once as the partitioned Parquet dataset, then times a full load of each and
+reports the resulting DataFrame memory.
+
+Usage:
+    python benchmarks/bench_history_load.py
+    python benchmarks/bench_history_load.py --days 90 --hotels 8
+"""
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import parquet_store  # noqa: E402
+from scrape import CSV_FIELDNAMES  # noqa: E402
+
+
+def synthetic_snapshot(scrape_date, hotels, days_ahead, rng):
+    rows = []
+    for h in range(hotels):
+        for offset in range(days_ahead):
+            check_in = scrape_date + timedelta(days=offset)
+            available = rng.random() < 0.6
+            price = float(rng.randrange(4000, 90000, 50)) if available else None
+            rows.append({
+                "hotel_name": f"Safari Lodge {h}",
+                "hotel_slug": f"safari-lodge-{h}",
+                "check_in_date": check_in.isoformat(),
+                "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+                "nights": 2, "guests": 2, "rooms": 1, "day_offset": offset,
+                "availability": "available" if available else "sold_out",
+                "total_price": price,
+                "price_per_night": price / 2 if price else None,
+                "has_discount": False,
+                "total_room_types": 6,
+                "available_room_types": rng.randrange(1, 7) if available else 0,
+                "room_names": "Luxury Suite, Family Suite, River Suite",
+                "scrape_timestamp": datetime.combine(scrape_date, datetime.min.time()).isoformat(),
+            })
+    return rows
+
+
+def build_history(root, days, hotels, days_ahead):
+    rng = random.Random(42)
+    csv_dir = root / "archive"
+    csv_dir.mkdir()
+    store = parquet_store.ParquetStore(root / "dataset")
+    first = date(2025, 1, 1)
+    for d in range(days):
+        scrape_date = first + timedelta(days=d)
+        rows = synthetic_snapshot(scrape_date, hotels, days_ahead, rng)
+        with (csv_dir / f"pricing_data_{scrape_date:%Y%m%d}.csv").open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        store.write_batch(rows, scrape_date.isoformat())
+    # Same layout the scraper leaves behind: finished months rolled up into one file each
+    store.rollup((first + timedelta(days=days - 1)).strftime("%Y-%m"))
+    return csv_dir, store.root
+
+
+def load_csv_history(csv_dir):
+    frames = []
+    for path in sorted(csv_dir.glob("pricing_data_*.csv")):
+        df = pd.read_csv(path)
+        df["check_in_date"] = pd.to_datetime(df["check_in_date"])
+        df["check_out_date"] = pd.to_datetime(df["check_out_date"])
+        df["scrape_timestamp"] = pd.to_datetime(df["scrape_timestamp"])
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history loading: CSV copies vs Parquet dataset")
+    parser.add_argument("--days", type=int, default=365, help="Daily snapshots")
+    parser.add_argument("--hotels", type=int, default=16)
+    parser.add_argument("--days-ahead", type=int, default=91)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"Building {args.days} snapshots x {args.hotels} hotels x {args.days_ahead} dates...")
+        csv_dir, dataset_dir = build_history(root, args.days, args.hotels, args.days_ahead)
+
+        csv_mb = sum(p.stat().st_size for p in csv_dir.glob("*.csv")) / 1e6
+        parquet_mb = sum(p.stat().st_size for p in dataset_dir.rglob("*.parquet")) / 1e6
+
+        csv_df, csv_s = timed(load_csv_history, csv_dir)
+        parquet_df, parquet_s = timed(parquet_store.load_history, root=dataset_dir)
+        assert len(csv_df) == len(parquet_df), "row counts differ"
+
+        csv_mem = csv_df.memory_usage(deep=True).sum() / 1e6
+        parquet_mem = parquet_df.memory_usage(deep=True).sum() / 1e6
+
+        print(f"Rows: {len(parquet_df):,}")
+        print(f"  CSV copies      : {csv_s:7.2f} s  {csv_mem:8.1f} MB in memory  {csv_mb:8.1f} MB on disk")
+        print(f"  Parquet dataset : {parquet_s:7.2f} s  {parquet_mem:8.1f} MB in memory  {parquet_mb:8.1f} MB on disk")
+        print(f"  speed-up {csv_s / parquet_s:.1f}x, memory {parquet_mem / csv_mem:.0%} of CSV")
+
+
+if __name__ == "__main__":
+    main()
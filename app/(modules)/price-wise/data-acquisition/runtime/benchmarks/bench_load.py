@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark and parity check for the typed pricing data loader.
+
+Parity: every archive snapshot, the current outputs/pricing_data.csv and a
+synthetic multi-snapshot CSV are loaded by analyze.load_pricing_data (pyarrow
+and C parser engines, analysis columns only) and by the original loader in
+legacy_analyze.py. Calendar fields must match and every metric family must
+give identical frames.
+
+Benchmark: load time and memory footprint (deep) of the synthetic CSV
+(default 30 daily snapshots x 100 properties x 365 check-in dates) with the
+legacy loader and with the typed loader per engine, for all columns and for
+the analysis columns only.
+
+Usage:
+    python benchmarks/bench_load.py --check     # parity only, exit 1 on mismatch
+    python benchmarks/bench_load.py             # parity + benchmark
+    python benchmarks/bench_load.py --snapshots 20 --hotels 50
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import analyze  # noqa: E402
+import config  # noqa: E402
+import legacy_analyze  # noqa: E402
+from bench_analyze import compare, synthetic_year  # noqa: E402
+from scrape import CSV_FIELDNAMES  # noqa: E402
+
+CALENDAR_COLUMNS = ['check_in_date', 'scrape_timestamp', 'month', 'month_name', 'day_of_week', 'weeks_ahead']
+ENGINES = ['pyarrow', 'c'] if analyze.pa is not None else ['c']
+
+
+def write_history_csv(path, snapshots, hotels, days, seed=11):
+    """Stacked daily snapshots of a synthetic year, written the way scrape.py writes rows."""
+    rng = np.random.default_rng(seed)
+    base = synthetic_year(hotels, days)
+    frames = []
+    for s in range(snapshots):
+        df = base.copy()
+        scrape_day = pd.Timestamp("2024-12-31") - pd.Timedelta(days=snapshots - 1 - s)
+        df['scrape_timestamp'] = scrape_day + pd.to_timedelta(rng.integers(6 * 3600, 18 * 3600, len(df)) * 10**6 + rng.integers(0, 10**6, len(df)), unit="us")
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df['guests'], df['rooms'] = 2, 1
+    df['day_offset'] = (df['check_in_date'] - df['scrape_timestamp'].dt.normalize()).dt.days
+    df['room_names'] = "Luxury Suite, Family Suite, River Suite"
+    for col in ['nights', 'total_room_types', 'available_room_types']:
+        df[col] = df[col].astype('Int64')
+    for col in ['check_in_date', 'check_out_date']:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
+    df['scrape_timestamp'] = df['scrape_timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    df.reindex(columns=CSV_FIELDNAMES).to_csv(path, index=False, float_format='%.2f')
+    return len(df)
+
+
+def legacy_load(path):
+    original = config.PRICING_CSV
+    try:
+        config.PRICING_CSV = path
+        return legacy_analyze.load_pricing_data()
+    finally:
+        config.PRICING_CSV = original
+
+
+def typed_load(path, engine, columns=None):
+    """analyze.load_pricing_data with `engine` ('pyarrow' or 'c')."""
+    arrow = analyze.pa
+    try:
+        if engine == 'c':
+            analyze.pa = None
+        return analyze.load_pricing_data(columns, csv_path=path)
+    finally:
+        analyze.pa = arrow
+
+
+def compare_loads(legacy, typed):
+    """Return a description of the first difference, or None if analysis results match."""
+    for col in CALENDAR_COLUMNS:
+        if not (legacy[col].astype(str).to_numpy() == typed[col].astype(str).to_numpy()).all():
+            return f"{col} differs"
+    legacy_metrics = analyze.AnalysisEngine(legacy).metrics()
+    typed_metrics = analyze.AnalysisEngine(typed).metrics()
+    for family, frame in legacy_metrics.items():
+        problem = compare(typed_metrics[family], frame)
+        if problem:
+            return f"{family}: {problem}"
+    return None
+
+
+def check_parity(synthetic_path):
+    failures = 0
+    paths = sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv")) + [config.PRICING_CSV, synthetic_path]
+    for path in paths:
+        if not path.exists():
+            continue
+        legacy = legacy_load(path)
+        for engine in ENGINES:
+            problem = compare_loads(legacy, typed_load(path, engine, analyze.ANALYSIS_COLUMNS))
+            status = "ok" if problem is None else f"MISMATCH - {problem}"
+            failures += problem is not None
+            print(f"  {path.name:<32} {engine:<8} {status}")
+    return failures
+
+
+def measure(load):
+    start = time.perf_counter()
+    df = load()
+    return time.perf_counter() - start, df.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity check and benchmark for the typed pricing data loader")
+    parser.add_argument("--check", action="store_true", help="Parity check only")
+    parser.add_argument("--snapshots", type=int, default=30, help="Daily snapshots in the benchmark CSV")
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Parity against the legacy loader:")
+        parity_path = Path(tmp) / "pricing_data_synthetic.csv"
+        write_history_csv(parity_path, 3, 40, 120)
+        failures = check_parity(parity_path)
+        if failures:
+            print(f"FAIL: {failures} mismatches")
+            sys.exit(1)
+        if args.check:
+            return
+
+        path = Path(tmp) / "pricing_data.csv"
+        rows = write_history_csv(path, args.snapshots, args.hotels, args.days)
+        print(f"\nBenchmark: {args.snapshots} snapshots x {args.hotels} properties x {args.days} days "
+              f"({rows:,} rows, {path.stat().st_size / 1e6:.0f} MB CSV)")
+        legacy_s, legacy_mb = measure(lambda: legacy_load(path))
+        print(f"  {'legacy (inferred types)':<34} {legacy_s:7.2f} s {legacy_mb:8.1f} MB")
+        for engine in ENGINES:
+            for label, columns in (("all columns", None), ("analysis columns", analyze.ANALYSIS_COLUMNS)):
+                seconds, mb = measure(lambda: typed_load(path, engine, columns))
+                print(f"  {f'typed, {engine}, {label}':<34} {seconds:7.2f} s {mb:8.1f} MB   "
+                      f"{legacy_s / seconds:5.1f}x faster, {legacy_mb / mb:5.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark suite over the recorded fixture corpus.
+
+Runs each parsing function in page_parser over benchmarks/fixtures/*.html
+(available multi-room lodges, single-unit villas, sold-out pages and pages
+without the rooms JSON) and reports per-function latency, throughput
+(pages/sec) and peak memory (tracemalloc). Parsed records are checked
+against the stored baseline first, so a speed-up that changes output fails.
+
+Results can be stored as a baseline and later runs checked against it. Runs
+locally and offline - no network or browser needed.
+
+Usage:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --check
+    python benchmarks/bench_parser.py --update-baseline
+    python benchmarks/bench_parser.py --pages ./recorded --repeat 50
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import page_parser  # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+BASELINE_FILE = BENCH_DIR / "parser_baseline.json"
+
+# Fixed arguments so parsed records are comparable across runs
+CHECK_IN, CHECK_OUT, NIGHTS = "2025-01-01", "2025-01-03", 2
+
+# Fields that legitimately change between runs
+VOLATILE_FIELDS = ("scrape_timestamp",)
+
+
+def parse_full(html, slug):
+    return page_parser.extract_pricing_data(html, slug, CHECK_IN, CHECK_OUT, NIGHTS)
+
+
+def build_cases(slug):
+    """
+    Functions under test, each called as case(html, rooms).
+
+    `rooms` is the page's pre-extracted rooms JSON, so the details step is
+    timed on its own.
+    """
+    return {
+        "extract_pricing_data": lambda html, rooms: parse_full(html, slug),
+        "extract_rooms_json_from_html": lambda html, rooms: page_parser.extract_rooms_json_from_html(html),
+        "extract_room_details_from_json": lambda html, rooms: page_parser.extract_room_details_from_json(rooms),
+        "extract_listing_fields_from_fragments": lambda html, rooms: page_parser.extract_listing_fields_from_fragments(html),
+    }
+
+
+def load_corpus(pages_dir):
+    """Return {fixture name: html} for every .html page in the directory."""
+    return {
+        path.stem: path.read_text(encoding="utf-8", errors="replace")
+        for path in sorted(Path(pages_dir).glob("*.html"))
+    }
+
+
+def stable_record(record):
+    return {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_case(func, html, rooms, repeat):
+    """Per-call latencies in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html, rooms)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def peak_memory_kb(func, html, rooms):
+    """Peak Python heap allocated during one call, in KB (measured separately from timing)."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        func(html, rooms)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / 1024
+
+
+def run_suite(corpus, repeat):
+    """
+    Benchmark every function over every page.
+
+    Returns:
+        dict: {"functions": {...}, "pages": {...}, "records": {...}}
+    """
+    functions = {}
+    pages = {}
+    records = {}
+
+    for name, html in corpus.items():
+        cases = build_cases(name)
+        rooms = page_parser.extract_rooms_json_from_html(html)
+        records[name] = stable_record(parse_full(html, name))
+        pages[name] = {"size_kb": round(len(html) / 1024, 1)}
+
+        for func_name, func in cases.items():
+            func(html, rooms)  # warm-up
+            samples = time_case(func, html, rooms, repeat)
+            peak_kb = peak_memory_kb(func, html, rooms)
+
+            entry = functions.setdefault(func_name, {"samples": [], "peak_kb": 0.0})
+            entry["samples"].extend(samples)
+            entry["peak_kb"] = max(entry["peak_kb"], peak_kb)
+
+            if func_name == "extract_pricing_data":
+                ordered = sorted(samples)
+                pages[name]["p50_ms"] = round(percentile(ordered, 0.5), 3)
+                pages[name]["peak_kb"] = round(peak_kb, 1)
+
+    summary = {}
+    for func_name, entry in functions.items():
+        ordered = sorted(entry["samples"])
+        mean_ms = sum(ordered) / len(ordered)
+        summary[func_name] = {
+            "mean_ms": round(mean_ms, 3),
+            "p50_ms": round(percentile(ordered, 0.5), 3),
+            "p95_ms": round(percentile(ordered, 0.95), 3),
+            "pages_per_sec": round(1000 / mean_ms, 1) if mean_ms else None,
+            "peak_kb": round(entry["peak_kb"], 1),
+        }
+    return {"functions": summary, "pages": pages, "records": records}
+
+
+def print_report(results, corpus, repeat):
+    total_kb = sum(len(html) for html in corpus.values()) / 1024
+    print(f"Corpus: {len(corpus)} pages ({total_kb:.0f} KB), repeat: {repeat}")
+    print()
+    print(f"  {'function':<40}{'mean ms':>10}{'p95 ms':>10}{'pages/s':>10}{'peak KB':>10}")
+    for func_name, stats in results["functions"].items():
+        print(f"  {func_name:<40}{stats['mean_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['pages_per_sec']:>10.1f}{stats['peak_kb']:>10.1f}")
+    print()
+    print(f"  {'page (extract_pricing_data)':<40}{'size KB':>10}{'p50 ms':>10}{'peak KB':>10}  availability")
+    for name, stats in results["pages"].items():
+        availability = results["records"][name]["availability"]
+        print(f"  {name:<40}{stats['size_kb']:>10.1f}{stats['p50_ms']:>10.3f}{stats['peak_kb']:>10.1f}  {availability}")
+
+
+def check_against_baseline(results, baseline, tolerance, memory_tolerance):
+    """
+    Compare results with a stored baseline.
+
+    Records must match exactly. Per function, p50 latency may grow by at most
+    `tolerance` and peak memory by at most `memory_tolerance` (fractions,
+    e.g. 0.5 = 50%). Timings are noisy and machine-specific, memory is not.
+
+    Returns:
+        list: failure messages (empty if the check passed)
+    """
+    failures = []
+
+    for name, expected in baseline.get("records", {}).items():
+        actual = results["records"].get(name)
+        if actual is None:
+            failures.append(f"record {name}: fixture missing from corpus")
+        elif actual != expected:
+            changed = sorted(k for k in set(expected) | set(actual) if expected.get(k) != actual.get(k))
+            failures.append(f"record {name}: fields changed: {', '.join(changed)}")
+
+    for func_name, expected in baseline.get("functions", {}).items():
+        actual = results["functions"].get(func_name)
+        if actual is None:
+            failures.append(f"{func_name}: not benchmarked")
+            continue
+        if actual["p50_ms"] > expected["p50_ms"] * (1 + tolerance):
+            failures.append(f"{func_name}: p50 {actual['p50_ms']:.3f} ms vs baseline {expected['p50_ms']:.3f} ms")
+        if actual["peak_kb"] > expected["peak_kb"] * (1 + memory_tolerance):
+            failures.append(f"{func_name}: peak {actual['peak_kb']:.1f} KB vs baseline {expected['peak_kb']:.1f} KB")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page_parser over the fixture corpus")
+    parser.add_argument("--pages", default=str(FIXTURES_DIR), help="Directory of .html pages (default: benchmarks/fixtures)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=str(BASELINE_FILE), help="Baseline JSON file")
+    parser.add_argument("--check", action="store_true", help="Fail if results regress against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p50 latency growth for --check (default: 0.5)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1, help="Allowed peak memory growth for --check (default: 0.1)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.pages)
+    if not corpus:
+        raise SystemExit(f"No .html pages in {args.pages}")
+
+    results = run_suite(corpus, args.repeat)
+    print_report(results, corpus, args.repeat)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            **results,
+        }
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written to {baseline_path}")
+
+    if args.check:
+        if not baseline_path.exists():
+            raise SystemExit(f"No baseline at {baseline_path} - run with --update-baseline first")
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        failures = check_against_baseline(results, baseline, args.tolerance, args.memory_tolerance)
+        if failures:
+            print(f"\n✗ Regression check failed ({len(failures)}):")
+            for failure in failures:
+                print(f"  - {failure}")
+            sys.exit(1)
+        print(f"\n✓ Within tolerance of baseline ({baseline.get('generated_at', 'unknown date')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tolerance check and memory benchmark for the streaming analysis mode.
+
+Parity: every archive snapshot, the current outputs/pricing_data.csv and
+synthetic CSVs (a year of occupancy checks, plus one with missing prices
+and a single-row property) are analysed by analyze.AnalysisEngine on the loaded frame and by
+analyze.StreamingAnalysis in small chunks (so every hotel crosses chunk
+boundaries). Per property and metric family: counts, text and flags must be
+identical, median_price within STREAMING_MEDIAN_ACCURACY, and every other
+value within STREAMING_RTOL / STREAMING_ATOL. The booking pace cells collected
+while streaming must equal pace.snapshot_cells of the loaded frame.
+
+Benchmark: peak memory (RSS, each run in a fresh process) and time of the
+full load + AnalysisEngine against streaming, for growing stacks of daily
+snapshots (default 100 properties x 365 days) - streaming stays flat.
+
+Usage:
+    python benchmarks/bench_stream.py --check     # tolerance check only, exit 1 on mismatch
+    python benchmarks/bench_stream.py             # check + benchmark
+    python benchmarks/bench_stream.py --snapshots 5 10 20 40
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import analyze  # noqa: E402
+import config  # noqa: E402
+import pace  # noqa: E402
+from bench_analyze import irregular, synthetic_year  # noqa: E402
+from bench_load import write_history_csv  # noqa: E402
+from scrape import CSV_FIELDNAMES  # noqa: E402
+
+CHUNK_ROWS = 97  # Small and odd: chunks split every hotel's rows
+
+
+def write_csv(df, path):
+    """A synthetic frame written the way scrape.py writes rows (one snapshot, rows in check-in order)."""
+    df = df.sort_values('check_in_date', kind='stable')
+    for col in ['nights', 'total_room_types', 'available_room_types']:
+        df[col] = df[col].astype('Int64')
+    df.reindex(columns=CSV_FIELDNAMES).to_csv(path, index=False)
+    return path
+
+
+def parity_paths(tmp):
+    paths = [p for p in sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv")) + [config.PRICING_CSV] if p.exists()]
+    year = synthetic_year(60, 120)
+    paths.append(write_csv(year, Path(tmp) / "pricing_data_synthetic.csv"))
+    # Without the nameless rows: read back as one property with several rows per check-in date,
+    # whose fill order AnalysisEngine's sort leaves arbitrary
+    paths.append(write_csv(irregular(year).dropna(subset=['hotel_name']), Path(tmp) / "pricing_data_irregular.csv"))
+    return paths
+
+
+def compare_streamed(streamed, full):
+    """Return a description of the first value outside the documented tolerances, or None."""
+    if streamed.empty or full.empty:
+        return None if streamed.empty and full.empty else f"{len(streamed)} vs {len(full)} rows"
+    streamed = streamed.set_index(streamed['hotel_name'].map(analyze.hotel_key))
+    full = full.set_index(full['hotel_name'].map(analyze.hotel_key))
+    if list(streamed.columns) != list(full.columns) or set(streamed.index) != set(full.index):
+        return "columns or properties differ"
+    streamed = streamed.loc[full.index]
+    for col in full.columns:
+        expected, actual = full[col].to_numpy(), streamed[col].to_numpy()
+        if full[col].dtype.kind != 'f':
+            same = [a == e or (pd.isna(a) and pd.isna(e)) for a, e in zip(actual, expected)]
+        elif col == 'median_price':
+            same = np.isclose(actual, expected, rtol=config.STREAMING_MEDIAN_ACCURACY, atol=0, equal_nan=True)
+        else:
+            same = np.isclose(actual, expected, rtol=analyze.STREAMING_RTOL, atol=analyze.STREAMING_ATOL, equal_nan=True)
+        if not np.all(same):
+            i = int(np.argmin(same))
+            return f"{col} of {full.index[i]!r}: {actual[i]!r} vs {expected[i]!r}"
+    return None
+
+
+def compare_cells(streaming, df):
+    """Return a description of the first difference between the streamed and loaded pace cells, or None."""
+    expected = pace.snapshot_cells(df, df['scrape_timestamp'].max())
+    try:
+        pd.testing.assert_frame_equal(streaming.snapshot_cells(), expected, check_exact=True)
+    except AssertionError as e:
+        return " ".join(str(e).splitlines()[:3])
+    return None
+
+
+def check_parity(tmp):
+    failures = 0
+    for path in parity_paths(tmp):
+        df = analyze.load_pricing_data(analyze.ANALYSIS_COLUMNS + pace.SNAPSHOT_COLUMNS, csv_path=path)
+        streaming = analyze.stream_metrics(path, CHUNK_ROWS, pace=True)
+        full, streamed = analyze.AnalysisEngine(df).metrics(), streaming.metrics()
+        checks = [(family, compare_streamed(streamed[family], frame)) for family, frame in full.items()]
+        checks.append(("pace cells", compare_cells(streaming, df)))
+        for name, problem in checks:
+            status = "ok" if problem is None else f"MISMATCH - {problem}"
+            failures += problem is not None
+            print(f"  {path.name:<32} {name:<24} {status}")
+    return failures
+
+
+def peak_rss_kb():
+    """Peak RSS of this process (ru_maxrss survives exec on Linux and would report the parent's peak)."""
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_measured(mode, path):
+    """Analyse path with `mode` ('full' or 'stream') in this process; print seconds and peak RSS as JSON."""
+    start = time.perf_counter()
+    if mode == 'full':
+        analyze.AnalysisEngine(analyze.load_pricing_data(analyze.ANALYSIS_COLUMNS, csv_path=path)).metrics()
+    else:
+        analyze.stream_metrics(path).metrics()
+    print(json.dumps({'seconds': time.perf_counter() - start, 'peak_mb': peak_rss_kb() / 1024}))
+
+
+def measure(mode, path):
+    result = subprocess.run([sys.executable, __file__, "--measure", mode, str(path)], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tolerance check and memory benchmark for streaming analysis")
+    parser.add_argument("--check", action="store_true", help="Tolerance check only")
+    parser.add_argument("--snapshots", type=int, nargs="+", default=[5, 10, 20, 40], help="Daily snapshots per benchmark CSV")
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        run_measured(args.measure[0], Path(args.measure[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Streaming ({CHUNK_ROWS} rows per chunk) against AnalysisEngine:")
+        failures = check_parity(tmp)
+        if failures:
+            print(f"FAIL: {failures} mismatches")
+            sys.exit(1)
+        if args.check:
+            return
+
+        print(f"\nBenchmark: {args.hotels} properties x {args.days} days per snapshot, "
+              f"{config.STREAMING_CHUNK_ROWS:,} rows per chunk (peak RSS of a fresh process)")
+        for snapshots in args.snapshots:
+            path = Path(tmp) / "pricing_data.csv"
+            rows = write_history_csv(path, snapshots, args.hotels, args.days)
+            full, streamed = measure('full', path), measure('stream', path)
+            print(f"  {snapshots:>3} snapshots ({rows:>10,} rows, {path.stat().st_size / 1e6:5.0f} MB CSV)   "
+                  f"full {full['seconds']:6.2f} s {full['peak_mb']:7.0f} MB   "
+                  f"streaming {streamed['seconds']:6.2f} s {streamed['peak_mb']:7.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Browser pool for the Booking.com scraper.
+
+Keeps a configurable number of Chromium processes warm for the whole run and
+hands out fresh, stealth-patched browser contexts per date check. Contexts and
+browsers are recycled after a number of navigations, or immediately when a
+block page is detected, so each check still looks like a new visitor without
+paying for a full browser launch per page.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from playwright_stealth import Stealth
+
+# Import configuration
+import config
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox'
+]
+
+# Markers that only appear on Booking.com challenge / block pages
+BLOCK_PAGE_MARKERS = [
+    "px-captcha",
+    "awswaf",
+    "challenge-platform",
+    "please verify you are a human",
+    "access denied",
+    "request unsuccessful",
+]
+
+
+class BlockedPageError(Exception):
+    """Raised when Booking.com served a block/challenge page instead of the property page."""
+
+
+def is_block_page(html):
+    """Return True if the HTML looks like a block/challenge page rather than a property page."""
+    if not html:
+        return False
+    if "b_rooms_available_and_soldout" in html or "hprt-table" in html:
+        return False
+    head = html[:20000].lower()
+    return any(marker in head for marker in BLOCK_PAGE_MARKERS)
+
+
+class _PooledBrowser:
+    """A long-lived browser process and its navigation bookkeeping."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.leases = 0
+        self.open_contexts = 0
+        self.retired = False
+
+
+class _PooledContext:
+    """A browser context handed out by the pool."""
+
+    def __init__(self, context, owner):
+        self.context = context
+        self.owner = owner
+        self.navigations = 0
+
+
+class BrowserLease:
+    """A context leased from the pool for a single date check."""
+
+    def __init__(self, pooled_context):
+        self._pooled = pooled_context
+        self.blocked = False
+
+    @property
+    def context(self):
+        return self._pooled.context
+
+    def mark_blocked(self):
+        """Flag the lease so its context and browser are recycled on release."""
+        self.blocked = True
+
+
+class BrowserPool:
+    """
+    Pool of warm Chromium browsers handing out isolated contexts.
+
+    Usage:
+        pool = BrowserPool(playwright)
+        async with pool.lease() as lease:
+            page = await lease.context.new_page()
+        await pool.close()
+    """
+
+    def __init__(self, play, size=None, context_max_navigations=None, browser_max_navigations=None, user_agent=None, resource_filter=None):
+        self.play = play
+        self.size = max(1, size or config.BROWSER_POOL_SIZE)
+        self.context_max_navigations = max(1, context_max_navigations or config.CONTEXT_MAX_NAVIGATIONS)
+        self.browser_max_navigations = max(1, browser_max_navigations or config.BROWSER_MAX_NAVIGATIONS)
+        self.user_agent = user_agent
+        self.resource_filter = resource_filter
+
+        self._browsers = []
+        self._idle_contexts = []
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+        self.stats = {
+            "browsers_launched": 0,
+            "contexts_created": 0,
+            "navigations": 0,
+            "recycled_by_navigation": 0,
+            "recycled_by_block": 0,
+        }
+
+    async def _launch_browser(self):
+        browser = await self.play.chromium.launch(headless=config.HEADLESS, args=LAUNCH_ARGS)
+        pooled = _PooledBrowser(browser)
+        self._browsers.append(pooled)
+        self.stats["browsers_launched"] += 1
+        return pooled
+
+    async def _new_context(self, pooled_browser):
+        context = await pooled_browser.browser.new_context(
+            user_agent=self.user_agent,
+            locale="en-GB",
+            viewport={'width': 1920, 'height': 1080}
+        )
+
+        # Apply all stealth scripts to the context
+        for script in Stealth().enabled_scripts:
+            await context.add_init_script(script)
+
+        if self.resource_filter is not None:
+            await self.resource_filter.install(context)
+
+        pooled_browser.open_contexts += 1
+        self.stats["contexts_created"] += 1
+        return _PooledContext(context, pooled_browser)
+
+    async def _retire_browser(self, pooled_browser):
+        pooled_browser.retired = True
+        if pooled_browser.open_contexts <= 0:
+            await self._close_browser(pooled_browser)
+
+    async def _pick_browser(self):
+        """Return the least loaded live browser, launching one if the pool is not full."""
+        for pooled_browser in [b for b in self._browsers if not b.retired]:
+            if pooled_browser.leases >= self.browser_max_navigations:
+                self.stats["recycled_by_navigation"] += 1
+                await self._retire_browser(pooled_browser)
+
+        live = [b for b in self._browsers if not b.retired]
+        if len(live) < self.size:
+            return await self._launch_browser()
+        return min(live, key=lambda b: b.open_contexts)
+
+    async def _acquire(self, fresh=False):
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+
+            while self._idle_contexts and not fresh:
+                pooled = self._idle_contexts.pop()
+                if not pooled.owner.retired and pooled.owner.leases < self.browser_max_navigations:
+                    pooled.owner.leases += 1
+                    return pooled
+                await self._discard_context(pooled)
+
+            pooled_browser = await self._pick_browser()
+            pooled_browser.leases += 1
+            return await self._new_context(pooled_browser)
+
+    async def _discard_context(self, pooled):
+        owner = pooled.owner
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+        owner.open_contexts -= 1
+
+        if owner.retired and owner.open_contexts <= 0:
+            await self._close_browser(owner)
+
+    async def _close_browser(self, pooled_browser):
+        if pooled_browser in self._browsers:
+            self._browsers.remove(pooled_browser)
+        try:
+            await pooled_browser.browser.close()
+        except Exception:
+            pass
+
+    async def _release(self, lease):
+        pooled = lease._pooled
+        owner = pooled.owner
+
+        async with self._lock:
+            pooled.navigations += 1
+            self.stats["navigations"] += 1
+
+            if lease.blocked:
+                # Burned fingerprint - drop the context and relaunch the browser
+                if not owner.retired:
+                    self.stats["recycled_by_block"] += 1
+                owner.retired = True
+                await self._discard_context(pooled)
+                return
+
+            if owner.retired or pooled.navigations >= self.context_max_navigations or self._closed:
+                await self._discard_context(pooled)
+            else:
+                self._idle_contexts.append(pooled)
+
+    @asynccontextmanager
+    async def lease(self, fresh=False):
+        """Lease a browser context for one date check (fresh=True never reuses an idle context)."""
+        pooled = await self._acquire(fresh)
+        lease = BrowserLease(pooled)
+        try:
+            yield lease
+        finally:
+            await self._release(lease)
+
+    async def close(self):
+        """Close all idle contexts and browsers."""
+        async with self._lock:
+            self._closed = True
+            for pooled in self._idle_contexts:
+                try:
+                    await pooled.context.close()
+                except Exception:
+                    pass
+            self._idle_contexts = []
+            for pooled_browser in list(self._browsers):
+                await self._close_browser(pooled_browser)
+
+    def summary(self):
+        """One-line summary of pool activity for console output."""
+        return (
+            f"{self.stats['browsers_launched']} browser launches, "
+            f"{self.stats['contexts_created']} contexts, "
+            f"{self.stats['navigations']} page loads "
+            f"(recycled: {self.stats['recycled_by_navigation']} by navigation count, "
+            f"{self.stats['recycled_by_block']} by block)"
+        )
@@ -0,0 +1,140 @@
+"""
+Compressed raw-HTML capture store.
+
+Every fetched page can be written once, gzip-compressed and content-addressed
+by SHA-256, so identical pages are stored only once. A per-day JSONL index
+maps (slug, check-in, check-out, scrape timestamp) to the stored blob. Stored
+pages can be re-parsed offline (`python scrape.py --replay YYYY-MM-DD`) when
+the parser changes, without re-scraping.
+
+Layout:
+    captures/
+    ├── blobs/ab/<sha256>.html.gz
+    └── index/YYYY-MM-DD.jsonl
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+from datetime import datetime
+
+# Import configuration
+import config
+from page_parser import extract_pricing_data
+
+
+class CaptureStore:
+    """Content-addressed store of compressed HTML pages with a daily index."""
+
+    def __init__(self, root=None, compression_level=None):
+        self.root = root or config.CAPTURE_DIR
+        self.blob_dir = self.root / "blobs"
+        self.index_dir = self.root / "index"
+        self.compression_level = config.CAPTURE_COMPRESSION_LEVEL if compression_level is None else compression_level
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self.stats = {"pages": 0, "new_blobs": 0, "raw_bytes": 0, "stored_bytes": 0}
+
+    def blob_path(self, digest):
+        return self.blob_dir / digest[:2] / f"{digest}.html.gz"
+
+    def index_path(self, date_str):
+        return self.index_dir / f"{date_str}.jsonl"
+
+    def write_blob(self, html):
+        """
+        Hash, compress and store a page unless it is stored already. Touches no shared
+        state, so it can run in a worker thread (see save_async).
+
+        Returns:
+            tuple: (SHA-256 digest, raw bytes, stored bytes - 0 if the blob existed)
+        """
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            return digest, len(raw), 0
+        path.parent.mkdir(exist_ok=True)
+        compressed = gzip.compress(raw, compresslevel=self.compression_level)
+        # Per-thread temp name: two workers may store the same page at once
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(compressed)
+        tmp_path.replace(path)
+        return digest, len(raw), len(compressed)
+
+    def index(self, blob, slug, check_in, check_out, nights, scrape_timestamp=None):
+        """Count a stored page (a write_blob result) and append it to the day's index."""
+        digest, raw_bytes, stored_bytes = blob
+        self.stats["pages"] += 1
+        self.stats["raw_bytes"] += raw_bytes
+        if stored_bytes:
+            self.stats["new_blobs"] += 1
+            self.stats["stored_bytes"] += stored_bytes
+
+        scrape_timestamp = scrape_timestamp or datetime.now().isoformat()
+        entry = {
+            "hotel_slug": slug,
+            "check_in_date": check_in,
+            "check_out_date": check_out,
+            "nights": nights,
+            "scrape_timestamp": scrape_timestamp,
+            "sha256": digest,
+        }
+        with self.index_path(scrape_timestamp[:10]).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def save(self, html, slug, check_in, check_out, nights, scrape_timestamp=None):
+        """
+        Store a page and index it.
+
+        Returns:
+            str: SHA-256 digest of the page
+        """
+        return self.index(self.write_blob(html), slug, check_in, check_out, nights, scrape_timestamp)
+
+    async def save_async(self, html, slug, check_in, check_out, nights, scrape_timestamp=None):
+        """save() from the event loop: hashing, compression and the blob write run in a worker thread."""
+        blob = await asyncio.to_thread(self.write_blob, html)
+        return self.index(blob, slug, check_in, check_out, nights, scrape_timestamp)
+
+    def entries(self, date_str):
+        """Index entries for a scrape date, keeping only the latest capture per (slug, check-in, check-out)."""
+        path = self.index_path(date_str)
+        if not path.exists():
+            return []
+
+        latest = {}
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from an interrupted run
+                    continue
+                key = (entry["hotel_slug"], entry["check_in_date"], entry["check_out_date"])
+                if key not in latest or entry["scrape_timestamp"] >= latest[key]["scrape_timestamp"]:
+                    latest[key] = entry
+        return list(latest.values())
+
+    def load(self, digest):
+        """Return the decompressed HTML for a digest."""
+        return gzip.decompress(self.blob_path(digest).read_bytes()).decode("utf-8")
+
+    def summary(self):
+        """One-line summary for console output."""
+        saved_mb = self.stats["stored_bytes"] / (1024 * 1024)
+        raw_mb = self.stats["raw_bytes"] / (1024 * 1024)
+        return f"{self.stats['pages']} pages ({raw_mb:.1f} MB raw), {self.stats['new_blobs']} new blobs ({saved_mb:.1f} MB stored)"
+
+
+def parse_capture(blob_path, slug, check_in, check_out, nights):
+    """Worker entry point for replay: decompress a stored page and parse it."""
+    html = gzip.decompress(blob_path.read_bytes()).decode("utf-8")
+    return extract_pricing_data(html, slug, check_in, check_out, nights)
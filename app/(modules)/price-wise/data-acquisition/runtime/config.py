@@ -40,6 +40,7 @@ ROOMS = 1   # Number of rooms
 # ═══════════════════════════════════════════════════════════════════════════
 
 REFERENCE_PROPERTY = "Ukanyi Luxury Villa"  # Property for comparison
+REFERENCE_PROPERTIES = []  # More managed properties to compare against the compset (REFERENCE_PROPERTY is always first)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # FILE PATHS
@@ -57,33 +58,153 @@ ARCHIVE_DIR = PARENT_DIR / "archive"
 
 PRICING_CSV = OUTPUT_DIR / "pricing_data.csv"
 ANALYSIS_JSON = OUTPUT_DIR / "pricing_analysis.json"
+PACE_STATE_FILE = OUTPUT_DIR / "pace_state.json"  # Running pace/pickup totals (see ENABLE_PACE)
+ANALYSIS_CACHE_FILE = OUTPUT_DIR / "analysis_cache.json"  # Per-property metric records (see ENABLE_ANALYSIS_CACHE)
 
 # Logs
 LOG_FILE = OUTPUT_DIR / "scrape_log.json"
 DAILY_PROGRESS_FILE = OUTPUT_DIR / "daily_progress.json"
+PROGRESS_JOURNAL_FILE = OUTPUT_DIR / "progress_journal.jsonl"  # Date-level checkpoints for resume
+
+# Raw HTML captures (see ENABLE_CAPTURE)
+CAPTURE_DIR = PARENT_DIR / "captures"
+
+# Delta-encoded snapshot history (see ENABLE_DELTA_ARCHIVE)
+DELTA_ARCHIVE_DIR = ARCHIVE_DIR / "history"
+
+# Partitioned Parquet dataset (see ENABLE_PARQUET)
+PARQUET_DIR = PARENT_DIR / "dataset"
+
+# SQLite history of every scrape (see ENABLE_HISTORY_DB)
+HISTORY_DB_FILE = OUTPUT_DIR / "history.sqlite"
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SCRAPING BEHAVIOR
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Delay between requests (seconds) - be respectful to servers
+# Site root - point at a local stand-in server (standin_server.py) to test against recorded pages
+BOOKING_BASE_URL = "https://www.booking.com"
+
+# Fetch engine
+# - "browser" = always use the Playwright browser pool
+# - "http" = plain HTTP first (HTML already embeds the room payload), browser fallback on block/missing data;
+#   only worth it where the HTTP hit rate (printed after each run) is high
+FETCH_ENGINE = "browser"
+HTTP_POOL_SIZE = 8  # Keep-alive connections in the HTTP client pool
+HTTP_TIMEOUT = 20  # seconds
+# Circuit breaker: HTTP is dropped for the rest of the run once its hit rate (%) is below
+# HTTP_MIN_HIT_RATE after HTTP_MIN_ATTEMPTS attempts - every page then goes straight to the browser
+HTTP_MIN_ATTEMPTS = 20
+HTTP_MIN_HIT_RATE = 50.0
+HTTP_MAX_CONSECUTIVE_BLOCKS = 5  # ... or once this many HTTP responses in a row were block pages
+
+# Starting delay between requests (seconds) - the adaptive rate limiter begins at 1 / REQUEST_DELAY
 REQUEST_DELAY = 0.5 if OCCUPANCY_MODE else 1.0
 
+# Adaptive rate limiting - token bucket shared by all workers; the rate rises while pages succeed
+# and is cut sharply on block pages, timeouts and errors (AIMD)
+RATE_LIMIT_MIN = 0.2  # requests/sec floor
+RATE_LIMIT_MAX = 6.0  # requests/sec ceiling
+RATE_LIMIT_BURST = 2  # Requests allowed back-to-back after an idle spell
+RATE_LIMIT_INCREASE = 0.05  # requests/sec added per successful fetch
+RATE_LIMIT_BACKOFF = 0.5  # Rate multiplier on block/timeout/error
+RATE_LIMIT_COOLDOWN = 5.0  # seconds - at most one back-off per throttling episode
+
+# Retries for failed date checks (timeouts, navigation errors, block pages)
+RETRY_MAX_ATTEMPTS = 3  # Attempts per date check, each retry on a fresh browser context
+RETRY_BACKOFF_BASE = 1.0  # seconds - retry n waits a random 0 - BASE * 2**n
+RETRY_BACKOFF_MAX = 30.0  # seconds - cap on a single retry wait
+RETRY_REQUEUE_PASSES = 1  # Times a still-failing date goes to the back of the queue before an error row is written
+
 # Browser settings
 # HEADLESS mode: 
 # - True = No browser windows (works on servers). Fresh browser context created per request to bypass detection.
 # - False = Browser windows visible (for debugging/local use)
-# NOTE: Scraper creates a new browser instance for EACH date check to avoid Booking.com's automation detection.
-# This is slower but allows headless mode to work reliably for room data extraction.
+# NOTE: Scraper leases a fresh, stealth-patched browser context for EACH date check to avoid
+# Booking.com's automation detection. Browsers are kept warm in a pool and relaunched periodically.
 HEADLESS = False  # MUST be False - Booking.com detects ALL headless browsers and blocks room data
 BROWSER_TIMEOUT = 30000  # 30 seconds
 
+# Page readiness - parse as soon as room data (or a sold-out/block marker) is present
+READY_DEADLINE_MS = 10000  # Hard upper bound on waiting after navigation
+READY_POLL_INTERVAL_MS = 100  # How often the readiness check runs in the page
+
+# Browser pool
+BROWSER_POOL_SIZE = 2  # Long-lived browser processes kept warm for the whole run
+CONTEXT_MAX_NAVIGATIONS = 1  # Page loads per context before it is discarded (1 = fresh context per check)
+BROWSER_MAX_NAVIGATIONS = 50  # Page loads per browser process before it is relaunched
+
+# Concurrency
+MAX_CONCURRENT_PAGES = 4  # Page loads in flight across all properties (also bounds pages held for parsing)
+MAX_CONCURRENT_PER_PROPERTY = 2  # Page loads in flight for any single property
+
+# HTML parsing - runs in worker processes so it never blocks page fetching
+PARSE_WORKERS = 2  # Parser processes (0 = parse inline on the event loop)
+
+# Resource filtering (opt-in) - abort sub-resources we never parse
+BLOCK_RESOURCES = False
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+BLOCKED_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "facebook.net", "facebook.com", "hotjar.com", "criteo.com", "bing.com",
+]
+ALLOWED_DOMAINS = []  # Empty = allow any domain not explicitly blocked
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ARCHIVING
 # ═══════════════════════════════════════════════════════════════════════════
 
 ENABLE_ARCHIVING = True  # Archive old data before new scrape
-MAX_ARCHIVE_FILES = 30   # Keep last N archive files
+MAX_ARCHIVE_FILES = 30   # Keep last N archive files (plain CSV copies read by the app)
+
+# Delta-encoded history - every archived snapshot is also stored as a delta against the previous
+# one (changed rows in full, unchanged ones as key + timestamp), so CSV copies beyond MAX_ARCHIVE_FILES can be removed without
+# losing history. Rebuild one with `python delta_archive.py --materialize YYYYMMDD`
+ENABLE_DELTA_ARCHIVE = True
+ARCHIVE_KEYFRAME_INTERVAL = 30  # Full copy every N snapshots - bounds deltas replayed per materialization
+
+# Volatility-aware refresh (opt-in, needs archive history) - near-term and frequently changing
+# dates are checked every run; far-out stable dates every REFRESH_STABLE_INTERVAL runs, with the
+# last observed row carried forward in between (marked by the stale_since column)
+ENABLE_REFRESH_TIERS = False
+REFRESH_NEAR_TERM_DAYS = 14  # Check-ins this close are always re-checked
+REFRESH_STABLE_INTERVAL = 3  # Runs between checks of a stable far-out date
+REFRESH_VOLATILITY_THRESHOLD = 0.2  # Share of past observations that changed - at or above = volatile
+REFRESH_HISTORY_SNAPSHOTS = 14  # Archive snapshots used to judge volatility
+
+# Raw HTML capture - keep every fetched page (gzip, content-addressed) so a day can be
+# re-parsed offline with `python scrape.py --replay YYYY-MM-DD`
+ENABLE_CAPTURE = False
+CAPTURE_COMPRESSION_LEVEL = 6  # gzip level 1 (fast) - 9 (small)
+
+# Typed Parquet dataset partitioned by scrape date and hotel, written alongside pricing_data.csv
+# (requires pyarrow; skipped with a warning if it is missing)
+ENABLE_PARQUET = True
+PARQUET_COMPRESSION = "zstd"
+
+# SQLite history indexed on (hotel, check-in, scrape date) - each run ingests today's rows;
+# backfill with `python history_db.py --ingest-archive`
+ENABLE_HISTORY_DB = True
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ANALYSIS
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Booking pace / pickup across archive snapshots (`pace` section of pricing_analysis.json),
+# updated incrementally from PACE_STATE_FILE - delete that file to rebuild from the archive
+ENABLE_PACE = True
+PACE_LEAD_BUCKETS = [7, 14, 30, 60, 90, 180]  # Upper bounds (days before arrival) of lead-time buckets
+
+# Reuse metrics of properties whose rows did not change since the last analysis, and skip the
+# analysis entirely (without loading pandas) when nothing it reads has changed
+ENABLE_ANALYSIS_CACHE = True
+
+# Analyze the pricing data in chunks with running per-property aggregates instead of loading it
+# whole: memory stays flat however many rows there are (booking pace keeps one row per stay cell).
+# Medians come from a quantile sketch (see README "Streaming Analysis" for tolerances)
+ENABLE_STREAMING_ANALYSIS = False
+STREAMING_CHUNK_ROWS = 100000  # Rows read per chunk
+STREAMING_MEDIAN_ACCURACY = 0.005  # Relative error of streamed median prices
 
 # ═══════════════════════════════════════════════════════════════════════════
 # DISPLAY SETTINGS
@@ -108,6 +229,11 @@ def get_mode_name():
     return "OCCUPANCY TRACKING" if OCCUPANCY_MODE else "PRICING ANALYSIS"
 
 
+def get_reference_properties():
+    """REFERENCE_PROPERTY followed by REFERENCE_PROPERTIES, without duplicates."""
+    return list(dict.fromkeys([REFERENCE_PROPERTY, *REFERENCE_PROPERTIES]))
+
+
 def get_scrape_info():
     """Get dictionary of current scraping configuration."""
     return {
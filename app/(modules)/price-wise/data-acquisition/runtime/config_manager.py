@@ -20,10 +20,57 @@ ALLOWED_KEYS = {
     "GUESTS": int,
     "ROOMS": int,
     "REFERENCE_PROPERTY": str,
+    "REFERENCE_PROPERTIES": list,
     "HEADLESS": bool,
     "BROWSER_TIMEOUT": int,
+    "FETCH_ENGINE": str,
+    "HTTP_POOL_SIZE": int,
+    "HTTP_TIMEOUT": int,
+    "HTTP_MIN_ATTEMPTS": int,
+    "HTTP_MIN_HIT_RATE": float,
+    "HTTP_MAX_CONSECUTIVE_BLOCKS": int,
+    "RATE_LIMIT_MIN": float,
+    "RATE_LIMIT_MAX": float,
+    "RATE_LIMIT_BURST": int,
+    "RATE_LIMIT_INCREASE": float,
+    "RATE_LIMIT_BACKOFF": float,
+    "RATE_LIMIT_COOLDOWN": float,
+    "RETRY_MAX_ATTEMPTS": int,
+    "RETRY_BACKOFF_BASE": float,
+    "RETRY_BACKOFF_MAX": float,
+    "RETRY_REQUEUE_PASSES": int,
+    "READY_DEADLINE_MS": int,
+    "READY_POLL_INTERVAL_MS": int,
+    "BROWSER_POOL_SIZE": int,
+    "CONTEXT_MAX_NAVIGATIONS": int,
+    "BROWSER_MAX_NAVIGATIONS": int,
+    "MAX_CONCURRENT_PAGES": int,
+    "MAX_CONCURRENT_PER_PROPERTY": int,
+    "PARSE_WORKERS": int,
+    "BLOCK_RESOURCES": bool,
+    "BLOCKED_RESOURCE_TYPES": list,
+    "BLOCKED_DOMAINS": list,
+    "ALLOWED_DOMAINS": list,
     "ENABLE_ARCHIVING": bool,
     "MAX_ARCHIVE_FILES": int,
+    "ENABLE_DELTA_ARCHIVE": bool,
+    "ARCHIVE_KEYFRAME_INTERVAL": int,
+    "ENABLE_REFRESH_TIERS": bool,
+    "REFRESH_NEAR_TERM_DAYS": int,
+    "REFRESH_STABLE_INTERVAL": int,
+    "REFRESH_VOLATILITY_THRESHOLD": float,
+    "REFRESH_HISTORY_SNAPSHOTS": int,
+    "ENABLE_CAPTURE": bool,
+    "CAPTURE_COMPRESSION_LEVEL": int,
+    "ENABLE_PARQUET": bool,
+    "PARQUET_COMPRESSION": str,
+    "ENABLE_HISTORY_DB": bool,
+    "ENABLE_PACE": bool,
+    "PACE_LEAD_BUCKETS": list,
+    "ENABLE_ANALYSIS_CACHE": bool,
+    "ENABLE_STREAMING_ANALYSIS": bool,
+    "STREAMING_CHUNK_ROWS": int,
+    "STREAMING_MEDIAN_ACCURACY": float,
     "SHOW_PROGRESS": bool,
     "PROGRESS_INTERVAL": int,
 }
@@ -42,10 +89,10 @@ def _python_literal(value: Any) -> str:
     raise TypeError(f"Unsupported type for serialization: {type(value)!r}")
 
 
-def _read_config_module() -> Dict[str, Any]:
+def _read_config_module(config_file: Path = CONFIG_FILE) -> Dict[str, Any]:
     import importlib.util
 
-    spec = importlib.util.spec_from_file_location("scraper_config_runtime", CONFIG_FILE)
+    spec = importlib.util.spec_from_file_location("scraper_config_runtime", config_file)
     if spec is None or spec.loader is None:
         raise RuntimeError("Unable to load config module")
     module = importlib.util.module_from_spec(spec)
@@ -69,6 +116,33 @@ def _read_config_module() -> Dict[str, Any]:
     return payload
 
 
+def _list_end(text: str, start: int) -> int:
+    """Index just past the "]" closing the list literal that opens at text[start] (may span lines)."""
+    depth, quote, escaped, comment = 0, None, False, False
+    for index in range(start, len(text)):
+        char = text[index]
+        if comment:
+            comment = char != "\n"
+        elif quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "#":
+            comment = True
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    raise ValueError("Unterminated list literal")
+
+
 @dataclass
 class Replacement:
     key: str
@@ -79,14 +153,20 @@ class Replacement:
             rf"^(?P<prefix>\s*{self.key}\s*=\s*)(?P<value>.*?)(?P<comment>\s*#.*)?$",
             re.MULTILINE,
         )
+        match = pattern.search(text)
+        if not match:
+            raise KeyError(f"Unable to find config entry for {self.key}")
+
+        if match.group("value").startswith("["):
+            # Lists may be wrapped over several lines - replace everything up to the closing bracket
+            end = _list_end(text, match.start("value"))
+            return text[:match.start("value")] + self.literal + text[end:]
 
         def repl(match: re.Match[str]) -> str:
             prefix = match.group("prefix")
             comment = match.group("comment") or ""
             return f"{prefix}{self.literal}{comment}"
 
-        if not pattern.search(text):
-            raise KeyError(f"Unable to find config entry for {self.key}")
         return pattern.sub(repl, text, count=1)
 
 
@@ -99,6 +179,10 @@ def _build_replacements(update: Dict[str, Any]) -> Dict[str, Replacement]:
         if expected_type is list:
             if not isinstance(value, list):
                 raise TypeError(f"Expected list for {key}")
+        elif expected_type is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(f"Expected number for {key}")
+            value = float(value)
         elif not isinstance(value, expected_type):
             raise TypeError(f"Expected {expected_type.__name__} for {key}")
         replacements[key] = Replacement(key=key, literal=_python_literal(value))
@@ -110,15 +194,50 @@ def handle_get() -> None:
     print(json.dumps(payload, indent=2, default=str))
 
 
-def handle_set(payload: Dict[str, Any]) -> None:
+def handle_set(payload: Dict[str, Any], config_file: Path = CONFIG_FILE) -> None:
     replacements = _build_replacements(payload)
     if not replacements:
         return
-    original = CONFIG_FILE.read_text(encoding="utf-8")
+    original = config_file.read_text(encoding="utf-8")
     updated = original
     for replacement in replacements.values():
         updated = replacement.apply(updated)
-    CONFIG_FILE.write_text(updated, encoding="utf-8")
+    config_file.write_text(updated, encoding="utf-8")
+
+
+def handle_check() -> None:
+    """Set then get every key on a copy of config.py - each value must read back unchanged."""
+    import shutil
+    import tempfile
+
+    current = _read_config_module()
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / CONFIG_FILE.name
+        shutil.copy(CONFIG_FILE, copy)
+        for key, expected_type in ALLOWED_KEYS.items():
+            if key not in current:
+                failures.append(f"{key}: missing from config.py")
+                continue
+            # Lists also get a shorter value, so a value wrapped over several lines is replaced whole
+            values = [current[key][:1], current[key]] if expected_type is list else [current[key]]
+            for value in values:
+                try:
+                    handle_set({key: value}, copy)
+                    read_back = _read_config_module(copy)
+                except Exception as exc:  # noqa: BLE001 - report every broken key
+                    failures.append(f"{key}: {type(exc).__name__}: {exc}")
+                    shutil.copy(CONFIG_FILE, copy)
+                    break
+                if read_back[key] != value or any(read_back[k] != current[k] for k in current if k not in (key, "MODE_NAME")):
+                    failures.append(f"{key}: set {value!r} did not read back unchanged")
+                    shutil.copy(CONFIG_FILE, copy)
+                    break
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(ALLOWED_KEYS) - len(failures)}/{len(ALLOWED_KEYS)} keys round-trip")
+    if failures:
+        raise SystemExit(1)
 
 
 def main() -> None:
@@ -126,6 +245,7 @@ def main() -> None:
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     subparsers.add_parser("get")
+    subparsers.add_parser("check", help="Set then get every key on a copy of config.py")
     set_parser = subparsers.add_parser("set")
     set_parser.add_argument(
         "--env",
@@ -138,6 +258,9 @@ def main() -> None:
     if args.command == "get":
         handle_get()
         return
+    if args.command == "check":
+        handle_check()
+        return
 
     payload_env = os.environ.get(args.env)
     if not payload_env:
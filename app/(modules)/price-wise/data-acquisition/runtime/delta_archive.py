@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Delta-encoded archive of daily pricing snapshots.
+
+Consecutive snapshots mostly repeat the same (hotel, check-in, check-out)
+cells, so storing a full CSV copy per day wastes space and forces old
+history to be deleted. Each snapshot is stored as a delta against the
+previous one. Every ARCHIVE_KEYFRAME_INTERVAL snapshots a full copy
+(keyframe) is stored instead, so materializing any date replays at most that
+many deltas.
+
+A delta lists every row of the snapshot in its original order: changed or
+new rows in full (upsert), rows whose value fields are unchanged as their key
+plus the observation fields day_offset and scrape_timestamp (keep). Rows not
+listed disappeared. Materializing a snapshot gives back exactly the rows of
+the source CSV, in the same order - plain copies can be removed safely.
+
+Layout:
+    archive/
+    ├── pricing_data_YYYYMMDD.csv        # recent plain copies for the app (MAX_ARCHIVE_FILES)
+    └── history/
+        ├── manifest.json
+        ├── full_YYYYMMDD.csv.gz         # keyframes
+        └── delta_YYYYMMDD.csv.gz        # _op (upsert/keep) + CSV columns, in row order
+
+Usage:
+    python delta_archive.py --import                 # store archive/pricing_data_*.csv not yet in history
+    python delta_archive.py --list
+    python delta_archive.py --materialize 20250315   # -> archive/pricing_data_20250315.csv
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+
+# Import configuration
+import config
+from progress_journal import date_key
+
+# Fields describing when a row was observed rather than what was observed
+OBSERVATION_FIELDS = ("day_offset", "scrape_timestamp")
+
+UPSERT = "upsert"
+KEEP = "keep"
+OP_FIELD = "_op"
+KEY_FIELDS = ("hotel_slug", "check_in_date", "check_out_date")
+
+
+def _row_key(row):
+    return date_key(row["hotel_slug"], row["check_in_date"], row["check_out_date"])
+
+
+def read_snapshot_csv(csv_path):
+    """Read a pricing CSV. Returns (fieldnames, rows) - rows without a key are dropped."""
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = [row for row in reader if row.get("hotel_slug") and row.get("check_in_date") and row.get("check_out_date")]
+        return list(reader.fieldnames or []), rows
+
+
+class DeltaArchive:
+    """Keyframes plus per-snapshot deltas, with a JSON manifest in snapshot order."""
+
+    def __init__(self, root=None, keyframe_interval=None, compression_level=None):
+        self.root = root or config.DELTA_ARCHIVE_DIR
+        self.keyframe_interval = max(1, keyframe_interval or config.ARCHIVE_KEYFRAME_INTERVAL)
+        self.compression_level = config.CAPTURE_COMPRESSION_LEVEL if compression_level is None else compression_level
+        self.manifest_path = self.root / "manifest.json"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return {"snapshots": []}
+        with self.manifest_path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        tmp_path.replace(self.manifest_path)
+
+    def _write_gzip_csv(self, path, fieldnames, rows):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(gzip.compress(buffer.getvalue().encode("utf-8"), compresslevel=self.compression_level))
+        tmp_path.replace(path)
+        return path.stat().st_size
+
+    def _read_gzip_csv(self, path):
+        text = gzip.decompress(path.read_bytes()).decode("utf-8")
+        return list(csv.DictReader(io.StringIO(text)))
+
+    def dates(self):
+        """Stored snapshot dates (YYYYMMDD), oldest first."""
+        return [entry["date"] for entry in self.manifest["snapshots"]]
+
+    def append(self, csv_path, date_str):
+        """
+        Store a snapshot CSV for date_str (YYYYMMDD).
+
+        Returns:
+            dict: the manifest entry, or None if the date is already stored
+        """
+        snapshots = self.manifest["snapshots"]
+        if date_str in self.dates():
+            return None
+        if snapshots and date_str < snapshots[-1]["date"]:
+            raise ValueError(f"snapshot {date_str} is older than the latest stored snapshot {snapshots[-1]['date']}")
+
+        fieldnames, rows = read_snapshot_csv(csv_path)
+        entry = {
+            "date": date_str,
+            "fieldnames": fieldnames,
+            "rows": len(rows),
+            "raw_bytes": csv_path.stat().st_size,
+        }
+
+        since_keyframe = 0
+        for previous in reversed(snapshots):
+            if previous["kind"] == "full":
+                break
+            since_keyframe += 1
+        keyframe = (
+            not snapshots
+            or since_keyframe + 1 >= self.keyframe_interval
+            or snapshots[-1]["fieldnames"] != fieldnames
+        )
+
+        if keyframe:
+            entry["kind"] = "full"
+            entry["file"] = f"full_{date_str}.csv.gz"
+            entry["stored_bytes"] = self._write_gzip_csv(self.root / entry["file"], fieldnames, rows)
+        else:
+            previous = snapshots[-1]
+            _, previous_rows = self.materialize(previous["date"])
+            changes = self._diff(previous_rows, rows, fieldnames)
+            entry["kind"] = "delta"
+            entry["file"] = f"delta_{date_str}.csv.gz"
+            entry["changed"] = sum(1 for row in changes if row[OP_FIELD] == UPSERT)
+            entry["deleted"] = len({_row_key(row) for row in previous_rows} - {_row_key(row) for row in rows})
+            entry["stored_bytes"] = self._write_gzip_csv(self.root / entry["file"], [OP_FIELD] + fieldnames, changes)
+
+        snapshots.append(entry)
+        self._save_manifest()
+        return entry
+
+    def _diff(self, previous_rows, rows, fieldnames):
+        """Every row in order: keep (key + observation fields) when its values match the previous snapshot, else upsert."""
+        value_fields = [name for name in fieldnames if name not in OBSERVATION_FIELDS]
+        kept_fields = KEY_FIELDS + tuple(name for name in OBSERVATION_FIELDS if name in fieldnames)
+        previous_by_key = {_row_key(row): row for row in previous_rows}
+        seen = set()
+        changes = []
+        for row in rows:
+            key = _row_key(row)
+            previous = previous_by_key.get(key) if key not in seen else None
+            seen.add(key)
+            if previous is not None and all(previous.get(name, "") == row.get(name, "") for name in value_fields):
+                changes.append({OP_FIELD: KEEP, **{name: row[name] for name in kept_fields}})
+            else:
+                changes.append({OP_FIELD: UPSERT, **row})
+        return changes
+
+    def materialize(self, date_str):
+        """
+        Rebuild the snapshot stored for date_str.
+
+        Returns:
+            tuple: (fieldnames, rows)
+        """
+        snapshots = self.manifest["snapshots"]
+        index = next((i for i, entry in enumerate(snapshots) if entry["date"] == date_str), None)
+        if index is None:
+            raise KeyError(f"no archived snapshot for {date_str}")
+        start = index
+        while snapshots[start]["kind"] != "full":
+            start -= 1
+
+        rows = self._read_gzip_csv(self.root / snapshots[start]["file"])
+        for entry in snapshots[start + 1:index + 1]:
+            observed = [name for name in OBSERVATION_FIELDS if name in entry["fieldnames"]]
+            previous_by_key = {_row_key(row): row for row in rows}
+            rows = []
+            for change in self._read_gzip_csv(self.root / entry["file"]):
+                if change.pop(OP_FIELD) == KEEP:
+                    # Values from the previous snapshot, observation fields from this one
+                    row = dict(previous_by_key[_row_key(change)])
+                    for name in observed:
+                        row[name] = change[name]
+                    change = row
+                rows.append(change)
+        return snapshots[index]["fieldnames"], rows
+
+    def write_csv(self, date_str, output_path):
+        """Materialize a snapshot as a plain pricing CSV."""
+        fieldnames, rows = self.materialize(date_str)
+        with output_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def summary(self):
+        """One-line summary for console output."""
+        snapshots = self.manifest["snapshots"]
+        keyframes = sum(1 for entry in snapshots if entry["kind"] == "full")
+        raw_mb = sum(entry["raw_bytes"] for entry in snapshots) / (1024 * 1024)
+        stored_mb = sum(entry["stored_bytes"] for entry in snapshots) / (1024 * 1024)
+        return (
+            f"{len(snapshots)} snapshots ({keyframes} keyframes, {len(snapshots) - keyframes} deltas), "
+            f"{stored_mb:.2f} MB stored for {raw_mb:.1f} MB of CSV"
+        )
+
+
+def import_archive_csvs(archive, archive_dir=None):
+    """
+    Store every archive/pricing_data_*.csv not yet in the history, oldest first.
+
+    Returns:
+        list: (csv_path, manifest entry) for each snapshot stored
+    """
+    archive_dir = archive_dir or config.ARCHIVE_DIR
+    stored = []
+    for csv_path in sorted(archive_dir.glob("pricing_data_*.csv")):
+        date_str = csv_path.stem.rsplit("_", 1)[-1]
+        try:
+            entry = archive.append(csv_path, date_str)
+        except ValueError as e:
+            print(f"Skipped {csv_path.name}: {e}")
+            continue
+        if entry is not None:
+            stored.append((csv_path, entry))
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the delta-encoded pricing archive")
+    parser.add_argument("--import", dest="import_csvs", action="store_true", help="Store archive/pricing_data_*.csv snapshots not yet in the history")
+    parser.add_argument("--list", action="store_true", help="List stored snapshots")
+    parser.add_argument("--materialize", metavar="YYYYMMDD", help="Rebuild a snapshot as a plain CSV")
+    parser.add_argument("--output", help="Output path for --materialize (default: archive/pricing_data_YYYYMMDD.csv)")
+    args = parser.parse_args()
+
+    archive = DeltaArchive()
+
+    if args.import_csvs:
+        for csv_path, entry in import_archive_csvs(archive):
+            print(f"Stored {csv_path.name} as {entry['kind']} ({entry['stored_bytes'] / 1024:.1f} KB)")
+        print(archive.summary())
+    elif args.list:
+        for entry in archive.manifest["snapshots"]:
+            detail = f"{entry.get('changed', entry['rows'])} rows" + (f", {entry['deleted']} deleted" if entry["kind"] == "delta" else "")
+            print(f"{entry['date']}  {entry['kind']:<5}  {detail:<24} {entry['stored_bytes'] / 1024:8.1f} KB")
+        print(archive.summary())
+    elif args.materialize:
+        output = Path(args.output) if args.output else config.ARCHIVE_DIR / f"pricing_data_{args.materialize}.csv"
+        try:
+            rows = archive.write_csv(args.materialize, output)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            raise SystemExit(1)
+        print(f"Materialized {args.materialize}: {rows} rows -> {output}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
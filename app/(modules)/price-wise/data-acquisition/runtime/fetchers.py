@@ -0,0 +1,280 @@
+"""
+Pluggable page fetch engines.
+
+The b_rooms_available_and_soldout payload is present in the initial HTML, so
+most checks do not need a full browser. Two engines share one interface
+(`await engine.fetch(url) -> html`):
+
+- HttpFetcher: pooled async HTTP client that keeps cookies, headers and
+  connections alive across checks.
+- BrowserFetcher: the Playwright path (browser pool + readiness wait).
+
+FallbackFetcher tries engines in order and only falls through to the next one
+when a response is blocked, fails, or is missing the room payload. An engine
+that is not the last one is dropped for the rest of the run once its hit rate
+falls below HTTP_MIN_HIT_RATE or after HTTP_MAX_CONSECUTIVE_BLOCKS blocks in a
+row, so a site that refuses plain HTTP does not cost every check a wasted
+attempt. Per-engine hit rates and latencies are recorded for the run log.
+
+Every fetch() takes one token from the shared rate limiter and reports only its
+final outcome back to it. A block of the first engine that the fallback
+recovers from says the engine lacks something the site wants, not that the
+site is throttling, so it does not slow the run down.
+"""
+import asyncio
+import time
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Import configuration
+import config
+from browser_pool import BlockedPageError, is_block_page
+from readiness import wait_until_ready
+
+try:
+    import aiohttp
+except ImportError:  # HTTP engine is optional - browser-only runs don't need it
+    aiohttp = None
+
+# Markers showing the page carries the data extract_pricing_data parses first
+ROOM_PAYLOAD_MARKERS = ("b_rooms_available_and_soldout", "b_all_rooms")
+
+
+class FetchError(Exception):
+    """Raised when an engine could not produce usable HTML."""
+
+
+class MissingPayloadError(FetchError):
+    """Raised when the HTML was fetched but does not contain the room payload."""
+
+
+def has_room_payload(html):
+    """True if the HTML contains the embedded room JSON."""
+    return bool(html) and any(marker in html for marker in ROOM_PAYLOAD_MARKERS)
+
+
+class EngineStats:
+    """Outcome counts and latencies for one engine."""
+
+    def __init__(self):
+        self.outcomes = {}
+        self.latencies_ms = []
+
+    def record(self, outcome, elapsed_ms):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.latencies_ms.append(elapsed_ms)
+
+    def to_dict(self):
+        attempts = len(self.latencies_ms)
+        hits = self.outcomes.get("ok", 0)
+        ordered = sorted(self.latencies_ms)
+        return {
+            "attempts": attempts,
+            "hits": hits,
+            "hit_rate": round(hits / attempts * 100, 1) if attempts else 0.0,
+            "outcomes": dict(self.outcomes),
+            "mean_ms": round(sum(ordered) / attempts, 1) if attempts else None,
+            "p50_ms": round(ordered[attempts // 2], 1) if attempts else None,
+            "p95_ms": round(ordered[min(attempts - 1, int(attempts * 0.95))], 1) if attempts else None,
+        }
+
+
+class HttpFetcher:
+    """Plain HTTP engine backed by a pooled aiohttp session."""
+
+    name = "http"
+
+    def __init__(self, user_agent=None, pool_size=None, timeout=None):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is not installed - HTTP fetch engine unavailable")
+        self.user_agent = user_agent
+        self.pool_size = pool_size or config.HTTP_POOL_SIZE
+        self.timeout = timeout or config.HTTP_TIMEOUT
+        self._session = None
+
+    def _new_session(self, connector, connector_owner=True):
+        return aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=connector_owner,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            cookie_jar=aiohttp.CookieJar(),
+            headers={
+                "User-Agent": self.user_agent or "Mozilla/5.0",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-GB,en;q=0.9",
+            },
+        )
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = self._new_session(aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300))
+        return self._session
+
+    async def fetch(self, url, fresh=False):
+        session = self._get_session()
+        if not fresh:
+            return await self._fetch(session, url)
+        # Retry after a failure - a throwaway session with an empty cookie jar, so cookies the site
+        # may have tied to a flagged session are not sent. The pooled session (and the cookies of
+        # every other in-flight check) is left alone; only its connections are shared.
+        async with self._new_session(session.connector, connector_owner=False) as fresh_session:
+            return await self._fetch(fresh_session, url)
+
+    async def _fetch(self, session, url):
+        async with session.get(url) as response:
+            html = await response.text()
+            if response.status in (403, 429) or is_block_page(html):
+                raise BlockedPageError(f"HTTP {response.status} block page")
+            if response.status >= 400:
+                raise FetchError(f"HTTP {response.status}")
+        if not has_room_payload(html):
+            raise MissingPayloadError("Room payload missing from HTTP response")
+        return html
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class BrowserFetcher:
+    """Playwright engine: leases a pooled context and waits for page readiness."""
+
+    name = "browser"
+
+    def __init__(self, pool, readiness_stats=None):
+        self.pool = pool
+        self.readiness_stats = readiness_stats
+
+    async def fetch(self, url, fresh=False):
+        async with self.pool.lease(fresh=fresh) as lease:
+            page = await lease.context.new_page()
+            try:
+                await page.goto(url, timeout=config.BROWSER_TIMEOUT, wait_until="domcontentloaded")
+
+                # Return as soon as the data we parse is present (bounded by READY_DEADLINE_MS)
+                await wait_until_ready(page, stats=self.readiness_stats)
+
+                html = await page.content()
+            finally:
+                await page.close()
+
+            if is_block_page(html):
+                # Recycle the context and browser so the next check gets a clean fingerprint
+                lease.mark_blocked()
+                raise BlockedPageError("Block page served instead of property page")
+        return html
+
+    async def close(self):
+        await self.pool.close()
+
+
+class FallbackFetcher:
+    """
+    Try each engine in order, falling through on block, error or missing payload.
+
+    Args:
+        min_attempts / min_hit_rate: Circuit breaker - an engine other than the last is dropped once
+            it has had min_attempts attempts and its hit rate (%) is below min_hit_rate
+        max_consecutive_blocks: ... or once it was blocked this many times in a row
+    """
+
+    def __init__(self, engines, rate_limiter=None, min_attempts=None, min_hit_rate=None, max_consecutive_blocks=None):
+        self.engines = list(engines)
+        self.rate_limiter = rate_limiter
+        self.min_attempts = config.HTTP_MIN_ATTEMPTS if min_attempts is None else min_attempts
+        self.min_hit_rate = config.HTTP_MIN_HIT_RATE if min_hit_rate is None else min_hit_rate
+        self.max_consecutive_blocks = config.HTTP_MAX_CONSECUTIVE_BLOCKS if max_consecutive_blocks is None else max_consecutive_blocks
+        self.stats = {engine.name: EngineStats() for engine in self.engines}
+        self.consecutive_blocks = {engine.name: 0 for engine in self.engines}
+        self.disabled = {}  # Engine name -> why it was dropped for the rest of the run
+
+    def _check_breaker(self, engine):
+        """Drop an engine (never the last one) that keeps getting blocked or whose hit rate is too low."""
+        if engine.name in self.disabled or engine is self.engines[-1]:
+            return
+        stats = self.stats[engine.name].to_dict()
+        if self.consecutive_blocks[engine.name] >= self.max_consecutive_blocks:
+            self.disabled[engine.name] = f"blocked {self.consecutive_blocks[engine.name]} times in a row"
+        elif stats["attempts"] >= self.min_attempts and stats["hit_rate"] < self.min_hit_rate:
+            self.disabled[engine.name] = f"hit rate {stats['hit_rate']:.0f}% after {stats['attempts']} attempts"
+        else:
+            return
+        self.engines.remove(engine)
+        print(f"  Fetch engine '{engine.name}' disabled for this run ({self.disabled[engine.name]})")
+
+    async def fetch(self, url, fresh=False):
+        """
+        Fetch a page with the first engine that returns usable HTML.
+
+        fresh=True asks each engine for a clean session (new browser context,
+        throwaway HTTP session with its own cookie jar) - used when retrying a failed check.
+
+        Returns:
+            tuple: (html, engine name)
+
+        Raises the last engine's error if every engine failed.
+        """
+        last_error, outcome = None, None
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        engines = list(self.engines)  # The breaker may drop an engine while this fetch is running
+        for engine in engines:
+            start = time.perf_counter()
+            try:
+                html = await engine.fetch(url, fresh=fresh)
+            except BlockedPageError as e:
+                outcome, last_error = "blocked", e
+            except MissingPayloadError as e:
+                outcome, last_error = "missing_payload", e
+            except (asyncio.TimeoutError, PlaywrightTimeoutError) as e:
+                outcome, last_error = "timeout", e
+            except Exception as e:
+                outcome, last_error = "error", e
+            else:
+                self.stats[engine.name].record("ok", (time.perf_counter() - start) * 1000)
+                self.consecutive_blocks[engine.name] = 0
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_success()
+                return html, engine.name
+
+            self.stats[engine.name].record(outcome, (time.perf_counter() - start) * 1000)
+            self.consecutive_blocks[engine.name] = self.consecutive_blocks[engine.name] + 1 if outcome == "blocked" else 0
+            self._check_breaker(engine)
+
+        # Every engine failed - only now is it a sign of throttling. A missing payload is a
+        # page-shape problem, not throttling.
+        if self.rate_limiter is not None and outcome != "missing_payload":
+            self.rate_limiter.record_failure(outcome)
+        raise last_error
+
+    def to_dict(self):
+        engines = {name: stats.to_dict() for name, stats in self.stats.items()}
+        for name, reason in self.disabled.items():
+            engines[name]["disabled"] = reason
+        return engines
+
+    def summary(self):
+        """One-line summary for console output."""
+        parts = []
+        for name, stats in self.to_dict().items():
+            if stats["attempts"]:
+                disabled = ", disabled" if "disabled" in stats else ""
+                parts.append(f"{name} {stats['hits']}/{stats['attempts']} hits ({stats['hit_rate']:.0f}%, p50 {stats['p50_ms']:.0f} ms{disabled})")
+        return ", ".join(parts) if parts else "no fetches"
+
+    async def close(self):
+        for engine in self.engines:
+            await engine.close()
+
+
+def build_fetcher(pool, user_agent=None, readiness_stats=None, rate_limiter=None):
+    """Build the engine chain selected by config.FETCH_ENGINE."""
+    engines = []
+    if config.FETCH_ENGINE == "http":
+        if aiohttp is None:
+            print("Warning: aiohttp not installed - falling back to browser-only fetching")
+        else:
+            engines.append(HttpFetcher(user_agent=user_agent))
+    engines.append(BrowserFetcher(pool, readiness_stats=readiness_stats))
+    return FallbackFetcher(engines, rate_limiter=rate_limiter)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite history of every scrape, for cross-snapshot queries.
+
+One row per (hotel, check-in, check-out, scrape date). The table is
+clustered on (hotel_slug, check_in_date, scrape_date, check_out_date), so
+the history of one cell is a single index range scan no matter how many
+snapshots are stored. A second index on (hotel_slug, lead_days) serves
+lead-time curves.
+
+Each scrape run re-ingests today's pricing_data.csv. Archive snapshots (plain
+copies and the delta history) are ingested once - re-running is a no-op.
+
+Usage:
+    python history_db.py --ingest-archive
+    python history_db.py --cell ukanyi-luxury-villa-hoedspruit 2025-12-24 --days 60
+    python history_db.py --lead-time ukanyi-luxury-villa-hoedspruit 30
+"""
+import argparse
+import csv
+import sqlite3
+from datetime import date, datetime, timedelta
+
+# Import configuration
+import config
+from delta_archive import DeltaArchive
+
+COLUMNS = (
+    ("scrape_date", "TEXT NOT NULL"),
+    ("hotel_slug", "TEXT NOT NULL"),
+    ("check_in_date", "TEXT NOT NULL"),
+    ("check_out_date", "TEXT NOT NULL"),
+    ("hotel_name", "TEXT"),
+    ("nights", "INTEGER"),
+    ("lead_days", "INTEGER"),
+    ("availability", "TEXT"),
+    ("total_price", "REAL"),
+    ("original_price", "REAL"),
+    ("price_per_night", "REAL"),
+    ("has_discount", "INTEGER"),
+    ("discount_percentage", "REAL"),
+    ("rating_score", "REAL"),
+    ("review_count", "INTEGER"),
+    ("total_room_types", "INTEGER"),
+    ("available_room_types", "INTEGER"),
+    ("sold_out_room_types", "INTEGER"),
+    ("property_occupancy_rate", "REAL"),
+    ("min_room_price", "REAL"),
+    ("max_room_price", "REAL"),
+    ("avg_room_price", "REAL"),
+    ("stale_since", "TEXT"),
+    ("scrape_timestamp", "TEXT"),
+)
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS prices (
+    {", ".join(f"{name} {kind}" for name, kind in COLUMNS)},
+    PRIMARY KEY (hotel_slug, check_in_date, scrape_date, check_out_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_prices_lead ON prices (hotel_slug, lead_days);
+CREATE TABLE IF NOT EXISTS snapshots (
+    scrape_date TEXT PRIMARY KEY,
+    source TEXT,
+    rows INTEGER,
+    ingested_at TEXT
+);
+"""
+
+
+def _number(value, kind):
+    if value is None or value == "":
+        return None
+    try:
+        return kind(float(value))
+    except ValueError:
+        return None
+
+
+def _flag(value):
+    if value is None or value == "":
+        return None
+    return 1 if str(value).strip().lower() == "true" else 0
+
+
+def _text(value):
+    return None if value is None or value == "" else str(value)
+
+
+def row_values(row, scrape_date):
+    """Column values for a pricing row (CSV strings or parser values) scraped on scrape_date."""
+    check_in = str(row["check_in_date"])[:10]
+    return (
+        scrape_date,
+        row["hotel_slug"],
+        check_in,
+        str(row["check_out_date"])[:10],
+        _text(row.get("hotel_name")),
+        _number(row.get("nights"), int),
+        (date.fromisoformat(check_in) - date.fromisoformat(scrape_date)).days,
+        _text(row.get("availability")),
+        _number(row.get("total_price"), float),
+        _number(row.get("original_price"), float),
+        _number(row.get("price_per_night"), float),
+        _flag(row.get("has_discount")),
+        _number(row.get("discount_percentage"), float),
+        _number(row.get("rating_score"), float),
+        _number(row.get("review_count"), int),
+        _number(row.get("total_room_types"), int),
+        _number(row.get("available_room_types"), int),
+        _number(row.get("sold_out_room_types"), int),
+        _number(row.get("property_occupancy_rate"), float),
+        _number(row.get("min_room_price"), float),
+        _number(row.get("max_room_price"), float),
+        _number(row.get("avg_room_price"), float),
+        _text(row.get("stale_since")),
+        _text(row.get("scrape_timestamp")),
+    )
+
+
+def _iso_date(date_str):
+    """YYYYMMDD (archive file names) or YYYY-MM-DD -> YYYY-MM-DD."""
+    return date_str if "-" in date_str else f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
+
+
+class HistoryDB:
+    """SQLite store of all scraped rows with time-series queries."""
+
+    def __init__(self, path=None):
+        self.path = path or config.HISTORY_DB_FILE
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scrape_dates(self):
+        """Ingested scrape dates (YYYY-MM-DD), oldest first."""
+        return [r[0] for r in self.conn.execute("SELECT scrape_date FROM snapshots ORDER BY scrape_date")]
+
+    def ingest_rows(self, rows, scrape_date, source="", replace=False):
+        """
+        Store one snapshot's rows in a single transaction.
+
+        Args:
+            scrape_date: "YYYY-MM-DD" or "YYYYMMDD"
+            replace: Replace a snapshot that is already stored (e.g. today's growing CSV)
+
+        Returns:
+            int: Rows stored, or 0 if the snapshot was already stored and replace is False
+        """
+        scrape_date = _iso_date(scrape_date)
+        values = [row_values(row, scrape_date) for row in rows if row.get("hotel_slug") and row.get("check_in_date") and row.get("check_out_date")]
+        with self.conn:
+            if self.conn.execute("SELECT 1 FROM snapshots WHERE scrape_date = ?", (scrape_date,)).fetchone():
+                if not replace:
+                    return 0
+                self.conn.execute("DELETE FROM prices WHERE scrape_date = ?", (scrape_date,))
+            placeholders = ", ".join("?" * len(COLUMN_NAMES))
+            self.conn.executemany(f"INSERT OR REPLACE INTO prices ({', '.join(COLUMN_NAMES)}) VALUES ({placeholders})", values)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshots (scrape_date, source, rows, ingested_at) VALUES (?, ?, ?, ?)",
+                (scrape_date, source, len(values), datetime.now().isoformat()),
+            )
+        return len(values)
+
+    def ingest_csv(self, csv_path, scrape_date, replace=False):
+        """Store a pricing CSV as the snapshot for scrape_date."""
+        with csv_path.open("r", newline="", encoding="utf-8") as f:
+            return self.ingest_rows(csv.DictReader(f), scrape_date, source=csv_path.name, replace=replace)
+
+    def ingest_archive(self, archive_dir=None):
+        """
+        Store archive snapshots not ingested yet: plain CSV copies, then dates
+        only kept in the delta history.
+
+        Returns:
+            list: (scrape_date, rows) for each snapshot stored
+        """
+        archive_dir = archive_dir or config.ARCHIVE_DIR
+        stored = set(self.scrape_dates())
+        ingested = []
+        for csv_path in sorted(archive_dir.glob("pricing_data_*.csv")):
+            scrape_date = _iso_date(csv_path.stem.rsplit("_", 1)[-1])
+            if scrape_date not in stored:
+                ingested.append((scrape_date, self.ingest_csv(csv_path, scrape_date)))
+                stored.add(scrape_date)
+
+        history_dir = archive_dir / config.DELTA_ARCHIVE_DIR.name
+        if (history_dir / "manifest.json").exists():
+            archive = DeltaArchive(history_dir)
+            for date_str in archive.dates():
+                scrape_date = _iso_date(date_str)
+                if scrape_date not in stored:
+                    _, rows = archive.materialize(date_str)
+                    ingested.append((scrape_date, self.ingest_rows(rows, scrape_date, source=f"history/{date_str}")))
+                    stored.add(scrape_date)
+        return sorted(ingested)
+
+    def cell_history(self, hotel_slug, check_in_date, check_out_date=None, start=None, end=None, last_days=None):
+        """
+        Time series of one stay across snapshots, oldest first.
+
+        Args:
+            check_out_date: Optional - otherwise every stay length checking in that day
+            start / end: Inclusive scrape date bounds (YYYY-MM-DD)
+            last_days: Only snapshots from the last N days (overrides start)
+        """
+        if last_days is not None:
+            start = (date.today() - timedelta(days=last_days)).isoformat()
+        query = "SELECT * FROM prices WHERE hotel_slug = ? AND check_in_date = ?"
+        params = [hotel_slug, str(check_in_date)[:10]]
+        if start:
+            query += " AND scrape_date >= ?"
+            params.append(str(start)[:10])
+        if end:
+            query += " AND scrape_date <= ?"
+            params.append(str(end)[:10])
+        if check_out_date:
+            query += " AND check_out_date = ?"
+            params.append(str(check_out_date)[:10])
+        query += " ORDER BY scrape_date, check_out_date"
+        return [dict(r) for r in self.conn.execute(query, params)]
+
+    def lead_time_curve(self, hotel_slug, lead_days, start=None, end=None):
+        """Rows observed exactly lead_days before check-in, by check-in date (optionally bounded)."""
+        query = "SELECT * FROM prices WHERE hotel_slug = ? AND lead_days = ?"
+        params = [hotel_slug, int(lead_days)]
+        if start:
+            query += " AND check_in_date >= ?"
+            params.append(str(start)[:10])
+        if end:
+            query += " AND check_in_date <= ?"
+            params.append(str(end)[:10])
+        query += " ORDER BY check_in_date, check_out_date"
+        return [dict(r) for r in self.conn.execute(query, params)]
+
+    def snapshot(self, scrape_date, hotel_slug=None):
+        """All rows of one scrape date (optionally one hotel)."""
+        query = "SELECT * FROM prices WHERE scrape_date = ?"
+        params = [_iso_date(scrape_date)]
+        if hotel_slug:
+            query += " AND hotel_slug = ?"
+            params.append(hotel_slug)
+        return [dict(r) for r in self.conn.execute(query + " ORDER BY hotel_slug, check_in_date, check_out_date", params)]
+
+    def summary(self):
+        """One-line summary for console output."""
+        snapshots, rows = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM snapshots").fetchone()
+        return f"{snapshots} snapshots, {rows} rows in {self.path.name}"
+
+
+def _print_rows(rows):
+    for r in rows:
+        price = f"R {r['total_price']:,.0f}" if r["total_price"] is not None else "-"
+        stale = f" (carried from {r['stale_since']})" if r["stale_since"] else ""
+        print(f"  {r['scrape_date']}  {r['check_in_date']} -> {r['check_out_date']}  lead {r['lead_days']:>3}d  "
+              f"{(r['availability'] or ''):<10} {price:>12}{stale}")
+    print(f"{len(rows)} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the pricing history database")
+    parser.add_argument("--ingest-archive", action="store_true", help="Ingest archive snapshots not yet in the database")
+    parser.add_argument("--cell", nargs=2, metavar=("HOTEL_SLUG", "CHECK_IN"), help="Price/availability history of one check-in date")
+    parser.add_argument("--days", type=int, default=None, help="With --cell: only the last N days of snapshots")
+    parser.add_argument("--lead-time", nargs=2, metavar=("HOTEL_SLUG", "DAYS"), help="Rows observed N days before check-in")
+    args = parser.parse_args()
+
+    with HistoryDB() as db:
+        if args.ingest_archive:
+            for scrape_date, rows in db.ingest_archive():
+                print(f"Ingested {scrape_date}: {rows} rows")
+            print(db.summary())
+        elif args.cell:
+            _print_rows(db.cell_history(args.cell[0], args.cell[1], last_days=args.days))
+        elif args.lead_time:
+            _print_rows(db.lead_time_curve(args.lead_time[0], args.lead_time[1]))
+        else:
+            parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
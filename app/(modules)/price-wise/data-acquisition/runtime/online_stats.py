@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Per-group online aggregators for bounded-memory analysis.
+
+Values arrive a chunk at a time as (group code, value) arrays; each aggregator
+keeps a fixed amount of state per group, whatever the number of rows:
+
+- RunningStats: count, mean, sample variance, min and max. Each chunk's
+  moments are merged into the running ones with the parallel form of
+  Welford's update (Chan et al.), which stays accurate for long streams.
+- QuantileSketch: log-bucket quantile sketch (DDSketch) - quantiles within a
+  fixed relative error, buckets bounded by the value range.
+- ValueCounts: occurrences per distinct value, for few-valued columns such
+  as room-type counts.
+
+Group codes are 0..n-1; rows with a negative code (no group) are skipped.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def _grow(array, size, fill):
+    if len(array) >= size:
+        return array
+    return np.concatenate([array, np.full(size - len(array), fill, dtype=array.dtype)])
+
+
+def _selected(codes, values, mask):
+    """Codes and values of rows in mask with a group and a value."""
+    values = np.asarray(values, dtype=float)
+    keep = (codes >= 0) & ~np.isnan(values)
+    if mask is not None:
+        keep &= np.asarray(mask, dtype=bool)
+    return codes[keep], values[keep]
+
+
+def _add_pair_counts(stores, codes, keys):
+    """stores[code][key] += occurrences of each (code, key) pair."""
+    if not len(codes):
+        return
+    pairs = pd.DataFrame({'code': codes, 'key': keys}).value_counts(sort=False)
+    for (code, key), count in pairs.items():
+        store = stores[code]
+        store[key] = store.get(key, 0) + int(count)
+
+
+class RunningStats:
+    """Count, mean, sample variance, min and max per group, updated a chunk at a time."""
+
+    def __init__(self):
+        self.count = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+
+    def resize(self, groups):
+        self.count = _grow(self.count, groups, 0.0)
+        self.mean = _grow(self.mean, groups, 0.0)
+        self.m2 = _grow(self.m2, groups, 0.0)
+        self.min = _grow(self.min, groups, np.inf)
+        self.max = _grow(self.max, groups, -np.inf)
+
+    def update(self, codes, values, mask=None):
+        """Add values (NaN skipped) of the rows in mask."""
+        codes, values = _selected(codes, values, mask)
+        if not len(values):
+            return
+        groups = len(self.count)
+        n = np.bincount(codes, minlength=groups).astype(float)
+        chunk_mean = np.divide(np.bincount(codes, values, groups), n, out=np.zeros(groups), where=n > 0)
+        chunk_m2 = np.bincount(codes, (values - chunk_mean[codes]) ** 2, groups)
+
+        total = self.count + n
+        share = np.divide(n, total, out=np.zeros(groups), where=total > 0)
+        delta = chunk_mean - self.mean
+        self.mean += delta * share
+        self.m2 += chunk_m2 + delta ** 2 * self.count * share
+        self.count = total
+        np.minimum.at(self.min, codes, values)
+        np.maximum.at(self.max, codes, values)
+
+    def means(self):
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def stds(self):
+        """Sample standard deviation (ddof=1), NaN for groups with fewer than two values."""
+        return np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan)
+
+    def mins(self):
+        return np.where(self.count > 0, self.min, np.nan)
+
+    def maxs(self):
+        return np.where(self.count > 0, self.max, np.nan)
+
+
+class QuantileSketch:
+    """
+    Quantiles per group within a relative error of `accuracy`.
+
+    A value v > 0 is counted in bucket ceil(log_gamma(v)), gamma = (1 + accuracy) / (1 - accuracy);
+    the bucket's representative value is within `accuracy` of every value in it. Values <= 0 are
+    counted as 0. A group holds at most one bucket per factor gamma between its smallest and
+    largest value (about 920 buckets for 100 to 1,000,000 at 0.5%).
+    """
+
+    def __init__(self, accuracy):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.zeros = np.zeros(0, dtype=np.int64)
+        self.buckets = []
+
+    def resize(self, groups):
+        self.zeros = _grow(self.zeros, groups, 0)
+        self.buckets.extend({} for _ in range(groups - len(self.buckets)))
+
+    def update(self, codes, values, mask=None):
+        """Add values (NaN skipped) of the rows in mask."""
+        codes, values = _selected(codes, values, mask)
+        positive = values > 0
+        self.zeros += np.bincount(codes[~positive], minlength=len(self.zeros))
+        keys = np.ceil(np.log(values[positive]) / self.log_gamma).astype(np.int64)
+        _add_pair_counts(self.buckets, codes[positive], keys)
+
+    def bucket_count(self):
+        return sum(len(buckets) for buckets in self.buckets)
+
+    def _value_at(self, group, rank):
+        """Estimate of the value with 0-based rank in the group."""
+        if rank < self.zeros[group]:
+            return 0.0
+        seen = self.zeros[group]
+        for key in sorted(self.buckets[group]):
+            seen += self.buckets[group][key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return np.nan
+
+    def medians(self, lower=None, upper=None):
+        """
+        Median per group like np.median (mean of the two middle values for even counts), NaN without values.
+
+        Args:
+            lower / upper: Exact per-group min and max - estimates are clamped to them
+        """
+        result = np.full(len(self.buckets), np.nan)
+        for group, buckets in enumerate(self.buckets):
+            n = int(self.zeros[group]) + sum(buckets.values())
+            if not n:
+                continue
+            middle = np.array([self._value_at(group, (n - 1) // 2), self._value_at(group, n // 2)])
+            if lower is not None:
+                middle = np.clip(middle, lower[group], upper[group])
+            result[group] = middle.mean()
+        return result
+
+
+class ValueCounts:
+    """Occurrences of each distinct value per group (for columns with few distinct values)."""
+
+    def __init__(self):
+        self.counts = []
+
+    def resize(self, groups):
+        self.counts.extend({} for _ in range(groups - len(self.counts)))
+
+    def update(self, codes, values, mask=None):
+        """Count values (NaN skipped) of the rows in mask."""
+        codes, values = _selected(codes, values, mask)
+        _add_pair_counts(self.counts, codes, values)
+
+    def values(self, group):
+        """(distinct values, occurrences) of a group as float arrays."""
+        counts = self.counts[group]
+        return np.fromiter(counts.keys(), dtype=float, count=len(counts)), np.fromiter(counts.values(), dtype=float, count=len(counts))
@@ -0,0 +1,321 @@
+"""
+Booking pace and pickup across archive snapshots.
+
+Every snapshot observes each (hotel, check-in, check-out) cell at some lead
+time (days before arrival). Aligning a cell's observation with its previous
+one shows how the stay date is filling up: a cell that turned sold out is a
+pickup, one that reopened is a release, and the price change between the two
+shows how rates move as arrival approaches.
+
+Results are summed per (hotel, lead-time bucket, see PACE_LEAD_BUCKETS) and
+written to the `pace` section of pricing_analysis.json. All sums are
+additive, so the engine is incremental: PACE_STATE_FILE holds the totals and
+the last observation of every open cell, and a new snapshot only needs one
+vectorized merge against that state. The current day's snapshot is kept
+pending (not folded into the totals) until a newer one arrives, so
+re-analysing the same day gives the same result. Without a state file the
+totals are rebuilt once from the archive.
+
+Carried rows (stale_since set) and failed checks are not observations.
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Import configuration
+import config
+from delta_archive import DeltaArchive
+
+KEY = ["hotel_name", "check_in_date", "check_out_date"]
+CELL_COLUMNS = KEY + ["observed_date", "sold_out", "price_per_night", "available_room_types"]
+SUM_COLUMNS = [
+    "observations", "sold_out", "price_sum", "price_count",
+    "pairs", "pickup", "releases", "rooms_picked_up", "span_days",
+    "price_change_pct_sum", "price_change_count",
+]
+SNAPSHOT_COLUMNS = ["hotel_name", "check_in_date", "check_out_date", "availability",
+                    "price_per_night", "available_room_types", "stale_since"]
+
+
+def lead_bucket_labels(edges):
+    labels = [f"0-{edges[0]}"]
+    labels += [f"{lo + 1}-{hi}" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1] + 1}+")
+    return labels
+
+
+def _ratio(numerator, denominator, scale=1):
+    return float(numerator / denominator * scale) if denominator else None
+
+
+def _empty_cells():
+    return pd.DataFrame({
+        "hotel_name": pd.Series(dtype=object),
+        "check_in_date": pd.Series(dtype="datetime64[us]"),
+        "check_out_date": pd.Series(dtype="datetime64[us]"),
+        "observed_date": pd.Series(dtype="datetime64[us]"),
+        "sold_out": pd.Series(dtype=bool),
+        "price_per_night": pd.Series(dtype=float),
+        "available_room_types": pd.Series(dtype=float),
+    })
+
+
+def cell_observations(df):
+    """Last observation of each cell in (part of) a pricing snapshot, without the observed date."""
+    if "availability" in df.columns:
+        df = df[df["availability"] != "error"]
+    if "stale_since" in df.columns:
+        df = df[df["stale_since"].isna()]
+    cells = pd.DataFrame({
+        "hotel_name": df["hotel_name"].astype(str),
+        "check_in_date": pd.to_datetime(df["check_in_date"]),
+        "check_out_date": pd.to_datetime(df["check_out_date"]),
+        "sold_out": (df["availability"] == "sold_out").to_numpy(),
+        "price_per_night": pd.to_numeric(df["price_per_night"], errors="coerce"),
+        "available_room_types": pd.to_numeric(df.get("available_room_types"), errors="coerce").astype(float)
+        if "available_room_types" in df.columns else np.nan,
+    })
+    return cells.drop_duplicates(KEY, keep="last")
+
+
+def snapshot_cells(df, scrape_date):
+    """Reduce a pricing snapshot to one observation per cell."""
+    cells = cell_observations(df)
+    cells["observed_date"] = pd.Timestamp(scrape_date).normalize()
+    return cells[CELL_COLUMNS].reset_index(drop=True)
+
+
+def archive_snapshots(archive_dir=None, before=None):
+    """
+    Archived snapshots older than `before`, oldest first: plain CSV copies,
+    plus dates only kept in the delta history.
+
+    Yields:
+        tuple: (scrape date Timestamp, DataFrame)
+    """
+    archive_dir = archive_dir or config.ARCHIVE_DIR
+    sources = {}
+    for csv_path in archive_dir.glob("pricing_data_*.csv"):
+        sources[csv_path.stem.rsplit("_", 1)[-1]] = csv_path
+    history = None
+    history_dir = archive_dir / config.DELTA_ARCHIVE_DIR.name
+    if (history_dir / "manifest.json").exists():
+        history = DeltaArchive(history_dir)
+        for date_str in history.dates():
+            sources.setdefault(date_str, None)
+
+    for date_str in sorted(sources):
+        scrape_date = pd.Timestamp(date_str)
+        if before is not None and scrape_date >= before:
+            continue
+        if sources[date_str] is not None:
+            df = pd.read_csv(sources[date_str], usecols=lambda c: c in SNAPSHOT_COLUMNS)
+        else:
+            _, rows = history.materialize(date_str)
+            df = pd.DataFrame(rows).replace("", np.nan)
+        if "stale_since" not in df.columns:
+            df["stale_since"] = np.nan
+        yield scrape_date, df
+
+
+class PaceEngine:
+    """Incremental pace/pickup totals per hotel and lead-time bucket."""
+
+    def __init__(self, state_path=None, archive_dir=None, lead_buckets=None):
+        self.state_path = state_path or config.PACE_STATE_FILE
+        self.archive_dir = archive_dir or config.ARCHIVE_DIR
+        self.edges = sorted(lead_buckets or config.PACE_LEAD_BUCKETS)
+        self.labels = lead_bucket_labels(self.edges)
+        self.bins = [-np.inf] + list(self.edges) + [np.inf]
+        self.stats = {"mode": None, "snapshots_folded": 0, "seconds": 0.0}
+        self._reset()
+
+    def _reset(self):
+        self.totals = self._empty_totals()
+        self.base_cells = _empty_cells()
+        self.pending_cells = None
+        self.snapshots = 0
+        self.first_date = None
+
+    def _empty_totals(self):
+        index = pd.MultiIndex.from_arrays([[], []], names=["hotel_name", "lead_bucket"])
+        return pd.DataFrame(columns=SUM_COLUMNS, index=index, dtype=float)
+
+    def _bucket(self, lead_days):
+        return pd.cut(lead_days, bins=self.bins, labels=self.labels, right=True).astype(str)
+
+    def contribution(self, cells):
+        """Sums added by one snapshot: its observations plus its pairs with the previous observation of each cell."""
+        lead = (cells["check_in_date"] - cells["observed_date"]).dt.days
+        observed = pd.DataFrame({
+            "hotel_name": cells["hotel_name"],
+            "lead_bucket": self._bucket(lead),
+            "observations": 1.0,
+            "sold_out": cells["sold_out"].astype(float),
+            "price_sum": cells["price_per_night"].fillna(0.0),
+            "price_count": cells["price_per_night"].notna().astype(float),
+        })
+        parts = [observed.groupby(["hotel_name", "lead_bucket"]).sum()]
+
+        if not self.base_cells.empty:
+            pairs = cells.merge(self.base_cells, on=KEY, suffixes=("", "_prev"))
+            if not pairs.empty:
+                prev_sold = pairs["sold_out_prev"].astype(bool)
+                now_sold = pairs["sold_out"].astype(bool)
+                both_priced = pairs["price_per_night"].notna() & (pairs["price_per_night_prev"] > 0)
+                change_pct = ((pairs["price_per_night"] - pairs["price_per_night_prev"]) / pairs["price_per_night_prev"] * 100).where(both_priced)
+                paired = pd.DataFrame({
+                    "hotel_name": pairs["hotel_name"],
+                    "lead_bucket": self._bucket((pairs["check_in_date"] - pairs["observed_date"]).dt.days),
+                    "pairs": 1.0,
+                    "pickup": (now_sold & ~prev_sold).astype(float),
+                    "releases": (prev_sold & ~now_sold).astype(float),
+                    "rooms_picked_up": (pairs["available_room_types_prev"] - pairs["available_room_types"]).clip(lower=0).fillna(0.0),
+                    "span_days": (pairs["observed_date"] - pairs["observed_date_prev"]).dt.days.astype(float),
+                    "price_change_pct_sum": change_pct.fillna(0.0),
+                    "price_change_count": both_priced.astype(float),
+                })
+                parts.append(paired.groupby(["hotel_name", "lead_bucket"]).sum())
+
+        total = parts[0]
+        for part in parts[1:]:
+            total = total.add(part, fill_value=0.0)
+        return total.reindex(columns=SUM_COLUMNS, fill_value=0.0).fillna(0.0)
+
+    def fold(self, cells):
+        """Add a snapshot to the totals and make it the previous observation of its cells."""
+        snapshot_date = cells["observed_date"].iloc[0] if not cells.empty else None
+        self.totals = self.totals.add(self.contribution(cells), fill_value=0.0)
+        if self.base_cells.empty:
+            merged = cells
+        else:
+            merged = pd.concat([self.base_cells, cells], ignore_index=True).drop_duplicates(KEY, keep="last")
+        if snapshot_date is not None:
+            # Past stays can never pair again
+            merged = merged[merged["check_in_date"] >= snapshot_date]
+            self.first_date = self.first_date or snapshot_date
+        self.base_cells = merged.reset_index(drop=True)
+        self.snapshots += 1
+        self.stats["snapshots_folded"] += 1
+
+    def bootstrap(self, before):
+        """Rebuild the totals from every archived snapshot older than `before`."""
+        self._reset()
+        self.stats["mode"] = "rebuild"
+        for scrape_date, df in archive_snapshots(self.archive_dir, before):
+            self.fold(snapshot_cells(df, scrape_date))
+
+    def update(self, df):
+        """
+        Add the current snapshot (the analysed pricing data) and return the pace section.
+
+        Only the current snapshot is merged against the stored state; a previous
+        day's pending snapshot is folded in first.
+        """
+        current_date = df["scrape_timestamp"].max().normalize()
+        return self.update_cells(snapshot_cells(df, current_date), current_date)
+
+    def update_cells(self, cells, current_date):
+        """update() from the current snapshot's cells (see snapshot_cells), e.g. collected chunk by chunk."""
+        start = time.perf_counter()
+        if not self.load() or (self._pending_date() is not None and current_date < self._pending_date()):
+            self.bootstrap(current_date)
+        else:
+            self.stats["mode"] = "incremental"
+            if self._pending_date() is not None and current_date > self._pending_date():
+                self.fold(self.pending_cells)
+
+        totals = self.totals.add(self.contribution(cells), fill_value=0.0)
+        self.pending_cells = cells
+        self.save()
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        return self.report(totals, current_date)
+
+    def _pending_date(self):
+        if self.pending_cells is None or self.pending_cells.empty:
+            return None
+        return self.pending_cells["observed_date"].iloc[0]
+
+    def report(self, totals, current_date):
+        """The `pace` section: rates per hotel and lead-time bucket."""
+        records = []
+        order = {label: i for i, label in enumerate(self.labels)}
+        for (hotel, bucket), s in sorted(totals.iterrows(), key=lambda item: (item[0][0], order.get(item[0][1], 0))):
+            pairs = s["pairs"]
+            records.append({
+                "hotel_name": hotel,
+                "lead_bucket": bucket,
+                "observations": int(s["observations"]),
+                "sold_out_rate": _ratio(s["sold_out"], s["observations"], 100),
+                "avg_price_per_night": _ratio(s["price_sum"], s["price_count"]),
+                "pairs": int(pairs),
+                "pickup": int(s["pickup"]),
+                "releases": int(s["releases"]),
+                "net_pickup": int(s["pickup"] - s["releases"]),
+                "pickup_rate": _ratio(s["pickup"], pairs, 100),
+                "rooms_picked_up": float(s["rooms_picked_up"]),
+                "avg_days_between": _ratio(s["span_days"], pairs),
+                "avg_price_change_pct": _ratio(s["price_change_pct_sum"], s["price_change_count"]),
+            })
+        first = self.first_date if self.first_date is not None else current_date
+        return {
+            "snapshots": self.snapshots + 1,
+            "first_scrape_date": first.date().isoformat(),
+            "last_scrape_date": current_date.date().isoformat(),
+            "lead_buckets": self.labels,
+            "by_lead_time": records,
+        }
+
+    def _cells_to_json(self, cells):
+        out = cells.copy()
+        for column in ("check_in_date", "check_out_date", "observed_date"):
+            out[column] = out[column].dt.strftime("%Y-%m-%d")
+        out = out.astype(object).where(out.notna(), None)
+        return {"columns": list(out.columns), "data": out.to_numpy().tolist()}
+
+    def _cells_from_json(self, payload):
+        cells = pd.DataFrame(payload["data"], columns=payload["columns"])
+        for column in ("check_in_date", "check_out_date", "observed_date"):
+            cells[column] = pd.to_datetime(cells[column])
+        cells["sold_out"] = cells["sold_out"].astype(bool)
+        for column in ("price_per_night", "available_room_types"):
+            cells[column] = pd.to_numeric(cells[column], errors="coerce")
+        return cells
+
+    def save(self):
+        totals = self.totals.reset_index()
+        state = {
+            "lead_buckets": self.edges,
+            "snapshots": self.snapshots,
+            "first_date": self.first_date.date().isoformat() if self.first_date is not None else None,
+            "totals": {"columns": list(totals.columns), "data": totals.to_numpy().tolist()},
+            "base_cells": self._cells_to_json(self.base_cells),
+            "pending_cells": self._cells_to_json(self.pending_cells) if self.pending_cells is not None else None,
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+
+    def load(self):
+        """Restore the stored state. Returns False if there is none (or it used other buckets)."""
+        if not self.state_path.exists():
+            return False
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return False
+        if state.get("lead_buckets") != self.edges:
+            return False
+        totals = pd.DataFrame(state["totals"]["data"], columns=state["totals"]["columns"])
+        self.totals = totals.set_index(["hotel_name", "lead_bucket"]).astype(float) if not totals.empty else self._empty_totals()
+        self.base_cells = self._cells_from_json(state["base_cells"])
+        self.pending_cells = self._cells_from_json(state["pending_cells"]) if state.get("pending_cells") else None
+        self.snapshots = state["snapshots"]
+        self.first_date = pd.Timestamp(state["first_date"]) if state.get("first_date") else None
+        return True
+
+    def summary(self):
+        """One-line summary for console output."""
+        return f"{self.snapshots + 1} snapshots ({self.stats['mode']}, {self.stats['snapshots_folded']} folded) in {self.stats['seconds']:.2f}s"
@@ -0,0 +1,520 @@
+"""
+Booking.com property page parser.
+
+Pure, synchronous HTML -> pricing record functions used by scrape.py. Kept
+free of browser/network imports so pages can be parsed in worker processes
+(see parse_pool.py) and re-parsed offline.
+"""
+import json
+import re
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+# Import configuration
+import config
+
+
+def extract_price_from_text(text):
+    """Extract numeric price from text like 'R 1,234' or 'ZAR 1234.56'."""
+    if not text:
+        return None
+    cleaned = re.sub(r'[^\d,.]', '', text)
+    cleaned = cleaned.replace(',', '')
+    try:
+        return float(cleaned)
+    except (ValueError, AttributeError):
+        return None
+
+
+ROOMS_JSON_START = re.compile(r'b_rooms_available_and_soldout:\s*\[')
+JSON_STRUCTURE_CHARS = re.compile(r'[\[\]{}"\\]')
+JSON_DECODER = json.JSONDecoder()
+
+
+def scan_json_array(html_content, start_pos):
+    """
+    Find the end of the JSON array starting at start_pos with a bracket scanner.
+
+    Jumps between structural characters with a compiled regex instead of
+    stepping over every character, and never copies the rest of the document.
+
+    Returns:
+        int: Index just past the matching closing bracket, or -1 if unbalanced
+    """
+    bracket_count = 0
+    in_string = False
+    escape_pos = -2  # Index of the last backslash that escapes the next character
+
+    for match in JSON_STRUCTURE_CHARS.finditer(html_content, start_pos):
+        i = match.start()
+        if i == escape_pos + 1:
+            # Escaped character (e.g. \" inside a string)
+            continue
+
+        char = match.group()
+        if char == '\\':
+            escape_pos = i
+            continue
+
+        if char == '"':
+            in_string = not in_string
+        elif not in_string:
+            if char == '[' or char == '{':
+                bracket_count += 1
+            else:
+                bracket_count -= 1
+                if bracket_count == 0:
+                    return i + 1
+
+    return -1
+
+
+def extract_rooms_json_from_html(html_content):
+    """
+    Extract b_rooms_available_and_soldout JSON from the page HTML.
+    This is more reliable than DOM scraping as it uses Booking.com's own data structure.
+
+    Decodes the array in place from the match offset (no copy of the document
+    tail). Falls back to the bracket scanner if the payload is not strict JSON
+    up to its end (e.g. trailing JavaScript that confuses the decoder).
+    
+    Returns:
+        list: Room data extracted from the JavaScript object, or empty list if not found
+    """
+    match = ROOMS_JSON_START.search(html_content)
+    if not match:
+        return []
+
+    start_pos = match.end() - 1  # Position of the opening [
+    try:
+        rooms_data, _ = JSON_DECODER.raw_decode(html_content, start_pos)
+        return rooms_data
+    except json.JSONDecodeError:
+        pass
+
+    end_pos = scan_json_array(html_content, start_pos)
+    if end_pos == -1:
+        return []
+    try:
+        return json.loads(html_content[start_pos:end_pos])
+    except json.JSONDecodeError:
+        return []
+
+
+def extract_room_details_from_json(rooms_data):
+    """
+    Extract room names and prices from the parsed b_rooms_available_and_soldout JSON.
+    
+    Returns:
+        dict: Contains room_names list, room_prices list, and aggregated statistics
+    """
+    if not rooms_data:
+        return {
+            'room_names': [],
+            'room_prices': [],
+            'total_room_types': 0,
+            'available_room_types': 0,
+            'min_room_price': None,
+            'max_room_price': None,
+            'avg_room_price': None,
+        }
+    
+    room_names = []
+    room_prices = []
+    total_room_types = len(rooms_data)
+    available_room_types = 0
+    
+    for room in rooms_data:
+        room_name = room.get('b_name', 'Unknown Room')
+        # Always capture room name regardless of availability
+        room_names.append(room_name)
+        
+        blocks = room.get('b_blocks', [])
+        
+        if blocks:
+            # Use the first block's price (usually the cheapest/main rate)
+            first_block = blocks[0]
+            price_raw = first_block.get('b_raw_price', '')
+            
+            if price_raw:
+                try:
+                    price = float(price_raw)
+                    room_prices.append(price)
+                    available_room_types += 1  # Only count as available if has valid price
+                except (ValueError, TypeError):
+                    pass
+    
+    # Calculate statistics
+    min_price = min(room_prices) if room_prices else None
+    max_price = max(room_prices) if room_prices else None
+    avg_price = round(sum(room_prices) / len(room_prices), 2) if room_prices else None
+    
+    return {
+        'room_names': room_names,
+        'room_prices': room_prices,
+        'total_room_types': total_room_types,
+        'available_room_types': available_room_types,
+        'min_room_price': min_price,
+        'max_room_price': max_price,
+        'avg_room_price': avg_price,
+    }
+
+
+ORIGINAL_PRICE_SELECTOR = ".bui-price-display__original"
+REVIEW_SCORE_SELECTOR = "[data-testid='review-score'] .d10a6220b4"
+REVIEW_COUNT_SELECTOR = "[data-testid='review-score'] .e6208ee469"
+
+# Raw-HTML markers locating the fragments that hold the listing fields
+ORIGINAL_PRICE_MARKER = "bui-price-display__original"
+REVIEW_SCORE_MARKER = "review-score"
+FRAGMENT_WINDOW = 2000  # Characters parsed from the start of each candidate element
+
+
+def extract_listing_fields(root):
+    """
+    Read original price text, review score and review count from a parsed tree.
+
+    Returns:
+        tuple: (original_price_text, score, review_count)
+    """
+    original_price_elem = root.select_one(ORIGINAL_PRICE_SELECTOR)
+    original_price_text = original_price_elem.get_text(strip=True) if original_price_elem else None
+
+    score_elem = root.select_one(REVIEW_SCORE_SELECTOR)
+    score = score_elem.get_text(strip=True) if score_elem else None
+
+    review_elem = root.select_one(REVIEW_COUNT_SELECTOR)
+    review_count = None
+    if review_elem:
+        review_text = review_elem.get_text(strip=True)
+        match = re.search(r'([\d,]+)', review_text)
+        if match:
+            review_count = int(match.group(1).replace(',', ''))
+
+    return original_price_text, score, review_count
+
+
+def iter_fragments(html, marker):
+    """Yield a small parsed fragment starting at the tag around each occurrence of marker."""
+    pos = html.find(marker)
+    while pos != -1:
+        tag_start = html.rfind('<', 0, pos)
+        if tag_start != -1:
+            yield BeautifulSoup(html[tag_start:tag_start + FRAGMENT_WINDOW], "html.parser")
+        pos = html.find(marker, pos + len(marker))
+
+
+def select_in_fragments(html, marker, selector):
+    """Parse only the fragments around each marker occurrence and return the first selector match."""
+    for fragment in iter_fragments(html, marker):
+        elem = fragment.select_one(selector)
+        if elem:
+            return elem
+    return None
+
+
+def extract_listing_fields_from_fragments(html):
+    """
+    Same fields as extract_listing_fields, without parsing the whole document.
+
+    Returns:
+        tuple: (original_price_text, score, review_count)
+    """
+    original_price_elem = select_in_fragments(html, ORIGINAL_PRICE_MARKER, ORIGINAL_PRICE_SELECTOR)
+    original_price_text = original_price_elem.get_text(strip=True) if original_price_elem else None
+
+    score = None
+    review_count = None
+    for fragment in iter_fragments(html, REVIEW_SCORE_MARKER):
+        _, fragment_score, fragment_count = extract_listing_fields(fragment)
+        if score is None:
+            score = fragment_score
+        if review_count is None:
+            review_count = fragment_count
+        if score is not None and review_count is not None:
+            break
+
+    return original_price_text, score, review_count
+
+
+class ParseStats:
+    """Per-tier parse timings aggregated across a run."""
+
+    def __init__(self):
+        self.tiers = {}
+
+    def record(self, timings):
+        for tier, elapsed_ms in timings.items():
+            entry = self.tiers.setdefault(tier, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def to_dict(self):
+        return {
+            tier: {
+                "count": entry["count"],
+                "mean_ms": round(entry["total_ms"] / entry["count"], 2),
+                "max_ms": round(entry["max_ms"], 2),
+            }
+            for tier, entry in sorted(self.tiers.items())
+        }
+
+    def summary(self):
+        """One-line summary for console output."""
+        parts = [f"{tier} x{stats['count']} (mean {stats['mean_ms']:.1f} ms)" for tier, stats in self.to_dict().items()]
+        return ", ".join(parts) if parts else "no pages parsed"
+
+
+def extract_pricing_data(html: str, slug: str, check_in: str, check_out: str, nights: int, timings=None):
+    """
+    Parse HTML for pricing and availability information.
+    
+    Uses multiple approaches:
+    1. JSON extraction from b_rooms_available_and_soldout (preferred for available dates)
+    2. JSON extraction from b_all_rooms for room names even when sold out
+    3. DOM scraping for fallback
+
+    NOTE: Extracts pricing BEFORE checking availability, so we capture
+    prices even for sold-out dates when Booking.com displays them.
+
+    Parsing is tiered: the regex/JSON tier runs first; when it succeeds the
+    remaining DOM fields (original price, review score/count) are read from
+    small HTML fragments. A full BeautifulSoup parse happens only on the DOM
+    fallback path. Pass a dict as `timings` to receive per-tier durations (ms).
+    """
+    soup = None
+    tier_start = time.perf_counter()
+
+    # APPROACH 1: Try JSON extraction first (most reliable for available rooms)
+    rooms_json = extract_rooms_json_from_html(html)
+    room_details = extract_room_details_from_json(rooms_json)
+    
+    # APPROACH 1B: If JSON is empty, try to extract b_all_rooms for room type info
+    if not room_details['room_names']:
+        # Try to find b_all_rooms which contains all room types even when sold out
+        all_rooms_pattern = r'b_all_rooms:\s*(\{.*?\}),\s*\n'
+        all_rooms_match = re.search(all_rooms_pattern, html, re.DOTALL)
+        if all_rooms_match:
+            try:
+                all_rooms_data = json.loads(all_rooms_match.group(1))
+                # Extract room names from the keys or room data
+                room_names_from_all = []
+                for room_id, room_info in all_rooms_data.items():
+                    if isinstance(room_info, dict) and 'b_name' in room_info:
+                        room_names_from_all.append(room_info['b_name'])
+                if room_names_from_all:
+                    room_details['room_names'] = room_names_from_all
+                    room_details['total_room_types'] = len(room_names_from_all)
+            except (json.JSONDecodeError, AttributeError):
+                pass
+    
+    if timings is not None:
+        timings["json"] = (time.perf_counter() - tier_start) * 1000
+    tier_start = time.perf_counter()
+
+    # If JSON extraction succeeded and found data, use those values
+    if room_details['room_names']:
+        total_room_types = room_details['total_room_types']
+        available_room_types = room_details['available_room_types']
+        sold_out_room_types = total_room_types - available_room_types
+        min_room_price = room_details['min_room_price']
+        max_room_price = room_details['max_room_price']
+        avg_room_price = room_details['avg_room_price']
+        room_prices = room_details['room_prices']
+        room_names_list = room_details['room_names']
+        
+        # Use the minimum price as the main price
+        price = min_room_price
+        price_text = f"ZAR {price:,.2f}" if price else None
+        
+        # Availability is "available" if any rooms are available
+        availability_status = "available" if available_room_types > 0 else "sold_out"
+        
+    else:
+        # APPROACH 2: Fallback to DOM scraping (for sold-out dates or if JSON not available)
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Try multiple selectors for price
+        price_selectors = [
+            "[data-testid='price-and-discounted-price']",
+            ".prco-valign-middle-helper",
+            ".bui-price-display__value",
+            ".prco-inline-block-maker-helper",
+            "[data-testid='recommended-price']",
+            ".bui_price_headline",
+            ".prco-text-nowrap-helper",
+        ]
+
+        price_text = None
+        for selector in price_selectors:
+            price_elem = soup.select_one(selector)
+            if price_elem:
+                price_text = price_elem.get_text(strip=True)
+                if price_text and any(char.isdigit() for char in price_text):
+                    break
+
+        # Check availability status
+        availability_status = "available"
+
+        # First check for property-level sold out indicators
+        sold_out_indicators = [
+            ".soldout_property",
+            "[data-testid='soldout-property']",
+            ".bui-banner--warning",
+        ]
+
+        property_sold_out = False
+        for selector in sold_out_indicators:
+            if soup.select_one(selector):
+                property_sold_out = True
+                break
+
+        # Check for "no availability" text at property level
+        no_avail_texts = ["no availability", "sold out", "not available", "fully booked"]
+        page_text = soup.get_text().lower()
+        for indicator in no_avail_texts:
+            if indicator in page_text and "room" not in page_text[max(0, page_text.find(indicator)-50):page_text.find(indicator)+50]:
+                property_sold_out = True
+                break
+
+        # Check if any rooms are available (more accurate for multi-room properties)
+        # Look for room availability indicators and count room types
+        room_table = soup.select_one("#hprt-table") or soup.select_one("[data-block-id='rooms-table']")
+        
+        total_room_types = 0
+        available_room_types = 0
+        sold_out_room_types = 0
+        room_prices = []  # List of all available room prices
+        room_names_list = []  # List of room names from DOM
+        
+        if room_table:
+            # Find all room rows (each row represents a room type)
+            room_rows = room_table.select("tr.js-rt-block-row, tr[data-block-id]")
+            
+            if not room_rows:
+                # Fallback: count by price cells if no specific room rows found
+                all_price_cells = room_table.select(".hprt-table-cell-price")
+                
+                for cell in all_price_cells:
+                    price_elem = cell.select_one("[data-testid='price-and-discounted-price'], .bui-price-display__value")
+                    if price_elem:
+                        available_room_types += 1
+                        room_price_text = price_elem.get_text(strip=True)
+                        room_price = extract_price_from_text(room_price_text)
+                        if room_price:
+                            room_prices.append(room_price)
+                
+                total_room_types = len(room_table.select(".hprt-table-cell-roomtype, .hprt-roomtype-icon-link"))
+                sold_out_room_types = max(0, total_room_types - available_room_types)
+                
+                # Extract room names
+                room_name_elems = room_table.select(".hprt-roomtype-icon-link, .hprt-roomtype-name")
+                for elem in room_name_elems:
+                    name = elem.get_text(strip=True)
+                    if name:
+                        room_names_list.append(name)
+            else:
+                for row in room_rows:
+                    total_room_types += 1
+                    
+                    # Extract room name
+                    room_name_elem = row.select_one(".hprt-roomtype-icon-link, .hprt-roomtype-name, [data-testid='title']")
+                    if room_name_elem:
+                        room_name = room_name_elem.get_text(strip=True)
+                        if room_name:
+                            room_names_list.append(room_name)
+                    
+                    # Check if this room type has a bookable price
+                    price_cell = row.select_one(".hprt-table-cell-price")
+                    if price_cell:
+                        price_elem = price_cell.select_one("[data-testid='price-and-discounted-price'], .bui-price-display__value")
+                        if price_elem:
+                            available_room_types += 1
+                            room_price_text = price_elem.get_text(strip=True)
+                            room_price = extract_price_from_text(room_price_text)
+                            if room_price:
+                                room_prices.append(room_price)
+                        else:
+                            sold_out_room_types += 1
+                    else:
+                        sold_out_room_types += 1
+            
+            # Determine availability based on room types
+            if available_room_types > 0:
+                availability_status = "available"
+            else:
+                availability_status = "sold_out"
+        elif property_sold_out:
+            # No room table and property-level sold out indicators
+            availability_status = "sold_out"
+        
+        # Calculate occupancy rate and pricing statistics at property level
+        min_room_price = None
+        max_room_price = None
+        avg_room_price = None
+        
+        if room_prices:
+            min_room_price = min(room_prices)
+            max_room_price = max(room_prices)
+            avg_room_price = round(sum(room_prices) / len(room_prices), 2)
+        
+        price = extract_price_from_text(price_text)
+
+    # Original price (DOM-based, as discount info not in JSON), rating and review count
+    if soup is not None:
+        original_price_text, score, review_count = extract_listing_fields(soup)
+        if timings is not None:
+            timings["dom"] = (time.perf_counter() - tier_start) * 1000
+    else:
+        original_price_text, score, review_count = extract_listing_fields_from_fragments(html)
+        if timings is not None:
+            timings["fragments"] = (time.perf_counter() - tier_start) * 1000
+
+    # Convert prices
+    price = extract_price_from_text(price_text)
+    original_price = extract_price_from_text(original_price_text)
+    price_per_night = price / nights if price and nights > 0 else None
+
+    # Check for discount
+    has_discount = original_price is not None and price is not None and original_price > price
+    discount_percentage = None
+    if has_discount:
+        discount_percentage = round(((original_price - price) / original_price) * 100, 2)
+
+    # Calculate property occupancy rate
+    property_occupancy_rate = None
+    if total_room_types > 0:
+        property_occupancy_rate = round((sold_out_room_types / total_room_types) * 100, 2)
+    
+    # Convert room names list to comma-separated string
+    room_names = ', '.join(room_names_list) if room_names_list else ''
+
+    return {
+        "hotel_slug": slug,
+        "check_in_date": check_in,
+        "check_out_date": check_out,
+        "nights": nights,
+        "guests": config.GUESTS,
+        "rooms": config.ROOMS,
+        "availability": availability_status,
+        "total_price": price,
+        "original_price": original_price,
+        "price_per_night": price_per_night,
+        "has_discount": has_discount,
+        "discount_percentage": discount_percentage,
+        "rating_score": score,
+        "review_count": review_count,
+        "scrape_timestamp": datetime.now().isoformat(),
+        "day_offset": None,
+        "total_room_types": total_room_types,
+        "available_room_types": available_room_types,
+        "sold_out_room_types": sold_out_room_types,
+        "property_occupancy_rate": property_occupancy_rate,
+        "min_room_price": min_room_price,
+        "max_room_price": max_room_price,
+        "avg_room_price": avg_room_price,
+        "room_names": room_names,
+    }
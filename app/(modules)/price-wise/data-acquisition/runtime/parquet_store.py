@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Partitioned Parquet dataset of scraped pricing rows.
+
+Rows are stored with an explicit schema (typed dates and timestamps,
+dictionary-encoded names, nullable numerics), partitioned by scrape date
+(directories) and hotel (one row group per hotel, sorted by hotel_slug, so
+hotel filters skip other hotels' data):
+
+    dataset/
+    ├── daily/scrape_date=YYYY-MM-DD/part-*.parquet    # current month, one file per day
+    └── monthly/scrape_month=YYYY-MM/part-*.parquet    # earlier months rolled up
+
+The scraper appends a small part file per flushed batch, compacts the day into
+one file at the end of the run, and rolls finished months up into one file.
+Keeping the file count low matters more than anything else for load time: a
+year is ~12 monthly files plus the current month's days.
+
+pricing_data.csv is still written for the Next.js app; this dataset is for
+history queries (`load_history`), which only read the columns and row groups
+they need.
+
+Backfill from existing archive CSVs:
+    python parquet_store.py --import-archive
+"""
+import argparse
+import csv
+import uuid
+from datetime import date, datetime
+
+# Import configuration
+import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional - CSV output works without it
+    pa = None
+
+PART_PREFIX = "part-"
+
+# Rows are unique per stay within a scrape date
+ROW_KEY = ("hotel_slug", "check_in_date", "check_out_date")
+
+
+def _schema():
+    return pa.schema([
+        ("scrape_date", pa.date32()),
+        ("hotel_slug", pa.string()),
+        ("hotel_name", pa.dictionary(pa.int32(), pa.string())),
+        ("check_in_date", pa.date32()),
+        ("check_out_date", pa.date32()),
+        ("nights", pa.int16()),
+        ("guests", pa.int16()),
+        ("rooms", pa.int16()),
+        ("day_offset", pa.int16()),
+        ("availability", pa.dictionary(pa.int8(), pa.string())),
+        ("total_price", pa.float64()),
+        ("original_price", pa.float64()),
+        ("price_per_night", pa.float64()),
+        ("has_discount", pa.bool_()),
+        ("discount_percentage", pa.float64()),
+        ("rating_score", pa.float32()),
+        ("review_count", pa.int32()),
+        ("total_room_types", pa.int16()),
+        ("available_room_types", pa.int16()),
+        ("sold_out_room_types", pa.int16()),
+        ("property_occupancy_rate", pa.float64()),
+        ("min_room_price", pa.float64()),
+        ("max_room_price", pa.float64()),
+        ("avg_room_price", pa.float64()),
+        ("room_names", pa.string()),
+        ("scrape_timestamp", pa.timestamp("us")),
+        ("stale_since", pa.date32()),
+    ])
+
+
+def _is_blank(value):
+    return value is None or value == "" or (isinstance(value, float) and value != value)
+
+
+def _to_float(value):
+    return None if _is_blank(value) else float(value)
+
+
+def _to_int(value):
+    return None if _is_blank(value) else int(float(value))
+
+
+def _to_bool(value):
+    if _is_blank(value):
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value)
+
+
+def _to_date(value):
+    if _is_blank(value):
+        return None
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _to_timestamp(value):
+    if _is_blank(value):
+        return None
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def _to_str(value):
+    return None if _is_blank(value) else str(value)
+
+
+# Converters for rows coming from the parser (Python values) or from CSV (strings)
+CONVERTERS = {
+    "scrape_date": _to_date,
+    "hotel_slug": _to_str,
+    "hotel_name": _to_str,
+    "check_in_date": _to_date,
+    "check_out_date": _to_date,
+    "nights": _to_int,
+    "guests": _to_int,
+    "rooms": _to_int,
+    "day_offset": _to_int,
+    "availability": _to_str,
+    "total_price": _to_float,
+    "original_price": _to_float,
+    "price_per_night": _to_float,
+    "has_discount": _to_bool,
+    "discount_percentage": _to_float,
+    "rating_score": _to_float,
+    "review_count": _to_int,
+    "total_room_types": _to_int,
+    "available_room_types": _to_int,
+    "sold_out_room_types": _to_int,
+    "property_occupancy_rate": _to_float,
+    "min_room_price": _to_float,
+    "max_room_price": _to_float,
+    "avg_room_price": _to_float,
+    "room_names": _to_str,
+    "scrape_timestamp": _to_timestamp,
+    "stale_since": _to_date,
+}
+
+
+def rows_to_table(rows, scrape_date):
+    """Build a typed Arrow table from pricing row dicts."""
+    schema = _schema()
+    columns = {name: [CONVERTERS[name](row.get(name)) for row in rows] for name in schema.names}
+    columns["scrape_date"] = [_to_date(scrape_date)] * len(rows)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def _dedupe_latest(table):
+    """Keep the last row (by scrape_timestamp) per (scrape_date, hotel, stay)."""
+    table = table.sort_by([("scrape_timestamp", "ascending")])
+    keys = zip(*(table.column(name).to_pylist() for name in ("scrape_date",) + ROW_KEY))
+    latest = {key: index for index, key in enumerate(keys)}
+    return table.take(sorted(latest.values()))
+
+
+def _write_by_hotel(table, path, sort_keys):
+    """Write a table sorted by hotel with one row group per hotel."""
+    table = table.sort_by([(name, "ascending") for name in sort_keys])
+    tmp_path = path.with_suffix(".tmp")
+    slugs = table.column("hotel_slug")
+    with pq.ParquetWriter(tmp_path, table.schema, compression=config.PARQUET_COMPRESSION) as writer:
+        for slug in pc.unique(slugs).to_pylist():
+            writer.write_table(table.filter(pc.equal(slugs, slug)))
+    tmp_path.replace(path)
+
+
+class ParquetStore:
+    """Parquet dataset partitioned by scrape date (directories) and hotel (row groups)."""
+
+    def __init__(self, root=None):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed - Parquet dataset unavailable")
+        self.root = root or config.PARQUET_DIR
+        self.daily_dir = self.root / "daily"
+        self.monthly_dir = self.root / "monthly"
+        self.daily_dir.mkdir(parents=True, exist_ok=True)
+        self.monthly_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"rows": 0, "part_files": 0, "compacted_days": 0, "rolled_up_months": 0}
+
+    def day_dir(self, scrape_date):
+        return self.daily_dir / f"scrape_date={scrape_date}"
+
+    def month_dir(self, month):
+        return self.monthly_dir / f"scrape_month={month}"
+
+    def write_batch(self, rows, scrape_date):
+        """Append rows for one scrape date as a new part file."""
+        if not rows:
+            return
+        directory = self.day_dir(scrape_date)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{PART_PREFIX}{uuid.uuid4().hex}.parquet"
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(rows_to_table(rows, scrape_date), tmp_path, compression=config.PARQUET_COMPRESSION)
+        tmp_path.replace(path)
+        self.stats["rows"] += len(rows)
+        self.stats["part_files"] += 1
+
+    def _merge(self, parts, path, sort_keys):
+        table = _dedupe_latest(pa.concat_tables([pq.read_table(p, schema=_schema()) for p in parts]))
+        _write_by_hotel(table, path, sort_keys)
+        for part in parts:
+            if part != path:
+                part.unlink()
+
+    def compact(self, scrape_date):
+        """Merge a scrape date's part files into one file (latest row per stay wins)."""
+        directory = self.day_dir(scrape_date)
+        parts = sorted(directory.glob("*.parquet")) if directory.exists() else []
+        if len(parts) <= 1:
+            return
+        self._merge(parts, directory / f"{PART_PREFIX}{uuid.uuid4().hex}.parquet", ("hotel_slug", "check_in_date", "check_out_date"))
+        self.stats["compacted_days"] += 1
+
+    def rollup(self, before_month=None):
+        """
+        Merge the daily files of every month before `before_month` ("YYYY-MM",
+        default: the current month) into that month's single file.
+        """
+        before_month = before_month or datetime.now().strftime("%Y-%m")
+        by_month = {}
+        for directory in sorted(self.daily_dir.glob("scrape_date=*")):
+            month = directory.name.split("=", 1)[1][:7]
+            if month < before_month:
+                by_month.setdefault(month, []).append(directory)
+
+        for month, day_dirs in by_month.items():
+            month_dir = self.month_dir(month)
+            month_dir.mkdir(parents=True, exist_ok=True)
+            parts = sorted(month_dir.glob("*.parquet")) + [p for d in day_dirs for p in sorted(d.glob("*.parquet"))]
+            self._merge(parts, month_dir / f"{PART_PREFIX}{uuid.uuid4().hex}.parquet", ("hotel_slug", "scrape_date", "check_in_date"))
+            for directory in day_dirs:
+                for leftover in directory.iterdir():
+                    leftover.unlink()
+                directory.rmdir()
+            self.stats["rolled_up_months"] += 1
+
+    def files(self, start=None, end=None):
+        """Data files that can hold rows scraped between start and end (inclusive)."""
+        start = _to_date(start).isoformat() if start else None
+        end = _to_date(end).isoformat() if end else None
+        selected = []
+        for directory in sorted(self.monthly_dir.glob("scrape_month=*")):
+            month = directory.name.split("=", 1)[1]
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            selected.extend(sorted(directory.glob("*.parquet")))
+        for directory in sorted(self.daily_dir.glob("scrape_date=*")):
+            day = directory.name.split("=", 1)[1]
+            if (start and day < start) or (end and day > end):
+                continue
+            selected.extend(sorted(directory.glob("*.parquet")))
+        return selected
+
+    def scrape_dates(self):
+        """Scrape dates present in the dataset, oldest first."""
+        dates = {d.name.split("=", 1)[1] for d in self.daily_dir.glob("scrape_date=*") if any(d.glob("*.parquet"))}
+        for path in self.monthly_dir.glob("scrape_month=*/*.parquet"):
+            column = pq.read_table(path, columns=["scrape_date"]).column("scrape_date")
+            dates.update(d.isoformat() for d in pc.unique(column).to_pylist())
+        return sorted(dates)
+
+    def import_csv(self, csv_path, scrape_date):
+        """Load a pricing CSV (e.g. an archive snapshot) as one scrape date."""
+        with csv_path.open("r", newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if row.get("hotel_slug")]
+        if rows:
+            self.write_batch(rows, scrape_date)
+            self.compact(scrape_date)
+        return len(rows)
+
+    def summary(self):
+        """One-line summary for console output."""
+        return (
+            f"{self.stats['rows']} rows in {self.stats['part_files']} part files, "
+            f"{self.stats['compacted_days']} days compacted, {self.stats['rolled_up_months']} months rolled up"
+        )
+
+
+def load_history(root=None, start=None, end=None, hotels=None, columns=None):
+    """
+    Load rows across scrape dates as a pandas DataFrame.
+
+    Args:
+        start / end: Inclusive scrape date bounds ("YYYY-MM-DD" or date)
+        hotels: Optional list of hotel slugs
+        columns: Optional list of columns to read
+
+    Names come back as categoricals, counts as nullable integers, and dates as datetime64.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed - Parquet dataset unavailable")
+    import pandas as pd
+
+    root = root or config.PARQUET_DIR
+    if not root.exists():
+        return pd.DataFrame()
+    files = ParquetStore(root).files(start, end)
+    if not files:
+        return pd.DataFrame()
+    dataset = ds.dataset([str(p) for p in files], format="parquet", schema=_schema())
+
+    condition = None
+    if start is not None:
+        condition = ds.field("scrape_date") >= _to_date(start)
+    if end is not None:
+        bound = ds.field("scrape_date") <= _to_date(end)
+        condition = bound if condition is None else condition & bound
+    if hotels:
+        selected = ds.field("hotel_slug").isin(list(hotels))
+        condition = selected if condition is None else condition & selected
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    nullable_ints = {
+        pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(),
+        pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype(),
+    }
+    df = table.to_pandas(types_mapper=nullable_ints.get, date_as_object=False)
+    if "hotel_slug" in df.columns:
+        df["hotel_slug"] = df["hotel_slug"].astype("category")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the Parquet pricing dataset")
+    parser.add_argument("--import-archive", action="store_true", help="Import archive/pricing_data_*.csv snapshots not yet in the dataset")
+    args = parser.parse_args()
+
+    if not args.import_archive:
+        parser.print_help()
+        return
+
+    store = ParquetStore()
+    existing = set(store.scrape_dates())
+    imported = 0
+    for csv_path in sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv")):
+        stamp = csv_path.stem.rsplit("_", 1)[-1]
+        scrape_date = f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}"
+        if scrape_date in existing:
+            continue
+        rows = store.import_csv(csv_path, scrape_date)
+        imported += 1
+        print(f"Imported {csv_path.name}: {rows} rows")
+    store.rollup()
+    print(f"Done: {imported} snapshots imported into {store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Process-pool parse stage for the scraper.
+
+extract_pricing_data is CPU-bound (regex, JSON, BeautifulSoup) and would block
+the asyncio loop that drives page fetches. Fetch coroutines hand raw HTML to a
+ParserPool, which parses it in worker processes and returns the record
+asynchronously.
+
+Pages are parsed inside the fetch task that fetched them, which keeps holding
+its scheduler slot until the record is back. The scheduler's
+MAX_CONCURRENT_PAGES therefore bounds the HTML held in memory, fetched and
+parsing together, without a separate parse queue. (A parse failure is not
+retried - see retry.RETRYABLE - and becomes an error row.)
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+# Import configuration
+import config
+from page_parser import extract_pricing_data
+
+
+def parse_page(html, slug, check_in, check_out, nights):
+    """Worker entry point: parse one page and return (record, per-tier timings)."""
+    timings = {}
+    record = extract_pricing_data(html, slug, check_in, check_out, nights, timings=timings)
+    return record, timings
+
+
+class ParserPool:
+    """
+    Parse stage backed by a ProcessPoolExecutor.
+
+    Args:
+        workers: Worker processes (0 = parse inline on the event loop)
+    """
+
+    def __init__(self, workers=None):
+        self.workers = config.PARSE_WORKERS if workers is None else workers
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        self._pending = 0
+
+        self.stats = {
+            "pages_parsed": 0,
+            "max_pending": 0,  # Most pages in the parse stage at once (at most MAX_CONCURRENT_PAGES)
+        }
+
+    async def parse(self, html, slug, check_in, check_out, nights):
+        """
+        Parse a page off the event loop.
+
+        Returns:
+            tuple: (pricing record, per-tier timings dict)
+        """
+        self._pending += 1
+        self.stats["max_pending"] = max(self.stats["max_pending"], self._pending)
+        try:
+            if self._executor is None:
+                result = parse_page(html, slug, check_in, check_out, nights)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, parse_page, html, slug, check_in, check_out, nights)
+            self.stats["pages_parsed"] += 1
+            return result
+        finally:
+            self._pending -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def summary(self):
+        """One-line summary for console output."""
+        mode = f"{self.workers} worker processes" if self.workers > 0 else "inline"
+        return f"{self.stats['pages_parsed']} pages ({mode}), max {self.stats['max_pending']} pending at once"
@@ -0,0 +1,131 @@
+"""
+Date-level scrape checkpoints.
+
+daily_progress.json only records fully completed properties, so a crash
+mid-property used to re-scrape every date of that property and append
+duplicate rows. The journal is an append-only JSONL file with one line per
+(slug, check-in, check-out) whose row has been written to pricing_data.csv.
+A resumed run skips exactly those dates.
+
+Rows are flushed to the CSV before their journal lines are written. A crash
+between the two is covered by also reading the keys of rows already in
+today's CSV, so a stored row is never fetched or written twice.
+"""
+import csv
+import json
+from datetime import datetime
+
+# Import configuration
+import config
+
+
+def get_today_str():
+    """Get today's date as string for tracking."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def load_daily_progress():
+    """Load daily progress tracker."""
+    if config.DAILY_PROGRESS_FILE.exists():
+        try:
+            with open(config.DAILY_PROGRESS_FILE, 'r') as f:
+                content = f.read().strip()
+                if content:
+                    return json.loads(content)
+        except (json.JSONDecodeError, Exception):
+            pass
+    return {"date": None, "completed_properties": []}
+
+
+def date_key(slug, check_in, check_out):
+    return (slug, check_in, check_out)
+
+
+def repair_csv_tail(csv_path):
+    """
+    Drop a partially written final row left by a crash mid-write.
+
+    Returns:
+        bool: True if the file was truncated
+    """
+    if not csv_path.exists():
+        return False
+    with csv_path.open("rb+") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        if size == 0:
+            return False
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return False
+
+        # Walk back to the last complete line and cut everything after it
+        chunk_size = 4096
+        pos = size
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return True
+            pos = start
+        f.truncate(0)
+        return True
+
+
+def csv_stored_keys(csv_path):
+    """Keys of the rows already in a pricing CSV."""
+    if not csv_path.exists():
+        return set()
+    keys = set()
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("hotel_slug") and row.get("check_in_date") and row.get("check_out_date"):
+                keys.add(date_key(row["hotel_slug"], row["check_in_date"], row["check_out_date"]))
+    return keys
+
+
+class ProgressJournal:
+    """Append-only journal of date checks whose rows are safely in the CSV."""
+
+    def __init__(self, path=None):
+        self.path = path or config.PROGRESS_JOURNAL_FILE
+
+    def reset(self):
+        """Start a new day's journal."""
+        self.path.write_text("", encoding="utf-8")
+
+    def stored_keys(self, date_str):
+        """Keys journaled on date_str. Torn lines from a crash are ignored."""
+        if not self.path.exists():
+            return set()
+        keys = set()
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("date") == date_str:
+                    keys.add(date_key(entry["hotel_slug"], entry["check_in_date"], entry["check_out_date"]))
+        return keys
+
+    def record(self, rows, date_str):
+        """Journal rows that have just been written to the CSV."""
+        if not rows:
+            return
+        written_at = datetime.now().isoformat()
+        with self.path.open("a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({
+                    "date": date_str,
+                    "hotel_slug": row["hotel_slug"],
+                    "check_in_date": row["check_in_date"],
+                    "check_out_date": row["check_out_date"],
+                    "written_at": written_at,
+                }) + "\n")
+            f.flush()
@@ -0,0 +1,140 @@
+"""
+Adaptive request rate limiting for a target domain.
+
+A token bucket shared by every worker replaces the fixed REQUEST_DELAY sleep.
+The refill rate adapts AIMD-style (as in TCP congestion control): each
+successful fetch adds a small constant to the rate, and a block page, timeout
+or error multiplies it down. Back-offs are limited to one per cooldown
+window, so a burst of failures from one throttling episode only halves the
+rate once. The run settles near the highest rate the site tolerates.
+"""
+import asyncio
+import time
+
+# Import configuration
+import config
+
+# Back-off events kept for the run log (the count is always exact)
+MAX_RECORDED_BACKOFFS = 50
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an AIMD-adjusted refill rate.
+
+    Args:
+        domain: Host the limiter protects (for logs)
+        initial_rate: Starting rate in requests/sec (defaults to 1 / config.REQUEST_DELAY)
+        min_rate / max_rate: Bounds for the adapted rate (requests/sec)
+        burst: Bucket capacity - requests allowed back-to-back after an idle spell
+        increase: Requests/sec added per successful fetch
+        backoff_factor: Rate multiplier applied on block, timeout or error
+        cooldown: Seconds after a back-off during which further failures don't cut the rate again
+    """
+
+    def __init__(self, domain, initial_rate=None, min_rate=None, max_rate=None, burst=None,
+                 increase=None, backoff_factor=None, cooldown=None):
+        self.domain = domain
+        self.min_rate = config.RATE_LIMIT_MIN if min_rate is None else min_rate
+        self.max_rate = config.RATE_LIMIT_MAX if max_rate is None else max_rate
+        if initial_rate is None:
+            initial_rate = 1 / config.REQUEST_DELAY if config.REQUEST_DELAY else self.max_rate
+        self.rate = min(self.max_rate, max(self.min_rate, initial_rate))
+        self.burst = config.RATE_LIMIT_BURST if burst is None else burst
+        self.increase = config.RATE_LIMIT_INCREASE if increase is None else increase
+        self.backoff_factor = config.RATE_LIMIT_BACKOFF if backoff_factor is None else backoff_factor
+        self.cooldown = config.RATE_LIMIT_COOLDOWN if cooldown is None else cooldown
+
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._last_backoff = None
+        self._lock = asyncio.Lock()
+
+        self.stats = {
+            "domain": domain,
+            "initial_rate": round(self.rate, 3),
+            "min_rate_seen": self.rate,
+            "max_rate_seen": self.rate,
+            "requests": 0,
+            "successes": 0,
+            "failures": {},
+            "backoff_count": 0,
+            "backoffs": [],
+            "wait_s": 0.0,
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until a request may be sent. Waiters are served in arrival order."""
+        start = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        self.stats["requests"] += 1
+        self.stats["wait_s"] += time.monotonic() - start
+
+    def _set_rate(self, rate):
+        self._refill()  # Tokens earned so far accrue at the old rate
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.stats["min_rate_seen"] = min(self.stats["min_rate_seen"], self.rate)
+        self.stats["max_rate_seen"] = max(self.stats["max_rate_seen"], self.rate)
+
+    def record_success(self):
+        """Additive increase after a successful fetch."""
+        self.stats["successes"] += 1
+        self._set_rate(self.rate + self.increase)
+
+    def record_failure(self, reason):
+        """
+        Multiplicative decrease after a block page, timeout or error.
+
+        Returns:
+            bool: True if the rate was cut, False if still cooling down from a previous back-off
+        """
+        failures = self.stats["failures"]
+        failures[reason] = failures.get(reason, 0) + 1
+
+        now = time.monotonic()
+        if self._last_backoff is not None and now - self._last_backoff < self.cooldown:
+            return False
+        self._last_backoff = now
+
+        previous = self.rate
+        self._set_rate(self.rate * self.backoff_factor)
+        # Drop any saved-up burst so the slowdown takes effect immediately
+        self._tokens = min(self._tokens, 0.0)
+
+        self.stats["backoff_count"] += 1
+        if len(self.stats["backoffs"]) < MAX_RECORDED_BACKOFFS:
+            self.stats["backoffs"].append({
+                "at": time.strftime("%H:%M:%S"),
+                "reason": reason,
+                "rate_before": round(previous, 3),
+                "rate_after": round(self.rate, 3),
+            })
+        return True
+
+    def to_dict(self):
+        stats = dict(self.stats)
+        stats["final_rate"] = round(self.rate, 3)
+        stats["min_rate_seen"] = round(stats["min_rate_seen"], 3)
+        stats["max_rate_seen"] = round(stats["max_rate_seen"], 3)
+        stats["wait_s"] = round(stats["wait_s"], 1)
+        stats["failures"] = dict(stats["failures"])
+        stats["backoffs"] = list(stats["backoffs"])
+        return stats
+
+    def summary(self):
+        """One-line summary for console output."""
+        return (
+            f"{self.domain} {self.rate:.2f} req/s "
+            f"(range {self.stats['min_rate_seen']:.2f}-{self.stats['max_rate_seen']:.2f}), "
+            f"{self.stats['requests']} requests, {self.stats['backoff_count']} back-offs"
+        )
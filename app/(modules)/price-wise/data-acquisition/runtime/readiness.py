@@ -0,0 +1,98 @@
+"""
+Readiness detection for Booking.com property pages.
+
+Instead of fixed sleeps, wait only until the data we parse is in the document:
+the b_rooms_available_and_soldout payload, a rendered room table, a definitive
+sold-out marker, or a block page. A hard deadline caps the wait. Every wait
+records which condition fired and how long it took so deadlines can be tuned
+from real data.
+"""
+import time
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Import configuration
+import config
+
+# Returns the name of the first satisfied condition, or false to keep polling.
+READY_PREDICATE = """
+() => {
+    const scripts = document.scripts;
+    for (let i = 0; i < scripts.length; i++) {
+        if (scripts[i].text.indexOf('b_rooms_available_and_soldout') !== -1) {
+            return 'rooms_payload';
+        }
+    }
+    if (document.querySelector("#hprt-table, [data-block-id='rooms-table']")) {
+        return 'room_table';
+    }
+    if (document.querySelector(".soldout_property, [data-testid='soldout-property']")) {
+        return 'sold_out_marker';
+    }
+    if (document.querySelector("#px-captcha, iframe[src*='captcha'], script[src*='awswaf']")) {
+        return 'block_page';
+    }
+    return false;
+}
+"""
+
+DEADLINE_CONDITION = "deadline"
+
+
+class ReadinessStats:
+    """Counts and timings of readiness conditions across a run."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, condition, elapsed_ms):
+        self.samples.setdefault(condition, []).append(elapsed_ms)
+
+    def to_dict(self):
+        """Per-condition count and latency percentiles (ms)."""
+        summary = {}
+        for condition, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            count = len(ordered)
+            summary[condition] = {
+                "count": count,
+                "mean_ms": round(sum(ordered) / count, 1),
+                "p50_ms": round(ordered[count // 2], 1),
+                "p95_ms": round(ordered[min(count - 1, int(count * 0.95))], 1),
+                "max_ms": round(ordered[-1], 1),
+            }
+        return summary
+
+    def summary(self):
+        """One-line summary for console output."""
+        parts = []
+        for condition, stats in self.to_dict().items():
+            parts.append(f"{condition} x{stats['count']} (p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms)")
+        return ", ".join(parts) if parts else "no page loads"
+
+
+async def wait_until_ready(page, deadline_ms=None, stats=None):
+    """
+    Wait until the page contains data we can parse, or the deadline passes.
+
+    Returns:
+        tuple: (condition name, elapsed milliseconds). The condition is
+        "deadline" if nothing fired in time - the caller should still parse
+        whatever HTML is there.
+    """
+    deadline_ms = deadline_ms or config.READY_DEADLINE_MS
+    start = time.perf_counter()
+    try:
+        handle = await page.wait_for_function(
+            READY_PREDICATE,
+            timeout=deadline_ms,
+            polling=config.READY_POLL_INTERVAL_MS,
+        )
+        condition = await handle.json_value()
+    except PlaywrightTimeoutError:
+        condition = DEADLINE_CONDITION
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if stats is not None:
+        stats.record(condition, elapsed_ms)
+    return condition, elapsed_ms
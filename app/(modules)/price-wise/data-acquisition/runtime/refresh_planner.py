@@ -0,0 +1,159 @@
+"""
+Volatility-aware refresh planning (opt-in: ENABLE_REFRESH_TIERS).
+
+Re-checking every (hotel, date) cell on every run spends most page loads on
+far-out or long-sold-out dates that rarely change. The planner reads recent
+archive snapshots and splits the day's tasks into:
+
+- fetch: cells within REFRESH_NEAR_TERM_DAYS of today, cells whose history
+  changes often (volatile), cells without usable history, and stable cells
+  whose turn has come (every REFRESH_STABLE_INTERVAL runs, staggered per cell)
+- carry: all other cells - the last observed row is written again for today,
+  with `stale_since` set to the date it was actually observed
+
+Carried rows never become more than REFRESH_STABLE_INTERVAL days old.
+"""
+import csv
+import zlib
+from datetime import date, datetime
+
+# Import configuration
+import config
+from progress_journal import date_key
+
+# Fields compared between consecutive observations of a cell
+VOLATILITY_FIELDS = ("availability", "total_price", "available_room_types")
+
+ARCHIVE_PREFIX = "pricing_data_"
+
+
+def _observed_date(row):
+    """Date a row's values were actually observed (stale_since for carried rows)."""
+    stamp = row.get("stale_since") or row.get("scrape_timestamp") or ""
+    try:
+        return date.fromisoformat(stamp[:10])
+    except ValueError:
+        return None
+
+
+class RefreshPlanner:
+    """Split date-check tasks into cells to fetch and cells to carry forward."""
+
+    def __init__(self, archive_dir=None, today=None, near_term_days=None, stable_interval=None,
+                 volatility_threshold=None, history_snapshots=None):
+        self.archive_dir = archive_dir or config.ARCHIVE_DIR
+        self.today = today or datetime.now().date()
+        self.near_term_days = config.REFRESH_NEAR_TERM_DAYS if near_term_days is None else near_term_days
+        self.stable_interval = max(1, stable_interval or config.REFRESH_STABLE_INTERVAL)
+        self.volatility_threshold = config.REFRESH_VOLATILITY_THRESHOLD if volatility_threshold is None else volatility_threshold
+        self.history_snapshots = history_snapshots or config.REFRESH_HISTORY_SNAPSHOTS
+
+        # key -> {"observations": [values, ...], "latest": row, "last_observed": date}
+        self.history = {}
+        self.snapshots_loaded = 0
+
+        self.stats = {
+            "cells": 0,
+            "fetch_near_term": 0,
+            "fetch_volatile": 0,
+            "fetch_no_history": 0,
+            "fetch_due": 0,
+            "carried": 0,
+        }
+
+    def load_history(self):
+        """Read the most recent archive snapshots, oldest first."""
+        snapshots = sorted(self.archive_dir.glob(f"{ARCHIVE_PREFIX}*.csv"))[-self.history_snapshots:]
+        for path in snapshots:
+            with path.open("r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if not (row.get("hotel_slug") and row.get("check_in_date") and row.get("check_out_date")):
+                        continue
+                    key = date_key(row["hotel_slug"], row["check_in_date"], row["check_out_date"])
+                    cell = self.history.setdefault(key, {"observations": [], "latest": None, "last_observed": None})
+                    if row.get("stale_since"):
+                        # A carried value is not a new observation
+                        continue
+                    cell["observations"].append(tuple(row.get(field, "") for field in VOLATILITY_FIELDS))
+                    cell["latest"] = row
+                    cell["last_observed"] = _observed_date(row)
+        self.snapshots_loaded = len(snapshots)
+        return self
+
+    def change_rate(self, key):
+        """Share of consecutive observations of a cell whose values differed."""
+        observations = self.history.get(key, {}).get("observations", [])
+        if len(observations) < 2:
+            return None
+        changes = sum(1 for previous, current in zip(observations, observations[1:]) if previous != current)
+        return changes / (len(observations) - 1)
+
+    def _is_due(self, key, age_days):
+        """Stable cells refresh every stable_interval runs, on a per-cell phase so refreshes spread out."""
+        if age_days >= self.stable_interval:
+            return True
+        phase = zlib.crc32("|".join(key).encode("utf-8")) % self.stable_interval
+        return (self.today.toordinal() + phase) % self.stable_interval == 0
+
+    def _decide(self, task):
+        """Return the reason a task must be fetched, or None if it can be carried forward."""
+        key = date_key(task["hotel_slug"], task["check_in_date"], task["check_out_date"])
+        lead_days = (date.fromisoformat(task["check_in_date"]) - self.today).days
+        if lead_days <= self.near_term_days:
+            return "fetch_near_term"
+
+        cell = self.history.get(key)
+        if not cell or cell["latest"] is None or cell["last_observed"] is None:
+            return "fetch_no_history"
+        if cell["latest"].get("availability") == "error":
+            return "fetch_no_history"
+
+        rate = self.change_rate(key)
+        if rate is None:
+            # A single observation says nothing about volatility yet
+            return "fetch_no_history"
+        if rate >= self.volatility_threshold:
+            return "fetch_volatile"
+        if self._is_due(key, (self.today - cell["last_observed"]).days):
+            return "fetch_due"
+        return None
+
+    def carried_row(self, task):
+        """Today's row for a carried cell: the last observed values, marked stale."""
+        cell = self.history[date_key(task["hotel_slug"], task["check_in_date"], task["check_out_date"])]
+        row = dict(cell["latest"])
+        row["hotel_name"] = task["hotel_name"]
+        row["day_offset"] = task["day_offset"]
+        row["stale_since"] = cell["last_observed"].isoformat()
+        row["scrape_timestamp"] = datetime.now().isoformat()
+        return row
+
+    def plan(self, tasks):
+        """
+        Split tasks into those to fetch and rows to carry forward.
+
+        Returns:
+            tuple: (tasks to fetch, carried rows)
+        """
+        fetch, carried = [], []
+        for task in tasks:
+            self.stats["cells"] += 1
+            reason = self._decide(task)
+            if reason is None:
+                self.stats["carried"] += 1
+                carried.append(self.carried_row(task))
+            else:
+                self.stats[reason] += 1
+                fetch.append(task)
+        return fetch, carried
+
+    def summary(self):
+        """One-line summary for console output."""
+        s = self.stats
+        fetched = s["cells"] - s["carried"]
+        saved_pct = (s["carried"] / s["cells"] * 100) if s["cells"] else 0
+        return (
+            f"{fetched}/{s['cells']} cells fetched ({s['fetch_near_term']} near-term, {s['fetch_volatile']} volatile, "
+            f"{s['fetch_no_history']} no history, {s['fetch_due']} due), {s['carried']} carried forward "
+            f"({saved_pct:.0f}% fewer page loads, {self.snapshots_loaded} snapshots)"
+        )
@@ -0,0 +1,105 @@
+"""
+Request interception for Booking.com page loads.
+
+We only need the property HTML (which embeds b_rooms_available_and_soldout and
+the room table), so images, fonts, media and third-party trackers are wasted
+bandwidth and latency. When enabled, a ResourceFilter is installed as a route
+handler on every browser context and aborts requests matching the configured
+deny lists, while counting what was blocked and allowed.
+"""
+from urllib.parse import urlparse
+
+# Import configuration
+import config
+
+# Rough transfer sizes (bytes) per resource type, used to estimate bandwidth
+# saved by aborted requests (a blocked request never reports its real size).
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 40_000,
+    "media": 250_000,
+    "font": 35_000,
+    "stylesheet": 30_000,
+    "script": 45_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 5_000,
+}
+
+
+def _host_matches(host, domains):
+    """True if host equals or is a subdomain of any domain in the list."""
+    if not host:
+        return False
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class ResourceFilter:
+    """
+    Allow/deny policy for sub-resource requests, with counters.
+
+    Rules, in order:
+    1. Documents (the property page itself) are always allowed.
+    2. Requests to a blocked domain are aborted.
+    3. Requests of a blocked resource type are aborted.
+    4. If an allow list is configured, requests to any other domain are aborted.
+    5. Everything else is allowed.
+    """
+
+    def __init__(self, blocked_types=None, blocked_domains=None, allowed_domains=None):
+        self.blocked_types = set(config.BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = list(config.BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.allowed_domains = list(config.ALLOWED_DOMAINS if allowed_domains is None else allowed_domains)
+
+        self.stats = {
+            "allowed": 0,
+            "blocked": 0,
+            "blocked_by_type": {},
+            "estimated_bytes_saved": 0,
+        }
+
+    def should_block(self, resource_type, url):
+        """Return True if a request of this type to this URL should be aborted."""
+        if resource_type == "document":
+            return False
+
+        host = (urlparse(url).hostname or "").lower()
+        if _host_matches(host, self.blocked_domains):
+            return True
+        if resource_type in self.blocked_types:
+            return True
+        if self.allowed_domains and not _host_matches(host, self.allowed_domains):
+            return True
+        return False
+
+    def _record(self, resource_type, blocked):
+        if not blocked:
+            self.stats["allowed"] += 1
+            return
+        self.stats["blocked"] += 1
+        by_type = self.stats["blocked_by_type"]
+        by_type[resource_type] = by_type.get(resource_type, 0) + 1
+        self.stats["estimated_bytes_saved"] += ESTIMATED_RESOURCE_BYTES.get(resource_type, ESTIMATED_RESOURCE_BYTES["other"])
+
+    async def handle_route(self, route):
+        """Playwright route handler: abort or continue the intercepted request."""
+        request = route.request
+        blocked = self.should_block(request.resource_type, request.url)
+        self._record(request.resource_type, blocked)
+        if blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def install(self, context):
+        """Install the filter on a browser context."""
+        await context.route("**/*", self.handle_route)
+
+    def summary(self):
+        """One-line summary of filter activity for console output."""
+        total = self.stats["allowed"] + self.stats["blocked"]
+        blocked_pct = (self.stats["blocked"] / total * 100) if total else 0
+        saved_mb = self.stats["estimated_bytes_saved"] / (1024 * 1024)
+        return (
+            f"{self.stats['blocked']} blocked / {self.stats['allowed']} allowed requests "
+            f"({blocked_pct:.1f}% blocked, ~{saved_mb:.1f} MB saved)"
+        )
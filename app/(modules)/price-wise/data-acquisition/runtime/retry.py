@@ -0,0 +1,145 @@
+"""
+Retries for failed date checks.
+
+Failures are classified as timeout, navigation error (network, browser or
+HTTP errors), block page, parse failure or internal error (any other
+exception - a bug in our code). Transient classes (timeout, navigation,
+block) are retried with jittered exponential backoff on a fresh browser
+context. Parse and internal failures are not retried: the same page or the
+same code gives the same result. A date that still fails is re-queued to
+the end of the run by the scheduler, and only written as an error row once
+those passes are used up. Per-class counts go into scrape_log.json.
+"""
+import asyncio
+import random
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Import configuration
+import config
+from browser_pool import BlockedPageError
+from fetchers import FetchError, aiohttp
+
+TIMEOUT = "timeout"
+NAVIGATION = "navigation"
+BLOCK = "block"
+PARSE = "parse"
+INTERNAL = "internal"
+
+FAILURE_CLASSES = (TIMEOUT, NAVIGATION, BLOCK, PARSE, INTERNAL)
+RETRYABLE = frozenset({TIMEOUT, NAVIGATION, BLOCK})
+
+# Network, browser and HTTP errors (FetchError includes MissingPayloadError)
+NAVIGATION_ERRORS = (PlaywrightError, OSError, FetchError) + ((aiohttp.ClientError,) if aiohttp is not None else ())
+
+
+class ParseFailure(Exception):
+    """Raised when a fetched page could not be parsed."""
+
+
+class DateCheckFailed(Exception):
+    """Raised when a date check failed on every attempt."""
+
+    def __init__(self, failure_class, attempts, cause):
+        super().__init__(f"{failure_class} after {attempts} attempt(s): {cause}")
+        self.failure_class = failure_class
+        self.attempts = attempts
+        self.cause = cause
+
+    @property
+    def retryable(self):
+        return self.failure_class in RETRYABLE
+
+
+def classify_failure(exc):
+    """Map an exception from a date check to one of FAILURE_CLASSES."""
+    if isinstance(exc, DateCheckFailed):
+        return exc.failure_class
+    if isinstance(exc, ParseFailure):
+        return PARSE
+    if isinstance(exc, BlockedPageError):
+        return BLOCK
+    if isinstance(exc, (asyncio.TimeoutError, PlaywrightTimeoutError)):
+        return TIMEOUT
+    if isinstance(exc, NAVIGATION_ERRORS):
+        return NAVIGATION
+    return INTERNAL
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)] seconds."""
+    base = config.RETRY_BACKOFF_BASE if base is None else base
+    cap = config.RETRY_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class FailureStats:
+    """Per-class counts of failed attempts, recoveries, re-queues and dates given up on."""
+
+    def __init__(self):
+        self.classes = {}
+
+    def _entry(self, failure_class):
+        return self.classes.setdefault(failure_class, {"failed_attempts": 0, "recovered": 0, "requeued": 0, "gave_up": 0})
+
+    def record_attempt(self, failure_class):
+        self._entry(failure_class)["failed_attempts"] += 1
+
+    def record_recovered(self, failure_class):
+        self._entry(failure_class)["recovered"] += 1
+
+    def record_requeued(self, failure_class):
+        self._entry(failure_class)["requeued"] += 1
+
+    def record_gave_up(self, failure_class):
+        self._entry(failure_class)["gave_up"] += 1
+
+    def to_dict(self):
+        return {
+            "by_class": {name: dict(counts) for name, counts in sorted(self.classes.items())},
+            "failed_attempts": sum(c["failed_attempts"] for c in self.classes.values()),
+            "recovered": sum(c["recovered"] for c in self.classes.values()),
+            "gave_up": sum(c["gave_up"] for c in self.classes.values()),
+        }
+
+    def summary(self):
+        """One-line summary for console output."""
+        parts = [
+            f"{name} {c['failed_attempts']} failed ({c['recovered']} recovered, {c['gave_up']} gave up)"
+            for name, c in sorted(self.classes.items())
+        ]
+        return ", ".join(parts) if parts else "no failures"
+
+
+async def with_retries(operation, stats=None, max_attempts=None, label=""):
+    """
+    Run `await operation(attempt)` until it succeeds or the attempts run out.
+
+    `attempt` starts at 0; callers should use a fresh browser context when it
+    is above 0. Non-retryable failures are not retried.
+
+    Raises:
+        DateCheckFailed: with the class of the last failure
+    """
+    max_attempts = max(1, max_attempts or config.RETRY_MAX_ATTEMPTS)
+    last_class = None
+    for attempt in range(max_attempts):
+        try:
+            result = await operation(attempt)
+        except Exception as e:
+            last_class = classify_failure(e)
+            if stats is not None:
+                stats.record_attempt(last_class)
+            if last_class not in RETRYABLE or attempt == max_attempts - 1:
+                cause = f"{type(e).__name__}: {e}" if last_class == INTERNAL else e
+                print(f"   Warning: {last_class} failure for {label} (attempt {attempt + 1}/{max_attempts}): {cause}")
+                raise DateCheckFailed(last_class, attempt + 1, e) from e
+
+            delay = backoff_delay(attempt)
+            print(f"   Warning: {last_class} failure for {label} (attempt {attempt + 1}/{max_attempts}) - retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        else:
+            if last_class is not None and stats is not None:
+                stats.record_recovered(last_class)
+            return result
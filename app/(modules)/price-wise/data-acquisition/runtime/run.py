@@ -15,13 +15,13 @@ if sys.stdout.encoding != 'utf-8':
 if sys.stderr.encoding != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', line_buffering=True)
 
-# Import the scraper and analyzer modules
-import scrape
-import analyze
+# The scraper and analyzer (playwright, pandas) are imported only when there is work for them
+import analysis_cache
 import config
+from progress_journal import get_today_str, load_daily_progress
 
 
-def log_execution(scrape_success: bool, analysis_success: bool):
+def log_execution(scrape_success: bool, analysis_success: bool, scrape_stats: dict = None):
     """Log execution to history file"""
     entry = {
         "timestamp": datetime.now().isoformat(),
@@ -36,6 +36,8 @@ def log_execution(scrape_success: bool, analysis_success: bool):
             "timestamp": datetime.now().isoformat()
         }
     }
+    if scrape_stats:
+        entry["scrape_stats"] = scrape_stats
     
     # Read existing history
     history = []
@@ -68,14 +70,15 @@ async def main():
     scrape_success = False
     analysis_success = False
     scraping_actually_done = False
+    scrape_stats = None
     
     try:
         # Step 1: Run the scraper
         print("\n[STEP 1] Running scraper...")
         
         # Check if scraping was already done today
-        progress = scrape.load_daily_progress()
-        today = scrape.get_today_str()
+        progress = load_daily_progress()
+        today = get_today_str()
         
         # Load hotels to determine if work is needed
         hotels = []
@@ -90,16 +93,21 @@ async def main():
             scrape_success = True  # Not an error, just already done
         else:
             # Actually run the scraper
-            await scrape.main()
+            import scrape
+            scrape_stats = await scrape.main()
             scraping_actually_done = True
             scrape_success = True
             print("OK: Scraping completed successfully")
         
-        # Step 2: Run the analysis (always run to ensure latest analysis)
+        # Step 2: Run the analysis unless nothing it reads changed since the last one
         print("\n[STEP 2] Running analysis...")
-        analyze.main()
+        if analysis_cache.is_current():
+            print("Analysis is up to date (pricing data, archive and settings unchanged) - skipping")
+        else:
+            import analyze
+            analyze.main()
+            print("OK: Analysis completed successfully")
         analysis_success = True
-        print("OK: Analysis completed successfully")
         
         print("\n" + "=" * 60)
         print("Price-Wise workflow completed successfully!")
@@ -107,7 +115,7 @@ async def main():
         
         # Only log if actual scraping was done
         if scraping_actually_done:
-            log_execution(scrape_success, analysis_success)
+            log_execution(scrape_success, analysis_success, scrape_stats)
         
         return 0
         
@@ -118,7 +126,7 @@ async def main():
         
         # Only log if scraping was attempted
         if scraping_actually_done:
-            log_execution(scrape_success, analysis_success)
+            log_execution(scrape_success, analysis_success, scrape_stats)
         return 1
 
 
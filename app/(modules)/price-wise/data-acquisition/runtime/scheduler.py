@@ -0,0 +1,99 @@
+"""
+Bounded asyncio worker scheduler for date checks.
+
+Feeds (hotel, check-in, check-out) tasks from a queue to a fixed number of
+workers. A global limit caps the number of page loads in flight and a
+per-property limit keeps any single property from being hammered. Tasks are
+interleaved across properties so one slow property never stalls the run.
+Request pacing is left to the shared rate limiter (see rate_limiter.py).
+"""
+import asyncio
+from itertools import zip_longest
+
+# Import configuration
+import config
+
+
+def interleave_by_property(tasks):
+    """Order tasks round-robin across properties, preserving date order within each."""
+    by_slug = {}
+    for task in tasks:
+        by_slug.setdefault(task["hotel_slug"], []).append(task)
+
+    ordered = []
+    for group in zip_longest(*by_slug.values()):
+        ordered.extend(task for task in group if task is not None)
+    return ordered
+
+
+class ScrapeScheduler:
+    """
+    Run date-check tasks with global and per-property concurrency limits.
+
+    Args:
+        worker: async callable taking a task dict and returning a result
+        max_concurrent: Total tasks in flight (defaults to config.MAX_CONCURRENT_PAGES)
+        per_property: Tasks in flight per property (defaults to config.MAX_CONCURRENT_PER_PROPERTY)
+
+    Callbacks run on the event loop thread, so they may update shared state
+    (progress files, CSV batches, counters) without extra locking.
+    """
+
+    def __init__(self, worker, max_concurrent=None, per_property=None):
+        self.worker = worker
+        self.max_concurrent = max(1, max_concurrent or config.MAX_CONCURRENT_PAGES)
+        self.per_property = max(1, per_property or config.MAX_CONCURRENT_PER_PROPERTY)
+        self._property_limits = {}
+
+    def _property_limit(self, slug):
+        if slug not in self._property_limits:
+            self._property_limits[slug] = asyncio.Semaphore(self.per_property)
+        return self._property_limits[slug]
+
+    async def run(self, tasks, on_result, on_error=None, on_start=None, requeue=None):
+        """
+        Process all tasks and return when the queue is drained.
+
+        Args:
+            tasks: list of task dicts (must contain "hotel_slug")
+            on_result: called as on_result(task, result) for each finished task
+            on_error: called as on_error(task, exc) when the worker raises
+            on_start: called as on_start(task) just before a task is started
+            requeue: called as requeue(task, exc) when the worker raises; if it
+                returns True the task goes to the back of the queue instead of on_error
+        """
+        queue = asyncio.Queue()
+        for task in interleave_by_property(tasks):
+            queue.put_nowait(task)
+
+        async def worker_loop():
+            while True:
+                try:
+                    task = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    async with self._property_limit(task["hotel_slug"]):
+                        if on_start:
+                            on_start(task)
+                        try:
+                            result = await self.worker(task)
+                        except Exception as e:
+                            if requeue is not None and requeue(task, e):
+                                queue.put_nowait(task)
+                            elif on_error is None:
+                                raise
+                            else:
+                                on_error(task, e)
+                        else:
+                            on_result(task, result)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker_loop()) for _ in range(min(self.max_concurrent, max(1, len(tasks))))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
@@ -7,39 +7,69 @@ Two modes: OCCUPANCY (track booking rates) and PRICING (analyze pricing strategi
 """
 import json
 import csv
+import argparse
 import asyncio
-import re
+import os
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlparse
 from fake_useragent import UserAgent
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
 
 # Import configuration
 import config
-
-BASE_URL = "https://www.booking.com"
+from browser_pool import BrowserPool
+from capture_store import CaptureStore, parse_capture
+from parse_pool import ParserPool
+from parquet_store import ParquetStore
+from delta_archive import DeltaArchive, import_archive_csvs
+from history_db import HistoryDB
+from refresh_planner import RefreshPlanner
+from progress_journal import (  # daily progress helpers re-exported for existing callers
+    ProgressJournal,
+    csv_stored_keys,
+    date_key,
+    get_today_str,
+    load_daily_progress,
+    repair_csv_tail,
+)
+from page_parser import (  # parsing helpers re-exported for existing callers
+    ParseStats,
+    extract_price_from_text,
+    extract_pricing_data,
+    extract_room_details_from_json,
+    extract_rooms_json_from_html,
+)
+from fetchers import build_fetcher
+from rate_limiter import AdaptiveRateLimiter
+from readiness import ReadinessStats
+from retry import DateCheckFailed, FailureStats, ParseFailure, with_retries
+from resource_filter import ResourceFilter
+from scheduler import ScrapeScheduler
+
+BASE_URL = config.BOOKING_BASE_URL
 USER_AGENT = UserAgent().random
 
+SAVE_BATCH_SIZE = 10  # Save every N records
 
-def get_today_str():
-    """Get today's date as string for tracking."""
-    return datetime.now().strftime("%Y-%m-%d")
-
+# Fieldnames for CSV
+CSV_FIELDNAMES = [
+    "hotel_name", "hotel_slug", "check_in_date", "check_out_date",
+    "nights", "guests", "rooms", "day_offset", "availability", "total_price",
+    "original_price", "price_per_night", "has_discount",
+    "discount_percentage", "rating_score", "review_count",
+    "total_room_types", "available_room_types", "sold_out_room_types",
+    "property_occupancy_rate", "min_room_price", "max_room_price",
+    "avg_room_price", "room_names", "scrape_timestamp", "stale_since"
+]
 
-def load_daily_progress():
-    """Load daily progress tracker."""
-    if config.DAILY_PROGRESS_FILE.exists():
-        try:
-            with open(config.DAILY_PROGRESS_FILE, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    return json.loads(content)
-        except (json.JSONDecodeError, Exception):
-            pass
-    return {"date": None, "completed_properties": []}
+# Readiness, parse and failure stats for the current run (reset by main)
+readiness_stats = ReadinessStats()
+parse_stats = ParseStats()
+failure_stats = FailureStats()
 
 
 def archive_existing_data():
@@ -91,12 +121,28 @@ def archive_existing_data():
         shutil.copy2(config.ANALYSIS_JSON, archive_json_path)
         print(f"Archived existing analysis to: {archive_json_filename}")
     
+    # Keep snapshots in the delta history so plain copies can be pruned without losing them
+    stored_dates = None
+    if config.ENABLE_DELTA_ARCHIVE:
+        stored_dates = set()
+        try:
+            delta_archive = DeltaArchive()
+            for csv_path, entry in import_archive_csvs(delta_archive):
+                print(f"Stored {csv_path.name} in delta history as {entry['kind']} ({entry['stored_bytes'] / 1024:.1f} KB)")
+            stored_dates = set(delta_archive.dates())
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not update delta history: {e}")
+    
     # Clean up old archives (keep only MAX_ARCHIVE_FILES most recent)
     csv_archives = sorted(config.ARCHIVE_DIR.glob("pricing_data_*.csv"), reverse=True)
     json_archives = sorted(config.ARCHIVE_DIR.glob("pricing_analysis_*.json"), reverse=True)
     
     if len(csv_archives) > config.MAX_ARCHIVE_FILES:
         for old_file in csv_archives[config.MAX_ARCHIVE_FILES:]:
+            if stored_dates is not None and old_file.stem.rsplit("_", 1)[-1] not in stored_dates:
+                # Removing it would lose the snapshot
+                print(f"Keeping old archive not in delta history: {old_file.name}")
+                continue
             old_file.unlink()
             print(f"Removed old archive: {old_file.name}")
     
@@ -148,346 +194,51 @@ def format_date(date_obj):
     return date_obj.strftime("%Y-%m-%d")
 
 
-def extract_price_from_text(text):
-    """Extract numeric price from text like 'R 1,234' or 'ZAR 1234.56'."""
-    if not text:
-        return None
-    cleaned = re.sub(r'[^\d,.]', '', text)
-    cleaned = cleaned.replace(',', '')
-    try:
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
+async def fetch_pricing_for_date(fetcher, slug: str, cc: str, check_in: str, check_out: str, nights: int,
+                                 parser_pool=None, capture_store=None):
+    """Fetch pricing data for a specific property and date range.
 
-def extract_rooms_json_from_html(html_content):
-    """
-    Extract b_rooms_available_and_soldout JSON from the page HTML.
-    This is more reliable than DOM scraping as it uses Booking.com's own data structure.
-    
-    Returns:
-        list: Room data extracted from the JavaScript object, or empty list if not found
-    """
-    # Find the start of b_rooms_available_and_soldout
-    start_pattern = r'b_rooms_available_and_soldout:\s*(\[)'
-    match = re.search(start_pattern, html_content)
-    if not match:
-        return []
-    
-    # Find the matching closing bracket
-    start_pos = match.end() - 1  # Position of the opening [
-    bracket_count = 0
-    in_string = False
-    escape_next = False
-    
-    for i, char in enumerate(html_content[start_pos:], start=start_pos):
-        if escape_next:
-            escape_next = False
-            continue
-        
-        if char == '\\':
-            escape_next = True
-            continue
-        
-        if char == '"' and not escape_next:
-            in_string = not in_string
-        
-        if not in_string:
-            if char == '[' or char == '{':
-                bracket_count += 1
-            elif char == ']' or char == '}':
-                bracket_count -= 1
-                
-                if bracket_count == 0:
-                    # Found the matching closing bracket
-                    json_str = html_content[start_pos:i+1]
-                    try:
-                        rooms_data = json.loads(json_str)
-                        return rooms_data
-                    except json.JSONDecodeError:
-                        return []
-    
-    return []
+    Transient failures are retried with backoff on a fresh context (see retry.py).
 
+    Args:
+        fetcher: FallbackFetcher (HTTP first, browser fallback)
+        parser_pool: Optional ParserPool to parse off the event loop (parses inline if None)
+        capture_store: Optional CaptureStore that keeps the raw HTML for offline replay
 
-def extract_room_details_from_json(rooms_data):
-    """
-    Extract room names and prices from the parsed b_rooms_available_and_soldout JSON.
-    
-    Returns:
-        dict: Contains room_names list, room_prices list, and aggregated statistics
+    Raises:
+        DateCheckFailed: if every attempt failed
     """
-    if not rooms_data:
-        return {
-            'room_names': [],
-            'room_prices': [],
-            'total_room_types': 0,
-            'available_room_types': 0,
-            'min_room_price': None,
-            'max_room_price': None,
-            'avg_room_price': None,
-        }
-    
-    room_names = []
-    room_prices = []
-    total_room_types = len(rooms_data)
-    available_room_types = 0
-    
-    for room in rooms_data:
-        room_name = room.get('b_name', 'Unknown Room')
-        # Always capture room name regardless of availability
-        room_names.append(room_name)
-        
-        blocks = room.get('b_blocks', [])
-        
-        if blocks:
-            # Use the first block's price (usually the cheapest/main rate)
-            first_block = blocks[0]
-            price_raw = first_block.get('b_raw_price', '')
-            
-            if price_raw:
-                try:
-                    price = float(price_raw)
-                    room_prices.append(price)
-                    available_room_types += 1  # Only count as available if has valid price
-                except (ValueError, TypeError):
-                    pass
-    
-    # Calculate statistics
-    min_price = min(room_prices) if room_prices else None
-    max_price = max(room_prices) if room_prices else None
-    avg_price = round(sum(room_prices) / len(room_prices), 2) if room_prices else None
-    
-    return {
-        'room_names': room_names,
-        'room_prices': room_prices,
-        'total_room_types': total_room_types,
-        'available_room_types': available_room_types,
-        'min_room_price': min_price,
-        'max_room_price': max_price,
-        'avg_room_price': avg_price,
-    }
+    url = (
+        f"{BASE_URL}/hotel/{cc}/{slug}.en-gb.html"
+        f"?checkin={check_in}"
+        f"&checkout={check_out}"
+        f"&group_adults={config.GUESTS}"
+        f"&group_children=0"
+        f"&no_rooms={config.ROOMS}"
+    )
 
+    async def attempt(attempt_number):
+        html, _engine = await fetcher.fetch(url, fresh=attempt_number > 0)
+        if capture_store is not None:
+            await capture_store.save_async(html, slug, check_in, check_out, nights)
 
-def extract_pricing_data(html: str, slug: str, check_in: str, check_out: str, nights: int):
-    """
-    Parse HTML for pricing and availability information.
-    
-    Uses multiple approaches:
-    1. JSON extraction from b_rooms_available_and_soldout (preferred for available dates)
-    2. JSON extraction from b_all_rooms for room names even when sold out
-    3. DOM scraping for fallback
+        try:
+            if parser_pool is not None:
+                pricing_data, timings = await parser_pool.parse(html, slug, check_in, check_out, nights)
+            else:
+                timings = {}
+                pricing_data = extract_pricing_data(html, slug, check_in, check_out, nights, timings=timings)
+        except Exception as e:
+            raise ParseFailure(str(e)) from e
+        parse_stats.record(timings)
 
-    NOTE: Extracts pricing BEFORE checking availability, so we capture
-    prices even for sold-out dates when Booking.com displays them.
-    """
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # APPROACH 1: Try JSON extraction first (most reliable for available rooms)
-    rooms_json = extract_rooms_json_from_html(html)
-    room_details = extract_room_details_from_json(rooms_json)
-    
-    # APPROACH 1B: If JSON is empty, try to extract b_all_rooms for room type info
-    if not room_details['room_names']:
-        # Try to find b_all_rooms which contains all room types even when sold out
-        all_rooms_pattern = r'b_all_rooms:\s*(\{.*?\}),\s*\n'
-        all_rooms_match = re.search(all_rooms_pattern, html, re.DOTALL)
-        if all_rooms_match:
-            try:
-                all_rooms_data = json.loads(all_rooms_match.group(1))
-                # Extract room names from the keys or room data
-                room_names_from_all = []
-                for room_id, room_info in all_rooms_data.items():
-                    if isinstance(room_info, dict) and 'b_name' in room_info:
-                        room_names_from_all.append(room_info['b_name'])
-                if room_names_from_all:
-                    room_details['room_names'] = room_names_from_all
-                    room_details['total_room_types'] = len(room_names_from_all)
-            except (json.JSONDecodeError, AttributeError):
-                pass
-    
-    # If JSON extraction succeeded and found data, use those values
-    if room_details['room_names']:
-        total_room_types = room_details['total_room_types']
-        available_room_types = room_details['available_room_types']
-        sold_out_room_types = total_room_types - available_room_types
-        min_room_price = room_details['min_room_price']
-        max_room_price = room_details['max_room_price']
-        avg_room_price = room_details['avg_room_price']
-        room_prices = room_details['room_prices']
-        room_names_list = room_details['room_names']
-        
-        # Use the minimum price as the main price
-        price = min_room_price
-        price_text = f"ZAR {price:,.2f}" if price else None
-        
-        # Availability is "available" if any rooms are available
-        availability_status = "available" if available_room_types > 0 else "sold_out"
-        
-    else:
-        # APPROACH 2: Fallback to DOM scraping (for sold-out dates or if JSON not available)
-        # Try multiple selectors for price
-        price_selectors = [
-            "[data-testid='price-and-discounted-price']",
-            ".prco-valign-middle-helper",
-            ".bui-price-display__value",
-            ".prco-inline-block-maker-helper",
-            "[data-testid='recommended-price']",
-            ".bui_price_headline",
-            ".prco-text-nowrap-helper",
-        ]
+        return pricing_data
 
-        price_text = None
-        for selector in price_selectors:
-            price_elem = soup.select_one(selector)
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                if price_text and any(char.isdigit() for char in price_text):
-                    break
-
-        # Check availability status
-        availability_status = "available"
-
-        # First check for property-level sold out indicators
-        sold_out_indicators = [
-            ".soldout_property",
-            "[data-testid='soldout-property']",
-            ".bui-banner--warning",
-        ]
+    return await with_retries(attempt, stats=failure_stats, label=f"{slug} {check_in}")
 
-        property_sold_out = False
-        for selector in sold_out_indicators:
-            if soup.select_one(selector):
-                property_sold_out = True
-                break
-
-        # Check for "no availability" text at property level
-        no_avail_texts = ["no availability", "sold out", "not available", "fully booked"]
-        page_text = soup.get_text().lower()
-        for indicator in no_avail_texts:
-            if indicator in page_text and "room" not in page_text[max(0, page_text.find(indicator)-50):page_text.find(indicator)+50]:
-                property_sold_out = True
-                break
-
-        # Check if any rooms are available (more accurate for multi-room properties)
-        # Look for room availability indicators and count room types
-        room_table = soup.select_one("#hprt-table") or soup.select_one("[data-block-id='rooms-table']")
-        
-        total_room_types = 0
-        available_room_types = 0
-        sold_out_room_types = 0
-        room_prices = []  # List of all available room prices
-        room_names_list = []  # List of room names from DOM
-        
-        if room_table:
-            # Find all room rows (each row represents a room type)
-            room_rows = room_table.select("tr.js-rt-block-row, tr[data-block-id]")
-            
-            if not room_rows:
-                # Fallback: count by price cells if no specific room rows found
-                all_price_cells = room_table.select(".hprt-table-cell-price")
-                
-                for cell in all_price_cells:
-                    price_elem = cell.select_one("[data-testid='price-and-discounted-price'], .bui-price-display__value")
-                    if price_elem:
-                        available_room_types += 1
-                        room_price_text = price_elem.get_text(strip=True)
-                        room_price = extract_price_from_text(room_price_text)
-                        if room_price:
-                            room_prices.append(room_price)
-                
-                total_room_types = len(room_table.select(".hprt-table-cell-roomtype, .hprt-roomtype-icon-link"))
-                sold_out_room_types = max(0, total_room_types - available_room_types)
-                
-                # Extract room names
-                room_name_elems = room_table.select(".hprt-roomtype-icon-link, .hprt-roomtype-name")
-                for elem in room_name_elems:
-                    name = elem.get_text(strip=True)
-                    if name:
-                        room_names_list.append(name)
-            else:
-                for row in room_rows:
-                    total_room_types += 1
-                    
-                    # Extract room name
-                    room_name_elem = row.select_one(".hprt-roomtype-icon-link, .hprt-roomtype-name, [data-testid='title']")
-                    if room_name_elem:
-                        room_name = room_name_elem.get_text(strip=True)
-                        if room_name:
-                            room_names_list.append(room_name)
-                    
-                    # Check if this room type has a bookable price
-                    price_cell = row.select_one(".hprt-table-cell-price")
-                    if price_cell:
-                        price_elem = price_cell.select_one("[data-testid='price-and-discounted-price'], .bui-price-display__value")
-                        if price_elem:
-                            available_room_types += 1
-                            room_price_text = price_elem.get_text(strip=True)
-                            room_price = extract_price_from_text(room_price_text)
-                            if room_price:
-                                room_prices.append(room_price)
-                        else:
-                            sold_out_room_types += 1
-                    else:
-                        sold_out_room_types += 1
-            
-            # Determine availability based on room types
-            if available_room_types > 0:
-                availability_status = "available"
-            else:
-                availability_status = "sold_out"
-        elif property_sold_out:
-            # No room table and property-level sold out indicators
-            availability_status = "sold_out"
-        
-        # Calculate occupancy rate and pricing statistics at property level
-        min_room_price = None
-        max_room_price = None
-        avg_room_price = None
-        
-        if room_prices:
-            min_room_price = min(room_prices)
-            max_room_price = max(room_prices)
-            avg_room_price = round(sum(room_prices) / len(room_prices), 2)
-        
-        price = extract_price_from_text(price_text)
-
-    # Extract original price if discounted (DOM-based, as discount info not in JSON)
-    original_price_elem = soup.select_one(".bui-price-display__original")
-    original_price_text = original_price_elem.get_text(strip=True) if original_price_elem else None
-
-    # Extract rating
-    score_elem = soup.select_one("[data-testid='review-score'] .d10a6220b4")
-    score = score_elem.get_text(strip=True) if score_elem else None
-
-    # Extract review count
-    review_elem = soup.select_one("[data-testid='review-score'] .e6208ee469")
-    review_count = None
-    if review_elem:
-        review_text = review_elem.get_text(strip=True)
-        match = re.search(r'([\d,]+)', review_text)
-        if match:
-            review_count = int(match.group(1).replace(',', ''))
-
-    # Convert prices
-    price = extract_price_from_text(price_text)
-    original_price = extract_price_from_text(original_price_text)
-    price_per_night = price / nights if price and nights > 0 else None
-
-    # Check for discount
-    has_discount = original_price is not None and price is not None and original_price > price
-    discount_percentage = None
-    if has_discount:
-        discount_percentage = round(((original_price - price) / original_price) * 100, 2)
-
-    # Calculate property occupancy rate
-    property_occupancy_rate = None
-    if total_room_types > 0:
-        property_occupancy_rate = round((sold_out_room_types / total_room_types) * 100, 2)
-    
-    # Convert room names list to comma-separated string
-    room_names = ', '.join(room_names_list) if room_names_list else ''
 
+def build_error_record(slug: str, check_in: str, check_out: str, nights: int):
+    """Row written for a date check that failed on every attempt and re-queue pass."""
     return {
         "hotel_slug": slug,
         "check_in_date": check_in,
@@ -495,230 +246,77 @@ def extract_pricing_data(html: str, slug: str, check_in: str, check_out: str, ni
         "nights": nights,
         "guests": config.GUESTS,
         "rooms": config.ROOMS,
-        "availability": availability_status,
-        "total_price": price,
-        "original_price": original_price,
-        "price_per_night": price_per_night,
-        "has_discount": has_discount,
-        "discount_percentage": discount_percentage,
-        "rating_score": score,
-        "review_count": review_count,
+        "availability": "error",
+        "total_price": None,
+        "original_price": None,
+        "price_per_night": None,
+        "has_discount": None,
+        "discount_percentage": None,
+        "rating_score": None,
+        "review_count": None,
         "scrape_timestamp": datetime.now().isoformat(),
         "day_offset": None,
-        "total_room_types": total_room_types,
-        "available_room_types": available_room_types,
-        "sold_out_room_types": sold_out_room_types,
-        "property_occupancy_rate": property_occupancy_rate,
-        "min_room_price": min_room_price,
-        "max_room_price": max_room_price,
-        "avg_room_price": avg_room_price,
-        "room_names": room_names,
     }
 
 
-async def fetch_pricing_for_date(context, slug: str, cc: str, check_in: str, check_out: str, nights: int):
-    """Fetch pricing data for a specific property and date range."""
-    url = (
-        f"{BASE_URL}/hotel/{cc}/{slug}.en-gb.html"
-        f"?checkin={check_in}"
-        f"&checkout={check_out}"
-        f"&group_adults={config.GUESTS}"
-        f"&group_children=0"
-        f"&no_rooms={config.ROOMS}"
-    )
-
-    page = await context.new_page()
-    
-    try:
-        await page.goto(url, timeout=config.BROWSER_TIMEOUT, wait_until="domcontentloaded")
-        
-        # Wait for page to stabilize - Booking.com does client-side rendering
-        await page.wait_for_timeout(3000)
-        
-        # Wait for page to be interactive (no more major navigation)
-        await page.wait_for_load_state("load", timeout=10000)
-        
-        # Try to wait for room table (optional - won't fail if not found)
-        try:
-            await page.wait_for_selector("#hprt-table, [data-block-id='rooms-table']", timeout=3000, state="attached")
-            # Give it a moment to fully render
-            await page.wait_for_timeout(500)
-        except:
-            # No room table - this is normal for single-unit properties (villas, etc.)
-            pass
+def build_date_tasks(hotel):
+    """Build the list of date-check tasks for a property.
 
-        html = await page.content()
-        pricing_data = extract_pricing_data(html, slug, check_in, check_out, nights)
+    Each task is a dict with the property identifiers, check-in/check-out
+    strings, stay length and (in occupancy mode) the day offset.
+    """
+    today = datetime.now().date()
+    tasks = []
 
-        return pricing_data
-    except Exception as e:
-        print(f"   Warning: Error fetching {slug} for {check_in}: {str(e)}")
+    def make_task(check_in_date, nights, day_offset=None):
+        check_out_date = check_in_date + timedelta(days=nights)
         return {
-            "hotel_slug": slug,
-            "check_in_date": check_in,
-            "check_out_date": check_out,
+            "hotel_name": hotel["name"],
+            "hotel_slug": hotel["slug"],
+            "cc": hotel["cc"],
+            "check_in_date": format_date(check_in_date),
+            "check_out_date": format_date(check_out_date),
             "nights": nights,
-            "guests": config.GUESTS,
-            "rooms": config.ROOMS,
-            "availability": "error",
-            "total_price": None,
-            "original_price": None,
-            "price_per_night": None,
-            "has_discount": None,
-            "discount_percentage": None,
-            "rating_score": None,
-            "review_count": None,
-            "scrape_timestamp": datetime.now().isoformat(),
-            "day_offset": None,
+            "day_offset": day_offset,
         }
-    finally:
-        await page.close()
-
-
-async def fetch_all_pricing(play, slug: str, cc: str, hotel_name: str, save_batch_callback=None):
-    """Fetch pricing data for all configured date ranges for a property.
-    
-    Args:
-        play: Playwright instance
-        slug: Hotel slug
-        cc: Country code
-        hotel_name: Hotel name
-        save_batch_callback: Optional function to save data incrementally (receives list of pricing records)
-    """
-    all_pricing = []
-    today = datetime.now().date()
-    
-    # Configuration for incremental saves
-    SAVE_BATCH_SIZE = 10  # Save every N records
-
-    print(f"-> Scraping {hotel_name} ({slug})")
 
     if config.OCCUPANCY_MODE:
         # OCCUPANCY MODE: Check every day for availability
-        print(f"   Mode: Occupancy tracking (next {config.DAYS_AHEAD} days)")
-
-        days_checked = 0
         for day_offset in range(0, config.DAYS_AHEAD + 1, config.OCCUPANCY_CHECK_INTERVAL):
             check_in_date = today + timedelta(days=day_offset)
-            check_out_date = check_in_date + timedelta(days=config.OCCUPANCY_STAY_DURATION)
-
-            check_in_str = format_date(check_in_date)
-            check_out_str = format_date(check_out_date)
-
-            if config.SHOW_PROGRESS and days_checked % config.PROGRESS_INTERVAL == 0:
-                print(f"   -> Checking day {day_offset}/{config.DAYS_AHEAD}...")
-
-            # Create fresh browser context for EACH date check to avoid detection
-            browser = await play.chromium.launch(
-                headless=config.HEADLESS,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox'
-                ]
-            )
-            
-            # Create context and apply comprehensive stealth scripts
-            stealth_config = Stealth()
-            context = await browser.new_context(
-                user_agent=USER_AGENT,
-                locale="en-GB",
-                viewport={'width': 1920, 'height': 1080}
-            )
-            
-            # Apply all stealth scripts to the context
-            for script in stealth_config.enabled_scripts:
-                await context.add_init_script(script)
-            
-            try:
-                pricing = await fetch_pricing_for_date(
-                    context, slug, cc, check_in_str, check_out_str, config.OCCUPANCY_STAY_DURATION
-                )
-                pricing["hotel_name"] = hotel_name
-                pricing["day_offset"] = day_offset
-                all_pricing.append(pricing)
-                
-                # Save incrementally every SAVE_BATCH_SIZE records
-                if save_batch_callback and len(all_pricing) % SAVE_BATCH_SIZE == 0:
-                    save_batch_callback(all_pricing[-SAVE_BATCH_SIZE:])
-                    
-            finally:
-                await browser.close()
-
-            days_checked += 1
-            await asyncio.sleep(config.REQUEST_DELAY)
-
-        # Calculate occupancy stats
-        total_days = len(all_pricing)
-        sold_out_days = sum(1 for p in all_pricing if p["availability"] == "sold_out")
-        available_days = sum(1 for p in all_pricing if p["availability"] == "available")
-        occupancy_rate = (sold_out_days / total_days * 100) if total_days > 0 else 0
-
-        print(f"   Occupancy Rate: {occupancy_rate:.1f}% ({sold_out_days}/{total_days} days sold out)")
-
+            tasks.append(make_task(check_in_date, config.OCCUPANCY_STAY_DURATION, day_offset))
     else:
         # PRICING MODE: Check specific date combinations
-        print(f"   Mode: Pricing analysis ({len(config.CHECK_IN_OFFSETS)} check-in dates)")
-
         for check_in_offset in config.CHECK_IN_OFFSETS:
             check_in_date = today + timedelta(days=check_in_offset)
-
             for duration in config.STAY_DURATIONS:
-                check_out_date = check_in_date + timedelta(days=duration)
-
-                check_in_str = format_date(check_in_date)
-                check_out_str = format_date(check_out_date)
-
-                print(f"   -> {check_in_str} to {check_out_str} ({duration} nights)")
-
-                # Create fresh browser context for EACH date/duration combo
-                browser = await play.chromium.launch(
-                    headless=config.HEADLESS,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox'
-                    ]
-                )
-                
-                # Create context and apply comprehensive stealth scripts
-                stealth_config = Stealth()
-                context = await browser.new_context(
-                    user_agent=USER_AGENT,
-                    locale="en-GB",
-                    viewport={'width': 1920, 'height': 1080}
-                )
-                
-                # Apply all stealth scripts to the context
-                for script in stealth_config.enabled_scripts:
-                    await context.add_init_script(script)
-                
-                try:
-                    pricing = await fetch_pricing_for_date(
-                        context, slug, cc, check_in_str, check_out_str, duration
-                    )
-                    pricing["hotel_name"] = hotel_name
-                    all_pricing.append(pricing)
-                    
-                    # Save incrementally every SAVE_BATCH_SIZE records
-                    if save_batch_callback and len(all_pricing) % SAVE_BATCH_SIZE == 0:
-                        save_batch_callback(all_pricing[-SAVE_BATCH_SIZE:])
-                        
-                finally:
-                    await browser.close()
-
-                await asyncio.sleep(config.REQUEST_DELAY)
-    
-    # Save any remaining records that didn't make a full batch
-    if save_batch_callback and len(all_pricing) % SAVE_BATCH_SIZE != 0:
-        remaining = len(all_pricing) % SAVE_BATCH_SIZE
-        save_batch_callback(all_pricing[-remaining:])
+                tasks.append(make_task(check_in_date, duration))
 
-    return all_pricing
+    return tasks
+
+
+async def fetch_task(fetcher, task, parser_pool=None, capture_store=None):
+    """Fetch pricing data for a single date-check task."""
+    pricing = await fetch_pricing_for_date(
+        fetcher, task["hotel_slug"], task["cc"], task["check_in_date"], task["check_out_date"], task["nights"],
+        parser_pool=parser_pool, capture_store=capture_store,
+    )
+    pricing["hotel_name"] = task["hotel_name"]
+    pricing["day_offset"] = task["day_offset"]
+    return pricing
 
 
 async def main():
-    """Main execution function."""
+    """Main execution function.
+
+    Returns:
+        dict: Run statistics for the scrape log (None if nothing was scraped)
+    """
+    global readiness_stats, parse_stats, failure_stats
+    readiness_stats = ReadinessStats()
+    parse_stats = ParseStats()
+    failure_stats = FailureStats()
+
     config.ensure_directories()
 
     # Load hotels configuration
@@ -734,16 +332,16 @@ async def main():
     all_data = []
     completed_slugs = list(already_completed)  # Track what we've completed
 
-    # Fieldnames for CSV
-    fieldnames = [
-        "hotel_name", "hotel_slug", "check_in_date", "check_out_date",
-        "nights", "guests", "rooms", "day_offset", "availability", "total_price",
-        "original_price", "price_per_night", "has_discount",
-        "discount_percentage", "rating_score", "review_count",
-        "total_room_types", "available_room_types", "sold_out_room_types", 
-        "property_occupancy_rate", "min_room_price", "max_room_price", 
-        "avg_room_price", "room_names", "scrape_timestamp"
-    ]
+    fieldnames = CSV_FIELDNAMES
+    today = get_today_str()
+    journal = ProgressJournal()
+
+    parquet_store = None
+    if config.ENABLE_PARQUET:
+        try:
+            parquet_store = ParquetStore()
+        except RuntimeError as e:
+            print(f"Warning: {e} - writing CSV only")
 
     # Archive and start fresh if it's a new day
     # Append to existing file if resuming same-day scraping
@@ -751,12 +349,21 @@ async def main():
         archive_existing_data()
         csv_mode = "w"
     else:
-        csv_mode = "a" if config.PRICING_CSV.exists() else "w"
+        if repair_csv_tail(config.PRICING_CSV):
+            print(f"Removed a partially written row from {config.PRICING_CSV.name}")
+        csv_mode = "a" if config.PRICING_CSV.exists() and config.PRICING_CSV.stat().st_size > 0 else "w"
     
     if csv_mode == "w":
         with config.PRICING_CSV.open("w", newline="", encoding="utf-8") as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
+        journal.reset()
+        stored_keys = set()
+        # Stamp today's date now so a crash before the first property completes still resumes
+        save_daily_progress(completed_slugs)
+    else:
+        # Dates whose rows are already in today's CSV - journaled, or written just before a crash
+        stored_keys = journal.stored_keys(today) | csv_stored_keys(config.PRICING_CSV)
 
     print("="*70)
     print(f"BOOKING.COM PRICING SCRAPER - {config.get_mode_name()}")
@@ -773,56 +380,322 @@ async def main():
         print(f"Stay durations: {config.STAY_DURATIONS} nights")
 
     print(f"Guests: {config.GUESTS}, Rooms: {config.ROOMS}")
-    print(f"Saving incrementally every 10 records to: {config.PRICING_CSV.name}")
+    print(f"Concurrency: {config.MAX_CONCURRENT_PAGES} pages ({config.MAX_CONCURRENT_PER_PROPERTY} per property)")
+    print(f"Request rate: adaptive, {config.RATE_LIMIT_MIN}-{config.RATE_LIMIT_MAX} req/s")
+    print(f"Saving incrementally every {SAVE_BATCH_SIZE} records to: {config.PRICING_CSV.name}")
     print("="*70)
     print()
 
-    # Helper function for incremental saves
-    def save_batch(batch_data):
-        """Save a batch of pricing records to CSV."""
-        with config.PRICING_CSV.open("a", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writerows(batch_data)
+    # Per-property bookkeeping so progress stays correct when dates complete out of order
+    tasks = []
+    property_state = {}
+    skipped_dates = 0
+    carried_rows = {}
+    planner = RefreshPlanner().load_history() if config.ENABLE_REFRESH_TIERS else None
+    for hotel in hotels_to_scrape:
+        all_tasks = build_date_tasks(hotel)
+        hotel_tasks = [
+            t for t in all_tasks
+            if date_key(t["hotel_slug"], t["check_in_date"], t["check_out_date"]) not in stored_keys
+        ]
+        skipped_dates += len(all_tasks) - len(hotel_tasks)
+        if not hotel_tasks:
+            # Every date was stored before the last run stopped - only the progress entry is missing
+            completed_slugs.append(hotel["slug"])
+            save_daily_progress(completed_slugs)
+            print(f"{hotel['name']}: all dates already stored - marked complete")
+            continue
+        if planner is not None:
+            # Far-out, stable cells are carried forward instead of fetched
+            hotel_tasks, carried_rows[hotel["slug"]] = planner.plan(hotel_tasks)
+        tasks.extend(hotel_tasks)
+        property_state[hotel["slug"]] = {
+            "hotel": hotel,
+            "pending": len(hotel_tasks),
+            "records": [],
+            "failed": False,
+            "started": False,
+        }
 
-    async with async_playwright() as p:
-        for i, hotel in enumerate(hotels_to_scrape, 1):
-            slug = hotel["slug"]
-            cc = hotel["cc"]
-            name = hotel["name"]
+    if skipped_dates:
+        print(f"Resuming: {skipped_dates} date checks already stored today - skipping them\n")
+    if planner is not None:
+        print(f"Refresh plan: {planner.summary()}\n")
+    if parquet_store is not None:
+        print(f"Parquet dataset: {config.PARQUET_DIR} (scrape_date={today})\n")
 
-            total_done = len(already_completed) + i
-            print(f"[{total_done}/{len(all_hotels)}] Scraping {name}...")
+    pending_batch = []
 
+    def flush_batch():
+        """Save buffered pricing records to CSV."""
+        if not pending_batch:
+            return
+        with config.PRICING_CSV.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writerows(pending_batch)
+        if parquet_store is not None:
             try:
-                pricing_data = await fetch_all_pricing(p, slug, cc, name, save_batch_callback=save_batch)
-
-                if pricing_data:
-                    available = sum(1 for p in pricing_data if p["availability"] == "available")
-                    sold_out = sum(1 for p in pricing_data if p["availability"] == "sold_out")
-                    print(f"   OK: {len(pricing_data)} records | Available: {available}, Sold out: {sold_out}")
-                    print(f"   Data saved incrementally during scraping")
-
-                    all_data.extend(pricing_data)
-
-                    # Mark as completed and save progress
-                    completed_slugs.append(slug)
-                    save_daily_progress(completed_slugs)
-                    print(f"   Progress saved ({len(completed_slugs)}/{len(all_hotels)} complete)\n")
-                else:
-                    print(f"   Warning: No data for {name}\n")
-                    # Still mark as attempted
-                    completed_slugs.append(slug)
-                    save_daily_progress(completed_slugs)
-
+                parquet_store.write_batch(pending_batch, today)
             except Exception as e:
-                print(f"   ERROR: {name} - {str(e)}")
-                print(f"   Progress saved. You can resume later.\n")
-                # Don't mark as completed if there was an error
-                break
+                # The CSV is the record of the run - a Parquet problem must not stop scraping
+                print(f"   Warning: Parquet write failed: {e}")
+        # Journal only after the rows are on disk
+        journal.record(pending_batch, today)
+        pending_batch.clear()
+
+    started_count = [len(already_completed)]
+
+    def on_start(task):
+        state = property_state[task["hotel_slug"]]
+        if not state["started"]:
+            state["started"] = True
+            started_count[0] += 1
+            print(f"[{started_count[0]}/{len(all_hotels)}] Scraping {task['hotel_name']} ({task['hotel_slug']})...")
+
+    def complete_property(state):
+        hotel = state["hotel"]
+        records = state["records"]
+        name = hotel["name"]
+
+        # Rows must be on disk before the property is marked complete
+        flush_batch()
+
+        if state["failed"]:
+            print(f"   ERROR: {name} - one or more date checks failed")
+            print(f"   Progress saved. You can resume later.\n")
+            # Don't mark as completed if there was an error
+            return
+
+        if records:
+            available = sum(1 for r in records if r["availability"] == "available")
+            sold_out = sum(1 for r in records if r["availability"] == "sold_out")
+            errors = sum(1 for r in records if r["availability"] == "error")
+            print(f"   OK: {name} - {len(records)} records | Available: {available}, Sold out: {sold_out}, Errors: {errors}")
+            if config.OCCUPANCY_MODE:
+                # Error rows are not observations - leave them out of the rate
+                checked = len(records) - errors
+                occupancy_rate = (sold_out / checked * 100) if checked else 0
+                print(f"   Occupancy Rate: {occupancy_rate:.1f}% ({sold_out}/{checked} days sold out)")
+            all_data.extend(records)
+        else:
+            print(f"   Warning: No data for {name}")
+
+        # Mark as completed and save progress
+        completed_slugs.append(hotel["slug"])
+        save_daily_progress(completed_slugs)
+        print(f"   Progress saved ({len(completed_slugs)}/{len(all_hotels)} complete)\n")
+
+    def finish_task(task):
+        state = property_state[task["hotel_slug"]]
+        state["pending"] -= 1
+        if state["pending"] == 0:
+            complete_property(state)
+
+    def store_result(task, pricing):
+        state = property_state[task["hotel_slug"]]
+        state["records"].append(pricing)
+        pending_batch.append(pricing)
+
+        checked = len(state["records"])
+        if config.SHOW_PROGRESS and config.OCCUPANCY_MODE and checked % config.PROGRESS_INTERVAL == 0:
+            total = checked + state["pending"] - 1
+            print(f"   -> {task['hotel_name']}: {checked}/{total} days checked")
+        elif not config.OCCUPANCY_MODE:
+            print(f"   -> {task['hotel_name']}: {task['check_in_date']} to {task['check_out_date']} ({task['nights']} nights)")
+
+        # Save incrementally every SAVE_BATCH_SIZE records
+        if len(pending_batch) >= SAVE_BATCH_SIZE:
+            flush_batch()
+
+        finish_task(task)
+
+    def on_result(task, pricing):
+        if task.get("last_failure"):
+            # Succeeded on a re-queue pass
+            failure_stats.record_recovered(task["last_failure"])
+        store_result(task, pricing)
+
+    def requeue(task, exc):
+        if not isinstance(exc, DateCheckFailed) or not exc.retryable:
+            return False
+        if task.get("requeues", 0) >= config.RETRY_REQUEUE_PASSES:
+            return False
+        task["requeues"] = task.get("requeues", 0) + 1
+        task["last_failure"] = exc.failure_class
+        failure_stats.record_requeued(exc.failure_class)
+        print(f"   Re-queued {task['hotel_name']} {task['check_in_date']} ({exc.failure_class}) to the end of the run")
+        return True
+
+    def on_error(task, exc):
+        if isinstance(exc, DateCheckFailed):
+            # Out of retries - keep an error row so the date is visible, and move on
+            failure_stats.record_gave_up(exc.failure_class)
+            print(f"   ERROR: {task['hotel_name']} {task['check_in_date']} - gave up ({exc})")
+            record = build_error_record(task["hotel_slug"], task["check_in_date"], task["check_out_date"], task["nights"])
+            record["hotel_name"] = task["hotel_name"]
+            record["day_offset"] = task["day_offset"]
+            store_result(task, record)
+            return
+
+        print(f"   ERROR: {task['hotel_name']} {task['check_in_date']} - {str(exc)}")
+        property_state[task["hotel_slug"]]["failed"] = True
+        finish_task(task)
+
+    # Carried-forward rows are written up front; properties with nothing left to fetch complete now
+    for slug, rows in carried_rows.items():
+        state = property_state[slug]
+        state["records"].extend(rows)
+        pending_batch.extend(rows)
+        if state["pending"] == 0:
+            complete_property(state)
+    flush_batch()
+
+    async with async_playwright() as p:
+        resource_filter = ResourceFilter() if config.BLOCK_RESOURCES else None
+        pool = BrowserPool(p, user_agent=USER_AGENT, resource_filter=resource_filter)
+        rate_limiter = AdaptiveRateLimiter(urlparse(BASE_URL).hostname)
+        fetcher = build_fetcher(pool, user_agent=USER_AGENT, readiness_stats=readiness_stats, rate_limiter=rate_limiter)
+        parser_pool = ParserPool()
+        capture_store = CaptureStore() if config.ENABLE_CAPTURE else None
+        scheduler = ScrapeScheduler(lambda task: fetch_task(fetcher, task, parser_pool, capture_store))
+        try:
+            await scheduler.run(tasks, on_result, on_error=on_error, on_start=on_start, requeue=requeue)
+        finally:
+            flush_batch()
+            await fetcher.close()
+            parser_pool.close()
+            if parquet_store is not None:
+                try:
+                    parquet_store.compact(today)
+                    parquet_store.rollup()
+                except Exception as e:
+                    print(f"   Warning: Parquet compaction failed: {e}")
+
+    print(f"Fetch engines: {fetcher.summary()}")
+    print(f"Rate limiter: {rate_limiter.summary()}")
+    print(f"Failures: {failure_stats.summary()}")
+    print(f"Browser pool: {pool.summary()}")
+    if resource_filter is not None:
+        print(f"Resource filter: {resource_filter.summary()}")
+    print(f"Page readiness: {readiness_stats.summary()}")
+    print(f"Parse pool: {parser_pool.summary()}")
+    print(f"Parse tiers: {parse_stats.summary()}")
+    if capture_store is not None:
+        print(f"Capture store: {capture_store.summary()}")
+    if parquet_store is not None:
+        print(f"Parquet dataset: {parquet_store.summary()}")
+
+    # Today's CSV holds every row of the day (including resumed runs) - replace the day's snapshot
+    history_rows = None
+    if config.ENABLE_HISTORY_DB and config.PRICING_CSV.exists():
+        try:
+            with HistoryDB() as history_db:
+                history_rows = history_db.ingest_csv(config.PRICING_CSV, today, replace=True)
+                print(f"History DB: {history_rows} rows for {today} ({history_db.summary()})")
+        except Exception as e:
+            print(f"   Warning: history DB ingest failed: {e}")
+
+    run_stats = {
+        "records": sum(len(state["records"]) for state in property_state.values()),
+        "fetch_engines": fetcher.to_dict(),
+        "rate_limiter": rate_limiter.to_dict(),
+        "failures": failure_stats.to_dict(),
+        "browser_pool": dict(pool.stats),
+        "readiness": readiness_stats.to_dict(),
+        "parse_pool": dict(parser_pool.stats),
+        "parse_timings": parse_stats.to_dict(),
+    }
+    if resource_filter is not None:
+        run_stats["resource_filter"] = dict(resource_filter.stats)
+    if capture_store is not None:
+        run_stats["capture_store"] = dict(capture_store.stats)
+    if planner is not None:
+        run_stats["refresh_planner"] = dict(planner.stats)
+    if parquet_store is not None:
+        run_stats["parquet"] = dict(parquet_store.stats)
+    if history_rows is not None:
+        run_stats["history_db"] = {"rows": history_rows}
 
     # Final summary
     if all_data:
         print("\n" + "="*70)
         print(f"COMPLETE: {len(all_data)} new records saved to {config.PRICING_CSV.name}")
 
-        # Occupancy summary (only for newly scraped properties)
\ No newline at end of file
+        # Occupancy summary (only for newly scraped properties)
+
+    return run_stats
+
+
+def replay(date_str, output_path=None, workers=None):
+    """
+    Rebuild pricing CSV rows from pages captured on date_str - no browser, no network.
+
+    Pages are parsed in parallel worker processes. Rows keep the original
+    scrape timestamps, so the output matches what a live run would have written
+    with the current parser.
+
+    Args:
+        date_str: Scrape date (YYYY-MM-DD) to replay
+        output_path: CSV to write (defaults to config.PRICING_CSV)
+        workers: Parser processes (defaults to all CPUs)
+
+    Returns:
+        int: Number of rows written
+    """
+    start = time.perf_counter()
+    store = CaptureStore()
+    entries = store.entries(date_str)
+    if not entries:
+        print(f"No captured pages for {date_str} in {store.index_dir}")
+        return 0
+
+    # Keep the property order of urls.json, then date order within a property
+    all_hotels = json.loads(config.HOTELS_FILE.read_text(encoding="utf-8"))
+    hotel_order = {hotel["slug"]: i for i, hotel in enumerate(all_hotels)}
+    hotel_names = {hotel["slug"]: hotel["name"] for hotel in all_hotels}
+    entries.sort(key=lambda e: (hotel_order.get(e["hotel_slug"], len(hotel_order)), e["hotel_slug"], e["check_in_date"], e["check_out_date"]))
+
+    print(f"Replaying {len(entries)} captured pages from {date_str}...")
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        records = list(executor.map(
+            parse_capture,
+            [store.blob_path(e["sha256"]) for e in entries],
+            [e["hotel_slug"] for e in entries],
+            [e["check_in_date"] for e in entries],
+            [e["check_out_date"] for e in entries],
+            [e["nights"] for e in entries],
+            chunksize=max(1, len(entries) // (workers * 4)),
+        ))
+
+    scrape_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    for entry, record in zip(entries, records):
+        record["hotel_name"] = hotel_names.get(entry["hotel_slug"], entry["hotel_slug"])
+        record["scrape_timestamp"] = entry["scrape_timestamp"]
+        if config.OCCUPANCY_MODE:
+            check_in_date = datetime.strptime(entry["check_in_date"], "%Y-%m-%d").date()
+            record["day_offset"] = (check_in_date - scrape_date).days
+
+    output_path = output_path or config.PRICING_CSV
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+    elapsed = time.perf_counter() - start
+    print(f"OK: {len(records)} rows written to {output_path} in {elapsed:.1f}s ({workers} workers)")
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Booking.com pricing & availability scraper")
+    parser.add_argument("--replay", metavar="YYYY-MM-DD", help="Rebuild pricing_data.csv from captured pages instead of scraping")
+    parser.add_argument("--output", help="CSV path for --replay (default: outputs/pricing_data.csv)")
+    parser.add_argument("--workers", type=int, help="Parser processes for --replay (default: all CPUs)")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, output_path=args.output, workers=args.workers)
+    else:
+        asyncio.run(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Booking.com that serves recorded property pages.
+
+Point config.BOOKING_BASE_URL at this server to exercise the fetch engines
+(HTTP and browser fallback) without touching the real site.
+
+Pages are looked up in the pages directory as:
+    <slug>_<checkin>.html   (date-specific recording)
+    <slug>.html             (any date)
+Unknown properties get a 404; a slug listed with --block gets a 403 block page.
+
+Usage:
+    python standin_server.py --pages ./recorded --port 8765
+"""
+import argparse
+from pathlib import Path
+
+from aiohttp import web
+
+BLOCK_PAGE = "<html><head><title>Access Denied</title></head><body><div id='px-captcha'></div></body></html>"
+
+
+def create_app(pages_dir, blocked_slugs=()):
+    """Build the aiohttp application serving recorded pages."""
+    pages_dir = Path(pages_dir)
+    blocked = set(blocked_slugs)
+
+    async def property_page(request):
+        slug = request.match_info["slug"]
+        check_in = request.query.get("checkin", "")
+
+        if slug in blocked:
+            return web.Response(text=BLOCK_PAGE, status=403, content_type="text/html")
+
+        for candidate in (pages_dir / f"{slug}_{check_in}.html", pages_dir / f"{slug}.html"):
+            if candidate.exists():
+                return web.Response(text=candidate.read_text(encoding="utf-8"), content_type="text/html")
+
+        raise web.HTTPNotFound(text=f"No recorded page for {slug}")
+
+    app = web.Application()
+    app.router.add_get("/hotel/{cc}/{slug}.en-gb.html", property_page)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Booking.com pages locally")
+    parser.add_argument("--pages", required=True, help="Directory of recorded .html pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--block", nargs="*", default=[], help="Slugs that should receive a block page")
+    args = parser.parse_args()
+
+    print(f"Serving recorded pages from {args.pages} on http://{args.host}:{args.port}")
+    web.run_app(create_app(args.pages, args.block), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()